@@ -0,0 +1,125 @@
+import asyncio
+import math
+import time
+
+# Durata adattiva delle fasi di un esperimento. Con la sequenza fissa ogni host
+# parte EXPERIMENT_DURATION_PER_HOST secondi dopo il precedente; in modalita'
+# adattiva l'host successivo parte appena il throughput aggregato dei flussi
+# attivi e' stabile: coefficiente di variazione (deviazione standard / media)
+# degli ultimi `window` campioni aggregati non oltre `threshold`, con la fase
+# lunga almeno `min_phase` e al massimo `max_phase` secondi. La fine dell'ultima
+# fase chiude l'esperimento.
+
+DEFAULTS = {"threshold": 0.05, "window": 5, "min_phase": 5.0, "max_phase": None}  # max_phase: duration_per_host
+
+
+def parse_config(value, duration_per_host: float):
+    """`adaptive` della richiesta (true o oggetto con i campi di DEFAULTS) -> configurazione
+    completa, None se disattivata. Solleva ValueError se non valida."""
+    if value is None or value is False:
+        return None
+    cfg = dict(DEFAULTS, max_phase=float(duration_per_host))
+    if value is not True:
+        if not isinstance(value, dict):
+            raise ValueError("'adaptive' deve essere true o un oggetto")
+        unknown = set(value) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Campi di 'adaptive' sconosciuti: {', '.join(sorted(unknown))}")
+        cfg.update({k: v for k, v in value.items() if v is not None})
+    try:
+        cfg = {"threshold": float(cfg["threshold"]), "window": int(cfg["window"]),
+               "min_phase": float(cfg["min_phase"]), "max_phase": float(cfg["max_phase"])}
+    except (TypeError, ValueError):
+        raise ValueError("Valori di 'adaptive' non numerici")
+    if cfg["threshold"] <= 0 or cfg["window"] < 2:
+        raise ValueError("'adaptive': threshold > 0 e window >= 2")
+    if not 0 <= cfg["min_phase"] <= cfg["max_phase"] or cfg["max_phase"] <= 0:
+        raise ValueError("'adaptive': serve 0 <= min_phase <= max_phase e max_phase > 0")
+    return cfg
+
+
+def coefficient_of_variation(values) -> float:
+    mean = sum(values) / len(values)
+    if mean <= 0:
+        return math.inf
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)) / mean
+
+
+class PhaseTimer:
+    """Decide la fine di ogni fase dai campioni per intervallo dei client.
+
+    `add(hostname, sample)` riceve i campioni (stesso formato di live_stream);
+    `wait_phase(active, host)` attende la fine della fase iniziata con l'avvio di
+    `host`, con `active` = host con un client in corso. Va usato da un solo event loop."""
+
+    def __init__(self, threshold: float, window: int, min_phase: float, max_phase: float,
+                 interval: float = 1.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.window = window
+        self.min_phase = min_phase
+        self.max_phase = max_phase
+        self.interval = interval
+        self.clock = clock
+        self.started = clock()
+        self.phases = []
+        self._latest = {}  # host -> (bit/s dell'ultimo intervallo, istante di arrivo)
+
+    def add(self, hostname: str, sample: dict):
+        bps = sample.get("bits_per_second")
+        if bps is not None:
+            self._latest[hostname] = (float(bps), self.clock())
+
+    def offset(self) -> float:
+        return self.clock() - self.started
+
+    def aggregate(self, active: list, now: float, used: dict = None):
+        # somma solo se ogni flusso attivo ha un campione recente e, con `used` (host ->
+        # arrivo dell'ultimo campione gia' sommato), nuovo: lo stesso campione non entra
+        # due volte nella finestra, abbassando il coefficiente di variazione
+        total = 0.0
+        for h in active:
+            last = self._latest.get(h)
+            if last is None or now - last[1] > 2 * self.interval:
+                return None
+            if used is not None and last[1] <= used.get(h, -math.inf):
+                return None
+            total += last[0]
+        return total
+
+    async def wait_phase(self, active: list, host: str) -> dict:
+        begin = self.clock()
+        series, cv, reason = [], None, "max_phase"
+        used = {}
+        self._latest.pop(host, None)
+        while True:
+            remaining = self.max_phase - (self.clock() - begin)
+            if remaining <= 0:
+                break
+            # controllo a meta' intervallo: i client non consegnano i campioni in sincronia
+            await asyncio.sleep(min(self.interval / 2, remaining))
+            now = self.clock()
+            total = self.aggregate(active, now, used)
+            if total is None:
+                continue
+            used = {h: self._latest[h][1] for h in active}
+            series.append(total)
+            if len(series) >= self.window:
+                cv = coefficient_of_variation(series[-self.window:])
+                if now - begin >= self.min_phase and cv <= self.threshold:
+                    reason = "converged"
+                    break
+        end = self.clock()
+        phase = {"host": host, "start": round(begin - self.started, 3), "end": round(end - self.started, 3),
+                 "seconds": round(end - begin, 3), "reason": reason,
+                 "cv": round(cv, 4) if cv is not None and math.isfinite(cv) else None}
+        self.phases.append(phase)
+        return phase
+
+    def saved_seconds(self, phases_planned: int) -> float:
+        """Tempo risparmiato rispetto alla sequenza fissa (max_phase per fase)."""
+        return round(phases_planned * self.max_phase - sum(p["seconds"] for p in self.phases), 3)
+
+    def describe(self, phases_planned: int) -> dict:
+        return {"mode": "adaptive", "threshold": self.threshold, "window": self.window,
+                "min_phase": self.min_phase, "max_phase": self.max_phase,
+                "phases": list(self.phases), "saved_seconds": self.saved_seconds(phases_planned)}
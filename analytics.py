@@ -0,0 +1,338 @@
+import csv
+import io
+import json
+import math
+import os
+import threading
+
+# pyarrow è opzionale: serve solo per l'esportazione in Parquet
+try:
+    import pyarrow
+    import pyarrow.parquet
+except Exception:
+    pyarrow = None
+
+# Aggregati dei risultati per esperimento, per sweep e complessivi, aggiornati a
+# ogni risultato salvato (save_result) invece di riscansionare lo storico a ogni
+# richiesta. Per ogni gruppo si tengono solo somme e contatori per host, da cui
+# medie, deviazione standard, goodput totale, fairness di Jain e confronto
+# TCP/UDP si ricavano in O(host). La vista materializzata e' salvata in
+# `<risultati>.analytics.json` insieme al numero di record gia' inclusi:
+# all'avvio vengono aggiunti solo i record scritti dopo (letti tramite l'indice
+# del ResultsStore, senza riscansionare il file).
+
+VERSION = 1
+SAVE_INTERVAL = 1.0  # s massimi tra un risultato e la scrittura della vista materializzata
+EXPORT_LEVELS = ("hosts", "groups")
+EXPORT_FORMATS = ("csv", "parquet")
+
+
+def _new_host(protocol: str) -> dict:
+    return {"protocol": protocol, "n": 0, "sum": 0.0, "sumsq": 0.0, "min": None, "max": None,
+            "server_sum": 0.0, "server_n": 0, "jitter_sum": 0.0, "jitter_n": 0,
+            "lost": 0, "packets": 0, "retransmits": 0, "retransmits_n": 0, "host_limited": 0}
+
+
+def _new_group() -> dict:
+    return {"results": 0, "hosts": {}, "experiments": 0, "sweep_id": None, "start": None, "end": None}
+
+
+def _fold(group: dict, r: dict):
+    """Aggiunge il risultato `r` agli accumulatori del gruppo."""
+    group["results"] += 1
+    for key, pick in (("start", min), ("end", max)):
+        value = r.get(f"{key}_time")
+        if value:
+            group[key] = value if group[key] is None else pick(group[key], value)
+    protocol = str(r.get("protocol", "TCP")).upper()
+    # stesso host con protocolli diversi (es. sweep TCP x UDP): accumulatori separati
+    key = r.get("hostname") if protocol == "TCP" else f"{r.get('hostname')}/{protocol}"
+    h = group["hosts"].setdefault(key, _new_host(protocol))
+    h["hostname"] = r.get("hostname")
+    tp = r.get("throughput")
+    if isinstance(tp, (int, float)):
+        h["n"] += 1
+        h["sum"] += tp
+        h["sumsq"] += tp * tp
+        h["min"] = tp if h["min"] is None else min(h["min"], tp)
+        h["max"] = tp if h["max"] is None else max(h["max"], tp)
+    if isinstance(r.get("server_throughput"), (int, float)):
+        h["server_sum"] += r["server_throughput"]
+        h["server_n"] += 1
+    if isinstance(r.get("jitter_ms"), (int, float)):
+        h["jitter_sum"] += r["jitter_ms"]
+        h["jitter_n"] += 1
+    if isinstance(r.get("packets"), int) and isinstance(r.get("lost_packets"), int):
+        h["lost"] += r["lost_packets"]
+        h["packets"] += r["packets"]
+    if isinstance(r.get("retransmits"), int):
+        h["retransmits"] += r["retransmits"]
+        h["retransmits_n"] += 1
+    if r.get("host_limited"):
+        # viste salvate prima del campionamento delle risorse non hanno il contatore
+        h["host_limited"] = h.get("host_limited", 0) + 1
+
+
+def jain_index(values) -> float:
+    values = [v for v in values if v is not None]
+    sq = sum(v * v for v in values)
+    return round(sum(values) ** 2 / (len(values) * sq), 4) if sq else None
+
+
+def _host_summary(h: dict) -> dict:
+    mean = h["sum"] / h["n"] if h["n"] else None
+    std = math.sqrt(max(0.0, h["sumsq"] / h["n"] - mean * mean)) if h["n"] else None
+    r = lambda v, nd=3: round(v, nd) if v is not None else None
+    return {
+        "hostname": h.get("hostname"),
+        "protocol": h["protocol"],
+        "results": h["n"],
+        "mean_mbps": r(mean),
+        "std_mbps": r(std),
+        "min_mbps": r(h["min"]),
+        "max_mbps": r(h["max"]),
+        "server_mean_mbps": r(h["server_sum"] / h["server_n"]) if h["server_n"] else None,
+        "mean_jitter_ms": r(h["jitter_sum"] / h["jitter_n"], 4) if h["jitter_n"] else None,
+        "loss_percent": r(100.0 * h["lost"] / h["packets"], 4) if h["packets"] else None,
+        "retransmits": h["retransmits"] if h["retransmits_n"] else None,
+        # risultati limitati dalla CPU della macchina (resource_sampler.py), da escludere dai confronti
+        "host_limited": h.get("host_limited", 0),
+    }
+
+
+def summarize(group: dict) -> dict:
+    hosts = {k: _host_summary(h) for k, h in sorted(group["hosts"].items())}
+    means = [h["mean_mbps"] for h in hosts.values() if h["mean_mbps"] is not None]
+    by_protocol = {}
+    for proto in ("TCP", "UDP"):
+        sel = [(group["hosts"][k], s) for k, s in hosts.items() if s["protocol"] == proto]
+        if not sel:
+            continue
+        n = sum(acc["n"] for acc, _ in sel)
+        total = sum(acc["sum"] for acc, _ in sel)
+        entry = {"hosts": len(sel), "results": n, "mean_mbps": round(total / n, 3) if n else None,
+                 "goodput_mbps": round(sum(s["mean_mbps"] or 0.0 for _, s in sel), 3),
+                 "jain_fairness": jain_index(s["mean_mbps"] for _, s in sel)}
+        if proto == "UDP":
+            packets = sum(acc["packets"] for acc, _ in sel)
+            jn = sum(acc["jitter_n"] for acc, _ in sel)
+            entry["loss_percent"] = round(100.0 * sum(acc["lost"] for acc, _ in sel) / packets, 4) if packets else None
+            entry["mean_jitter_ms"] = round(sum(acc["jitter_sum"] for acc, _ in sel) / jn, 4) if jn else None
+        else:
+            rn = sum(acc["retransmits_n"] for acc, _ in sel)
+            entry["retransmits"] = sum(acc["retransmits"] for acc, _ in sel) if rn else None
+        by_protocol[proto] = entry
+    tcp, udp = (by_protocol.get(p, {}).get("mean_mbps") for p in ("TCP", "UDP"))
+    return {
+        "results": group["results"],
+        "experiments": group["experiments"],
+        "sweep_id": group["sweep_id"],
+        "start_time": group["start"],
+        "end_time": group["end"],
+        # goodput totale: somma delle medie per host (throughput aggregato di un esperimento tipico)
+        "total_goodput_mbps": round(sum(means), 3),
+        "host_limited": sum(h["host_limited"] for h in hosts.values()),
+        "jain_fairness": jain_index(means),
+        "hosts": hosts,
+        "by_protocol": by_protocol,
+        "tcp_udp_ratio": round(tcp / udp, 3) if tcp is not None and udp else None,
+    }
+
+
+class ResultsAnalytics:
+    """Vista materializzata degli aggregati. `add(result)` va chiamato nell'ordine
+    di scrittura dei risultati (on_append del ResultsStore, con il suo lock);
+    `experiment()`, `sweep()` e `overview()` leggono solo gli accumulatori."""
+
+    def __init__(self, path: str, save_interval: float = SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # un salvataggio alla volta, fuori da _lock
+        self._timer = None
+        self._reset()
+
+    def _reset(self):
+        self.records = 0  # risultati gia' inclusi (prefisso del file dei risultati)
+        self.inode = None
+        self.overall = _new_group()
+        self.experiments = {}
+        self.sweeps = {}  # sweep_id -> {"group": ..., "points": {point_id: [experiment_id, ...]}}
+        # JSON dei gruppi gia' serializzati; un gruppo modificato viene rimosso e
+        # riserializzato al salvataggio successivo (gli esperimenti conclusi una volta sola)
+        self._encoded = {}
+        self._encoded_sweeps = {}
+
+    def open(self, store):
+        """Carica la vista salvata e aggiunge i record di `store` (ResultsStore aperto)
+        scritti dopo l'ultimo salvataggio; da zero se il file e' stato sostituito o troncato."""
+        with self._lock:
+            self._reset()
+            try:
+                with open(self.path) as f:
+                    saved = json.load(f)
+                if saved.get("version") == VERSION:
+                    self.records, self.inode = saved["records"], saved["inode"]
+                    self.overall, self.experiments, self.sweeps = saved["overall"], saved["experiments"], saved["sweeps"]
+            except (OSError, ValueError, KeyError):
+                pass
+            try:
+                inode = os.stat(store.path).st_ino
+            except OSError:
+                inode = None
+            total = len(store.index)
+            if inode != self.inode or self.records > total:
+                self._reset()
+            self.inode = inode
+            for seq in range(self.records, total):
+                try:
+                    self._add_locked(json.loads(store.read_raw(seq)))
+                except ValueError:
+                    self.records += 1
+        self.save()
+        return self
+
+    def _add_locked(self, r: dict):
+        self.records += 1
+        experiment_id, sweep_id = r.get("experiment_id"), r.get("sweep_id")
+        new = bool(experiment_id) and experiment_id not in self.experiments
+        self.overall["experiments"] += new
+        _fold(self.overall, r)
+        if experiment_id:
+            group = self.experiments.setdefault(experiment_id, _new_group())
+            group["experiments"], group["sweep_id"] = 1, sweep_id
+            _fold(group, r)
+            self._encoded.pop(experiment_id, None)
+        if sweep_id:
+            sweep = self.sweeps.setdefault(sweep_id, {"group": _new_group(), "points": {}})
+            sweep["group"]["experiments"] += new
+            _fold(sweep["group"], r)
+            runs = sweep["points"].setdefault(r.get("point_id") or "", [])
+            if new:
+                runs.append(experiment_id)
+            self._encoded_sweeps.pop(sweep_id, None)
+
+    def add(self, result: dict):
+        """Aggiorna gli aggregati con un risultato appena salvato; la vista su file
+        e' riscritta al piu' ogni `save_interval` secondi."""
+        with self._lock:
+            self._add_locked(result)
+            if self._timer is None and self.save_interval > 0:
+                self._timer = threading.Timer(self.save_interval, self.save)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _snapshot_locked(self) -> tuple:
+        # con _lock si serializzano solo i gruppi modificati; per il resto si copiano
+        # i riferimenti alle stringhe gia' pronte (il file e' composto fuori dal lock)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        encode = lambda obj: json.dumps(obj, separators=(",", ":"))
+        for cache, groups in ((self._encoded, self.experiments), (self._encoded_sweeps, self.sweeps)):
+            for key, group in groups.items():
+                if key not in cache:
+                    cache[key] = encode(group)
+        head = encode({"version": VERSION, "records": self.records, "inode": self.inode, "overall": self.overall})
+        return (head, [(k, self._encoded[k]) for k in self.experiments],
+                [(k, self._encoded_sweeps[k]) for k in self.sweeps])
+
+    def save(self):
+        """Riscrive la vista su file; la scrittura avviene fuori da _lock, quindi non
+        blocca add() (e con esso il lock del ResultsStore)."""
+        with self._save_lock:
+            with self._lock:
+                head, experiments, sweeps = self._snapshot_locked()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(head[:-1])
+                for name, groups in (("experiments", experiments), ("sweeps", sweeps)):
+                    f.write(f',"{name}":{{')
+                    f.write(",".join(f"{json.dumps(k)}:{enc}" for k, enc in groups))
+                    f.write("}")
+                f.write("}")
+            os.replace(tmp, self.path)
+
+    def close(self):
+        self.save()
+
+    def experiment(self, experiment_id: str):
+        with self._lock:
+            group = self.experiments.get(experiment_id)
+            return dict(summarize(group), experiment_id=experiment_id) if group else None
+
+    def sweep(self, sweep_id: str):
+        with self._lock:
+            sweep = self.sweeps.get(sweep_id)
+            if sweep is None:
+                return None
+            points = {}
+            for pid, runs in sweep["points"].items():
+                # per punto: goodput e fairness di ogni esecuzione
+                points[pid] = [dict(experiment_id=e, **{k: summarize(self.experiments[e])[k] for k in
+                                                         ("total_goodput_mbps", "jain_fairness", "tcp_udp_ratio")})
+                               for e in runs if e in self.experiments]
+            return dict(summarize(sweep["group"]), sweep_id=sweep_id, points=points)
+
+    def overview(self, limit: int = 20) -> dict:
+        with self._lock:
+            recent = list(self.experiments)[-limit:] if limit else []
+            return {
+                "overall": summarize(self.overall),
+                "experiments": len(self.experiments),
+                "sweeps": sorted(self.sweeps),
+                "recent": [{"experiment_id": e, **{k: summarize(self.experiments[e])[k] for k in
+                            ("sweep_id", "results", "start_time", "total_goodput_mbps", "jain_fairness", "tcp_udp_ratio")}}
+                           for e in reversed(recent)],
+            }
+
+    def rows(self, level: str = "hosts", experiment_id: str = None, sweep_id: str = None) -> list:
+        """Righe piatte per l'esportazione: una per (esperimento, host) o una per esperimento/sweep."""
+        with self._lock:
+            if experiment_id:
+                groups = [("experiment", experiment_id, self.experiments.get(experiment_id))]
+            elif sweep_id:
+                sweep = self.sweeps.get(sweep_id)
+                runs = [e for point in (sweep or {}).get("points", {}).values() for e in point]
+                groups = [("experiment", e, self.experiments.get(e)) for e in runs]
+                if sweep is not None and level == "groups":
+                    groups.append(("sweep", sweep_id, sweep["group"]))
+            else:
+                groups = [("experiment", e, g) for e, g in self.experiments.items()]
+                if level == "groups":
+                    groups += [("sweep", s, v["group"]) for s, v in self.sweeps.items()]
+            out = []
+            for scope, gid, group in groups:
+                if group is None:
+                    continue
+                s = summarize(group)
+                base = {"scope": scope, "id": gid, "start_time": s["start_time"], "end_time": s["end_time"]}
+                if level == "hosts":
+                    out += [dict(base, **h) for h in s["hosts"].values()]
+                    continue
+                tcp, udp = s["by_protocol"].get("TCP", {}), s["by_protocol"].get("UDP", {})
+                out.append(dict(base, results=s["results"], experiments=s["experiments"], hosts=len(s["hosts"]),
+                                total_goodput_mbps=s["total_goodput_mbps"], jain_fairness=s["jain_fairness"],
+                                tcp_mean_mbps=tcp.get("mean_mbps"), udp_mean_mbps=udp.get("mean_mbps"),
+                                tcp_retransmits=tcp.get("retransmits"), udp_loss_percent=udp.get("loss_percent"),
+                                udp_mean_jitter_ms=udp.get("mean_jitter_ms"), tcp_udp_ratio=s["tcp_udp_ratio"],
+                                host_limited=s["host_limited"]))
+            return out
+
+
+def export(rows: list, fmt: str) -> bytes:
+    """Righe -> CSV o Parquet (richiede pyarrow)."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        fields = list(dict.fromkeys(k for row in rows for k in row))
+        writer = csv.DictWriter(buf, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        return buf.getvalue().encode()
+    if fmt == "parquet":
+        if pyarrow is None:
+            raise RuntimeError("pyarrow non installato: esportazione Parquet non disponibile")
+        buf = io.BytesIO()
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), buf)
+        return buf.getvalue()
+    raise ValueError(f"Formato non valido: {fmt} ({', '.join(EXPORT_FORMATS)})")
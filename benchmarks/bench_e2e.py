@@ -0,0 +1,296 @@
+"""Benchmark end-to-end dell'Experiment Controller senza Mininet: mnexec e
+iperf3 sono sostituiti da benchmarks/fakes (stesso output JSON/testo
+dell'iperf3 reale, velocita' configurabile), gli host sono processi locali con
+`mininet:<host>` nella riga di comando (trovati da host_registry come le shell
+Mininet). pgrep/pkill restano quelli di sistema: con il finto mnexec girano
+nel namespace corrente, quindi il pool di porte parte da `--base-port`.
+
+Ogni esperimento percorre l'intero percorso reale: POST /start_experiment ->
+run_experiment_sequence -> client iperf3 agli offset dello scheduler ->
+save_result -> GET /results, con l'app servita da un server HTTP locale
+mentre `--api-clients` thread interrogano /results, /experiment_status e
+/results/summary. Il report JSON contiene:
+  - scheduler_jitter_ms: avvio effettivo di ogni client rispetto all'offset
+    i * EXPERIMENT_DURATION_PER_HOST (dal log del finto iperf3, relativo al primo host);
+  - persist_ms: latenza di ogni results_store.append;
+  - experiment_overhead_ms: durata di ogni esperimento oltre hosts * offset
+    (avvio e arresto del server iperf3, raccolta dei report);
+  - api: richieste, errori e latenze p50/p99 per endpoint;
+  - peak_rss_mb: picco di memoria del controller e dei processi figli;
+  - host_limited: risultati marcati come limitati dalla CPU della macchina
+    (resource_sampler.py), con i flag che li hanno causati.
+Con `--adaptive` gli esperimenti usano le fasi adattive (adaptive_timing.py):
+il jitter non ha un offset nominale ed e' omesso, l'overhead e' calcolato
+sulla somma delle fasi effettive e `adaptive` riporta fasi e tempo risparmiato
+(`--ramp` rallenta la salita del finto iperf3 per allungare le fasi).
+Con `--reset` ogni esperimento e' preceduto da POST /reset e `reset_ms`
+riporta la durata del ripristino (ping e' sostituito da benchmarks/fakes/ping).
+
+Uso:
+    python3 benchmarks/bench_e2e.py --experiments 3 --duration-per-host 2 --out e2e.json
+    python3 benchmarks/bench_e2e.py --adaptive '{"min_phase": 1, "window": 3}' --duration-per-host 5 --ramp 3
+    python3 benchmarks/bench_e2e.py --reset --experiments 5 --out e2e_reset.json
+    python3 benchmarks/bench_e2e.py --compare base.json e2e.json
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+FAKES = os.path.join(HERE, "fakes")
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+def stats(vals_ms) -> dict:
+    vals = sorted(vals_ms)
+    r = lambda v: round(v, 3) if v is not None else None
+    return {"n": len(vals), "p50_ms": r(percentile(vals, 50)), "p99_ms": r(percentile(vals, 99)),
+            "max_ms": r(vals[-1] if vals else None)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def api_client(base, paths, current, stop, out):
+    session = requests.Session()
+    lat = {name: [] for name in paths}
+    errors = {name: 0 for name in paths}
+    i = 0
+    while not stop.is_set():
+        name = list(paths)[i % len(paths)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            r = session.get(base + paths[name].format(**current), timeout=30)
+            r.content
+            # /results/summary: 404 finche' l'esperimento non ha serie salvate
+            ok = r.status_code in (200, 404)
+        except requests.RequestException:
+            ok = False
+        if ok:
+            lat[name].append((time.perf_counter() - t0) * 1e3)
+        else:
+            errors[name] += 1
+        time.sleep(0.01)
+    out.append((lat, errors))
+
+
+def scheduler_jitter(log_path, windows, duration_per_host):
+    """Scarto (ms) tra l'avvio di ogni client e il suo offset nominale, per esperimento."""
+    try:
+        with open(log_path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+    jitter = []
+    for t_start, t_end, n_hosts in windows:
+        runs = sorted((e for e in entries if t_start <= e["t"] <= t_end), key=lambda e: e["t"])
+        if not runs:
+            continue
+        total = n_hosts * duration_per_host
+        # la durata -t identifica l'indice: traffic_duration = totale - i * offset
+        offsets = [(round((total - float(e["argv"][e["argv"].index("-t") + 1])) / duration_per_host), e["t"]) for e in runs]
+        base = min(t for i, t in offsets if i == 0) if any(i == 0 for i, _ in offsets) else None
+        if base is None:
+            continue
+        jitter += [((t - base) - i * duration_per_host) * 1e3 for i, t in offsets if i > 0]
+    return jitter
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    iperf_log = os.path.join(workdir, "fake_iperf3.log")
+    os.environ.update({
+        "PATH": FAKES + os.pathsep + os.environ.get("PATH", ""),
+        "MNEXEC_CMD": os.path.join(FAKES, "mnexec"),
+        "IPERF_BASE_PORT": str(args.base_port),
+        "IPERF_JSON_STREAM": args.json_stream,
+        "TELEMETRY_INTERVAL": "0",
+        "RUNNER_SOCKET": os.path.join(workdir, "runner.sock"),
+        "FAKE_IPERF_BPS": str(args.bps),
+        "FAKE_IPERF_NOISE": str(args.noise),
+        "FAKE_IPERF_RAMP": str(args.ramp),
+        "FAKE_IPERF_LOG": iperf_log,
+    })
+    os.chdir(workdir)  # risultati, serie temporali e log dei server iperf3 nella directory temporanea
+    sys.path.insert(0, ROOT)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    from werkzeug.serving import make_server
+    import server_flask as sf
+
+    sf.EXPERIMENT_DURATION_PER_HOST = args.duration_per_host
+    hosts = args.hosts or [h for h in sf.HOSTS_CONFIG if h not in sf.EXCLUDED_HOSTS]
+    # h7 ospita il server iperf3
+    shells = [subprocess.Popen([sys.executable, "-c", "import time; time.sleep(1e9)", f"mininet:{h}"],
+                               env=dict(os.environ, FAKE_HOST_IP=sf.HOSTS_CONFIG[h]))
+              for h in sorted(set(hosts) | {"h7"})]
+    sf.startup()
+
+    persist = []
+    append = sf.results_store.append
+
+    def timed_append(result):
+        t0 = time.perf_counter()
+        try:
+            return append(result)
+        finally:
+            persist.append((time.perf_counter() - t0) * 1e3)
+
+    sf.results_store.append = timed_append
+    server = make_server("127.0.0.1", 0, sf.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    paths = {"results": "/results?limit=100", "status": "/experiment_status",
+             "summary": "/results/summary?experiment_id={experiment_id}"}
+    current = {"experiment_id": ""}
+    stop, api_out = threading.Event(), []
+    pollers = [threading.Thread(target=api_client, args=(base, paths, current, stop, api_out), daemon=True)
+               for _ in range(args.api_clients)]
+    for t in pollers:
+        t.start()
+
+    adaptive = json.loads(args.adaptive) if args.adaptive else None
+    windows, walls, phase_walls, timings, resets = [], [], [], [], []
+    session = requests.Session()
+    t_begin = time.time()
+    try:
+        for n in range(args.experiments):
+            configs = {h: {"protocol": "UDP" if i % 2 else "TCP", "bitrate": args.udp_bitrate} for i, h in enumerate(hosts)}
+            if args.reset:
+                r = session.post(base + "/reset", json={"hosts": hosts}, timeout=30)
+                resets.append(r.json())
+                if r.status_code != 200:
+                    print(f"/reset: {r.status_code} {r.text}", file=sys.stderr)
+            t0 = time.time()
+            body = {"hosts": configs}
+            if adaptive:
+                body["adaptive"] = adaptive
+            r = session.post(base + "/start_experiment", json=body, timeout=30)
+            r.raise_for_status()
+            experiment_id = current["experiment_id"] = r.json()["experiment_id"]
+            version = 0
+            while True:
+                st = session.get(base + "/experiment_status", params={"experiment_id": experiment_id,
+                                                                       "since_version": version, "timeout": 5}, timeout=30).json()
+                version = st.get("version", version)
+                if not st.get("running"):
+                    break
+            windows.append((t0, time.time(), len(hosts)))
+            walls.append(time.time() - t0)
+            if adaptive:
+                timings.append(st.get("timing") or {})
+                phase_walls.append(sum(p["seconds"] for p in timings[-1].get("phases", [])))
+            print(f"{experiment_id}: {walls[-1]:.2f}s", file=sys.stderr)
+    finally:
+        stop.set()
+        for t in pollers:
+            t.join()
+        results = session.get(base + "/results", timeout=30).json()
+        server.shutdown()
+        for p in shells:
+            p.kill()
+            p.wait()
+        sf.results_store.close()
+
+    # tempo nominale occupato dal traffico: fasi effettive o hosts * offset fisso
+    nominal = phase_walls if adaptive else [len(hosts) * args.duration_per_host] * len(walls)
+    api = {}
+    for name, path in paths.items():
+        report = stats([v for lat, _ in api_out for v in lat[name]])
+        report["errors"] = sum(e[name] for _, e in api_out)
+        api[path.split("?")[0]] = report
+    return {
+        "commit": git_commit(),
+        "config": {"experiments": args.experiments, "hosts": len(hosts), "duration_per_host": args.duration_per_host,
+                   "api_clients": args.api_clients, "bps": args.bps, "json_stream": args.json_stream,
+                   "adaptive": adaptive, "ramp": args.ramp, "reset": args.reset},
+        "wall_s": round(time.time() - t_begin, 3),
+        "experiment_wall_s": [round(w, 3) for w in walls],
+        # oltre al tempo nominale: avvio/arresto del server iperf3, raccolta dei risultati
+        "experiment_overhead_ms": stats([(w - n) * 1e3 for w, n in zip(walls, nominal)]),
+        "server_reports": sum(r.get("server_throughput") is not None for r in results),
+        "results": {"expected": args.experiments * len(hosts), "saved": len(results)},
+        "host_limited": {"results": sum(bool(r.get("host_limited")) for r in results),
+                         "flags": sorted({f for r in results for f in (r.get("resources") or {}).get("flags", [])})},
+        "scheduler_jitter_ms": None if adaptive else stats([abs(j) for j in scheduler_jitter(iperf_log, windows, args.duration_per_host)]),
+        "adaptive": {"saved_seconds": [t.get("saved_seconds") for t in timings],
+                     "phases": [[(p["seconds"], p["reason"]) for p in t.get("phases", [])] for t in timings]} if adaptive else None,
+        "reset_ms": stats([r.get("elapsed_ms", 0) for r in resets]) if args.reset else None,
+        "reset_ready": sum(bool(r.get("ready")) for r in resets) if args.reset else None,
+        "persist_ms": stats(persist),
+        "api": api,
+        # ru_maxrss e' in KB su Linux
+        "peak_rss_mb": {"controller": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)},
+        "workdir": workdir,
+    }
+
+
+def compare(paths):
+    """Rapporto nuovo/vecchio delle metriche principali (> 1 = peggiorato)."""
+    old, new = (json.load(open(p)) for p in paths)
+    out = {"commits": [old.get("commit"), new.get("commit")]}
+
+    def ratio(a, b):
+        return round(b / a, 3) if a and b is not None else None
+
+    for key in ("scheduler_jitter_ms", "persist_ms", "experiment_overhead_ms"):
+        if not old.get(key) or not new.get(key):
+            continue
+        out[key] = {q: ratio(old[key][q], new[key][q]) for q in ("p50_ms", "p99_ms")}
+    out["api"] = {path: {q: ratio(old["api"][path][q], new["api"].get(path, {}).get(q)) for q in ("p50_ms", "p99_ms")}
+                  for path in old["api"]}
+    out["peak_rss_mb"] = {k: ratio(v, new["peak_rss_mb"][k]) for k, v in old["peak_rss_mb"].items()}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--experiments", type=int, default=3)
+    ap.add_argument("--duration-per-host", type=float, default=2.0, help="EXPERIMENT_DURATION_PER_HOST (s)")
+    ap.add_argument("--hosts", nargs="+", help="host attivi (default: tutti tranne h6 e h7)")
+    ap.add_argument("--api-clients", type=int, default=4)
+    ap.add_argument("--bps", type=float, default=94e6, help="throughput TCP del finto iperf3")
+    ap.add_argument("--noise", type=float, default=0.05)
+    ap.add_argument("--udp-bitrate", default="10M")
+    ap.add_argument("--ramp", type=int, default=0, help="intervalli di salita del finto iperf3")
+    ap.add_argument("--adaptive", help="'true' o oggetto JSON {threshold, window, min_phase, max_phase}")
+    ap.add_argument("--reset", action="store_true", help="POST /reset prima di ogni esperimento")
+    ap.add_argument("--json-stream", choices=("auto", "0", "1"), default="auto")
+    ap.add_argument("--base-port", type=int, default=15201)
+    ap.add_argument("--out", help="salva il report JSON")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="confronta due report salvati con --out")
+    args = ap.parse_args()
+
+    report = compare(args.compare) if args.compare else run(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Risoluzione host -> PID: scansione completa per comando vs HostRegistry in cache.
+
+Costruisce una tabella dei processi sintetica (directory stile /proc con 10k
+voci, 9 delle quali shell Mininet) e lancia i comandi tramite il finto mnexec
+in benchmarks/fakes.
+
+Uso: python3 benchmarks/bench_host_registry.py [--procs 10000] [--calls 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from host_registry import HostRegistry, scan_proc
+
+FAKE_MNEXEC = os.path.join(HERE, "fakes", "mnexec")
+HOSTS = [f"h{i}" for i in range(1, 10)]
+
+
+def build_proc_table(root, n):
+    host_pids = {}
+    for pid in range(1, n + 1):
+        d = os.path.join(root, str(pid))
+        os.makedirs(os.path.join(d, "ns"))
+        idx = pid % (n // len(HOSTS))
+        if idx == 0 and len(host_pids) < len(HOSTS):
+            name = HOSTS[len(host_pids)]
+            cmdline = ["bash", "--norc", "--noediting", "-is", f"mininet:{name}"]
+            host_pids[name] = pid
+        else:
+            cmdline = ["/usr/bin/python3", "-m", f"worker{pid}", "--flag"]
+        with open(os.path.join(d, "cmdline"), "wb") as f:
+            f.write(b"\0".join(a.encode() for a in cmdline) + b"\0")
+        for ns in ("net", "mnt", "uts", "ipc"):
+            open(os.path.join(d, "ns", ns), "w").close()
+    return host_pids
+
+
+def timed(fn, calls):
+    lat = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        fn(HOSTS[i % len(HOSTS)])
+        lat.append((time.perf_counter() - t0) * 1e6)
+    lat.sort()
+    return {"p50_us": round(lat[len(lat) // 2], 1), "p99_us": round(lat[int(len(lat) * 0.99)], 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--procs", type=int, default=10000)
+    ap.add_argument("--calls", type=int, default=200)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        expected = build_proc_table(root, args.procs)
+        registry = HostRegistry(proc_root=root)
+        registry.refresh()
+        assert all(registry.resolve(h) == pid for h, pid in expected.items())
+
+        full_scan = timed(lambda h: scan_proc(root)[h], args.calls)
+        cached = timed(registry.resolve, args.calls)
+        ns_fds = timed(registry.namespace_fds, args.calls)
+
+        def run_with(resolve):
+            def run(h):
+                subprocess.run([FAKE_MNEXEC, "-a", str(resolve(h)), "true"], check=True)
+            return run
+
+        calls = max(20, args.calls // 10)
+        cmd_scan = timed(run_with(lambda h: scan_proc(root)[h]), calls)
+        cmd_cached = timed(run_with(registry.resolve), calls)
+
+        report = {
+            "procs": args.procs,
+            "resolve_full_scan": full_scan,
+            "resolve_cached": cached,
+            "namespace_fds_cached": ns_fds,
+            "mnexec_cmd_full_scan": cmd_scan,
+            "mnexec_cmd_cached": cmd_cached,
+            "full_scans_by_registry": registry.scans,
+        }
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
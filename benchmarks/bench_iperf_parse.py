@@ -0,0 +1,189 @@
+"""Parsing degli output iperf3: json.loads sull'intero documento contro la
+ricerca mirata dell'oggetto `end` (iperf_parse.find_end), su str e su bytes,
+e orjson se installato; poi la rielaborazione in blocco di un corpus salvato
+su disco, sequenziale e con pool di processi.
+
+Il corpus e' generato con la struttura di `iperf3 -J` 3.x (indentazione a tab
+di cJSON, stessi campi in start/intervals/end) per TCP e UDP, 1 e 4 stream,
+a varie durate; per ogni caso c'e' anche l'output testuale con le righe di
+riepilogo sender/receiver. `--corpus DIR` lo salva per riusarlo con
+`python3 iperf_parse.py DIR`.
+
+Uso: python3 benchmarks/bench_iperf_parse.py [--durations 10 60 600 3600] [--files 64]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import iperf_parse
+from iperf_parse import find_end, parse_iperf_output, parse_iperf_text_fallback, throughput_from_end, bulk_parse
+
+
+def dumps_cjson(obj) -> str:
+    # formato di cJSON_Print usato da iperf3: tab come indentazione, ":\t" tra chiave e valore
+    return json.dumps(obj, indent="\t", separators=(",", ":\t"))
+
+
+def tcp_stream_interval(sock, t, bps, rnd):
+    nbytes = int(bps / 8 * rnd.uniform(0.9, 1.1))
+    return {"socket": sock, "start": t, "end": t + 1.0, "seconds": 1.0, "bytes": nbytes,
+            "bits_per_second": nbytes * 8.0, "retransmits": rnd.randint(0, 3), "snd_cwnd": rnd.randint(60000, 900000),
+            "snd_wnd": 3145728, "rtt": rnd.randint(1500, 9000), "rttvar": rnd.randint(100, 900), "pmtu": 1500,
+            "omitted": False, "sender": True}
+
+
+def udp_stream_interval(sock, t, bps, rnd):
+    nbytes = int(bps / 8)
+    return {"socket": sock, "start": t, "end": t + 1.0, "seconds": 1.0, "bytes": nbytes,
+            "bits_per_second": nbytes * 8.0, "packets": nbytes // 1448, "omitted": False, "sender": True}
+
+
+def synth_output(protocol: str, duration: int, streams: int = 1, bps: float = 94e6, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    udp = protocol == "udp"
+    socks = list(range(5, 5 + streams))
+    per_stream = bps / streams
+    intervals = []
+    for t in range(duration):
+        ss = [(udp_stream_interval if udp else tcp_stream_interval)(s, float(t), per_stream, rnd) for s in socks]
+        total = {"start": float(t), "end": t + 1.0, "seconds": 1.0, "bytes": sum(x["bytes"] for x in ss),
+                 "bits_per_second": sum(x["bits_per_second"] for x in ss), "omitted": False, "sender": True}
+        if udp:
+            total["packets"] = sum(x["packets"] for x in ss)
+        else:
+            total["retransmits"] = sum(x["retransmits"] for x in ss)
+        intervals.append({"streams": ss, "sum": total})
+    sent = sum(i["sum"]["bytes"] for i in intervals)
+    received = int(sent * (0.995 if udp else 0.999))
+    side = lambda s, nbytes, sender: {"socket": s, "start": 0, "end": float(duration), "seconds": float(duration),
+                                      "bytes": nbytes, "bits_per_second": nbytes * 8.0 / duration, "sender": sender}
+    if udp:
+        end_streams = [{"udp": dict(side(s, sent // streams, True), jitter_ms=0.012, lost_packets=12,
+                                    packets=sent // streams // 1448, lost_percent=0.05, out_of_order=0)} for s in socks]
+        end = {"streams": end_streams,
+               "sum": {"start": 0, "end": float(duration), "seconds": float(duration), "bytes": sent,
+                       "bits_per_second": sent * 8.0 / duration, "jitter_ms": 0.012, "lost_packets": 12 * streams,
+                       "packets": sent // 1448, "lost_percent": 0.05, "sender": True},
+               "sum_sent": side(0, sent, True), "sum_received": side(0, received, False)}
+    else:
+        end = {"streams": [{"sender": dict(side(s, sent // streams, True), retransmits=7, max_snd_cwnd=900000,
+                                           max_rtt=9000, min_rtt=1500, mean_rtt=4200),
+                            "receiver": side(s, received // streams, False)} for s in socks],
+               "sum_sent": dict(side(0, sent, True), retransmits=7 * streams), "sum_received": side(0, received, False),
+               "sender_tcp_congestion": "cubic", "receiver_tcp_congestion": "cubic"}
+    end["cpu_utilization_percent"] = {"host_total": 12.5, "host_user": 0.8, "host_system": 11.7,
+                                      "remote_total": 3.1, "remote_user": 0.2, "remote_system": 2.9}
+    return {
+        "start": {
+            "connected": [{"socket": s, "local_host": "10.1.1.10", "local_port": 40000 + s,
+                           "remote_host": "10.4.1.10", "remote_port": 5201} for s in socks],
+            "version": "iperf 3.16", "system_info": "Linux h1 6.8.0 #1 SMP x86_64",
+            "timestamp": {"time": "Sun, 07 Sep 2025 10:52:19 GMT", "timesecs": 1757242339},
+            "connecting_to": {"host": "10.4.1.10", "port": 5201},
+            "cookie": "q3x2c7f5k2mqt4w7lqz5bq2bq3ywf3pvbxkq",
+            "tcp_mss_default": 1448, "target_bitrate": int(bps) if udp else 0, "fq_rate": 0,
+            "sock_bufsize": 0, "sndbuf_actual": 16384, "rcvbuf_actual": 131072,
+            "test_start": {"protocol": protocol.upper(), "num_streams": streams, "blksize": 1448 if udp else 131072,
+                           "omit": 0, "duration": duration, "bytes": 0, "blocks": 0, "reverse": 0, "tos": 0,
+                           "target_bitrate": int(bps) if udp else 0, "bidir": 0, "fqrate": 0, "interval": 1},
+        },
+        "intervals": intervals,
+        "end": end,
+    }
+
+
+def synth_text(doc: dict) -> str:
+    # solo le righe che interessano al fallback: intervalli SUM e riepilogo sender/receiver
+    lines = ["Connecting to host 10.4.1.10, port 5201"]
+    for it in doc["intervals"]:
+        s = it["sum"]
+        lines.append(f"[SUM]   {s['start']:.2f}-{s['end']:.2f}  sec  {s['bytes'] / 2**20:.2f} MBytes  "
+                     f"{s['bits_per_second'] / 1e6:.1f} Mbits/sec")
+    end = doc["end"]
+    dur = doc["start"]["test_start"]["duration"]
+    lines.append("- - - - - - - - - - - - - - - - - - - - - - - - -")
+    for key, role in (("sum_sent", "sender"), ("sum_received", "receiver")):
+        s = end[key]
+        lines.append(f"[SUM]   0.00-{dur:.2f}  sec  {s['bytes'] / 2**30:.2f} GBytes  "
+                     f"{s['bits_per_second'] / 1e6:.1f} Mbits/sec                  {role}")
+    return "\n".join(lines) + "\n\niperf Done.\n"
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--durations", type=int, nargs="+", default=[10, 60, 600, 3600])
+    ap.add_argument("--files", type=int, default=64, help="file del corpus per la prova in blocco")
+    ap.add_argument("--bulk-duration", type=int, default=600)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--corpus", help="directory in cui salvare il corpus (default: temporanea)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    # -f M / -f G: velocita' in byte con multipli binari, come l'iperf3 reale
+    assert parse_iperf_text_fallback("[  5] 0.00-10.00 sec 112 MBytes 11.2 MBytes/sec  receiver") == round(11.2 * 2**20 * 8 / 1e6, 3)
+    assert parse_iperf_text_fallback("[  5] 0.00-10.00 sec 1.1 GBytes 0.11 GBytes/sec  sender") == round(0.11 * 2**30 * 8 / 1e6, 3)
+
+    report = {"orjson": iperf_parse.orjson is not None, "cases": []}
+    for duration in args.durations:
+        for protocol in ("tcp", "udp"):
+            for streams in (1, 4):
+                doc = synth_output(protocol, duration, streams, seed=duration)
+                text = dumps_cjson(doc)
+                raw = text.encode()
+                expected = throughput_from_end(doc["end"])
+                assert parse_iperf_output(text) == parse_iperf_output(raw) == expected
+                assert parse_iperf_text_fallback(synth_text(doc)) == round(doc["end"]["sum_received"]["bits_per_second"] / 1e6, 1)
+                case = {
+                    "protocol": protocol, "streams": streams, "duration": duration, "size_kb": len(raw) // 1024,
+                    "json_loads_ms": best_of(lambda: json.loads(text), args.repeat) * 1e3,
+                    "find_end_str_ms": best_of(lambda: find_end(text), args.repeat) * 1e3,
+                    "find_end_bytes_ms": best_of(lambda: find_end(raw), args.repeat) * 1e3,
+                }
+                if iperf_parse.orjson is not None:
+                    case["orjson_loads_ms"] = best_of(lambda: iperf_parse.orjson.loads(raw), args.repeat) * 1e3
+                report["cases"].append({k: round(v, 3) if isinstance(v, float) else v for k, v in case.items()})
+
+    corpus = args.corpus or tempfile.mkdtemp(prefix="iperf_corpus_")
+    os.makedirs(corpus, exist_ok=True)
+    for i in range(args.files):
+        doc = synth_output("udp" if i % 2 else "tcp", args.bulk_duration, 1 + i % 4, seed=i)
+        name = f"{i:04d}_{'udp' if i % 2 else 'tcp'}_{args.bulk_duration}s"
+        with open(os.path.join(corpus, name + ".json"), "w") as f:
+            f.write(dumps_cjson(doc))
+        if i % 8 == 0:
+            with open(os.path.join(corpus, name + ".txt"), "w") as f:
+                f.write(synth_text(doc))
+    bulk = {"files": len(os.listdir(corpus)), "corpus": corpus}
+    t0 = time.perf_counter()
+    full = [throughput_from_end(json.loads(open(os.path.join(corpus, n)).read())["end"])
+            for n in sorted(os.listdir(corpus)) if n.endswith(".json")]
+    bulk["json_loads_sequential_s"] = round(time.perf_counter() - t0, 3)
+    t0 = time.perf_counter()
+    seq = list(bulk_parse([corpus], workers=1))
+    bulk["find_end_sequential_s"] = round(time.perf_counter() - t0, 3)
+    t0 = time.perf_counter()
+    par = list(bulk_parse([corpus], workers=args.workers))
+    bulk["find_end_pool_s"] = round(time.perf_counter() - t0, 3)
+    assert seq == par
+    assert [r["throughput"] for r in seq if r["file"].endswith(".json")] == full
+    report["bulk"] = bulk
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Costo per comando: sudo+mnexec (qui: finto mnexec) per ogni comando vs helper persistente.
+
+Usa una shell finta "mininet:h1" come processo host e benchmarks/fakes/mnexec al
+posto di mnexec, quindi gira senza root ne' Mininet. Il guadagno reale e' maggiore:
+qui non c'e' l'avvio di sudo.
+
+Uso: python3 benchmarks/bench_ns_executor.py [--calls 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from host_registry import HostRegistry
+from ns_executor import NamespaceExecutor
+
+FAKE_MNEXEC = os.path.join(HERE, "fakes", "mnexec")
+
+
+def stats(lat):
+    lat.sort()
+    return {"p50_us": round(lat[len(lat) // 2], 1), "p99_us": round(lat[int(len(lat) * 0.99)], 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200)
+    args = ap.parse_args()
+
+    host = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)", "mininet:h1"])
+    try:
+        registry = HostRegistry()
+        deadline = time.monotonic() + 5
+        while registry.resolve("h1") != host.pid and time.monotonic() < deadline:
+            time.sleep(0.05)
+        pid = registry.resolve("h1")
+        assert pid == host.pid
+
+        spawn = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            subprocess.run([FAKE_MNEXEC, "-a", str(pid), "true"], capture_output=True, text=True)
+            spawn.append((time.perf_counter() - t0) * 1e6)
+
+        executor = NamespaceExecutor(registry, [FAKE_MNEXEC], use_setns=False)
+        t0 = time.perf_counter()
+        executor.get("h1")
+        startup_ms = (time.perf_counter() - t0) * 1e3
+        helper = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            cp = executor.run("h1", ["true"], timeout=5)
+            helper.append((time.perf_counter() - t0) * 1e6)
+            assert cp.returncode == 0
+        executor.close()
+        print(json.dumps({
+            "calls": args.calls,
+            "mnexec_per_command": stats(spawn),
+            "helper_startup_ms": round(startup_ms, 2),
+            "helper_per_command": stats(helper),
+        }, indent=2))
+    finally:
+        host.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Latenza di append del ResultsStore al crescere dello storico (10 -> 1M risultati).
+
+Uso: python3 benchmarks/bench_results_store.py [--max 1000000] [--appends 500]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from results_store import ResultsStore
+
+SAMPLE = {
+    "experiment_id": "exp_1700000000",
+    "hostname": "h1",
+    "ip": "10.1.1.10",
+    "protocol": "TCP",
+    "bitrate": "10M",
+    "throughput": 9.412,
+    "start_time": "2025-09-07T10:52:19.123456",
+    "end_time": "2025-09-07T10:56:19.654321",
+    "duration": 240,
+}
+
+
+def prefill(path, n):
+    line = (json.dumps(SAMPLE, separators=(",", ":")) + "\n").encode()
+    block = line * 10000
+    with open(path, "wb") as f:
+        for _ in range(n // 10000):
+            f.write(block)
+        f.write(line * (n % 10000))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max", type=int, default=1_000_000)
+    ap.add_argument("--appends", type=int, default=500)
+    args = ap.parse_args()
+
+    sizes = [n for n in (10, 1_000, 100_000, 1_000_000) if n <= args.max]
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"results_{n}.jsonl")
+            prefill(path, n)
+            store = ResultsStore(path)
+            t0 = time.perf_counter()
+            store.open()
+            open_s = time.perf_counter() - t0
+            lat = []
+            for _ in range(args.appends):
+                t0 = time.perf_counter()
+                store.append(SAMPLE)
+                lat.append((time.perf_counter() - t0) * 1e6)
+            store.close()
+            row = {
+                "stored": n,
+                "open_s": round(open_s, 4),
+                "append_p50_us": round(percentile(lat, 50), 1),
+                "append_p99_us": round(percentile(lat, 99), 1),
+                "append_max_us": round(max(lat), 1),
+            }
+            report.append(row)
+            print(f"{n:>9} risultati: p50 {row['append_p50_us']:>8} us  p99 {row['append_p99_us']:>8} us  (open {row['open_s']} s)")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compilatore di rotte su topologie sintetiche: tempo dei cammini minimi su
+tutte le coppie e numero di rotte (= flow entry su rest_router) senza
+aggregazione, con aggregazione esatta e con prefissi di sintesi.
+
+Le topologie sono generate da topology_spec.generate_mesh (albero casuale piu'
+`--extra` link per router, una LAN /24 per router).
+
+Uso: python3 benchmarks/bench_route_compiler.py [--routers 100 300 1000] [--weight delay]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from topology_spec import Topology, generate_mesh, compile_routes, AGGREGATE_MODES, WEIGHTS
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--routers", type=int, nargs="+", default=[100, 300, 1000])
+    ap.add_argument("--extra", type=float, default=1.0, help="link aggiuntivi per router oltre all'albero")
+    ap.add_argument("--weight", choices=WEIGHTS, default="delay")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    report = []
+    for n in args.routers:
+        t0 = time.perf_counter()
+        topo = Topology(generate_mesh(n, int(n * args.extra), seed=args.seed))
+        entry = {"routers": n, "links": len(topo.links), "build_s": round(time.perf_counter() - t0, 3)}
+        for mode in AGGREGATE_MODES:
+            t0 = time.perf_counter()
+            routes = compile_routes(topo, args.weight, mode)
+            counts = [len(r) for r in routes.values()]
+            entry[mode] = {
+                "compile_s": round(time.perf_counter() - t0, 3),
+                "routes_total": sum(counts),
+                "routes_max_per_router": max(counts),
+            }
+        report.append(entry)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Provisioning rest_router: chiamate sequenziali con connessione nuova e pausa
+fissa (schema precedente) vs provision() con sessione condivisa, router in
+parallelo e diff rispetto allo stato attuale.
+
+Usa il finto rest_router in benchmarks/fakes con una catena sintetica di
+router (una LAN per router, link /30 tra router consecutivi, rotte verso
+tutte le LAN remote).
+
+Uso: python3 benchmarks/bench_ryu_routing.py [--routers 4 16 64] [--latency-ms 5]
+"""
+import argparse
+import ipaddress
+import json
+import os
+import sys
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "fakes"))
+
+import ryu_routing
+from rest_router import serve
+
+
+def chain_config(n):
+    addresses, routes = {}, {}
+    lans = [ipaddress.ip_network(f"10.{i // 250}.{i % 250}.0/24") for i in range(n)]
+    links = [ipaddress.ip_network(f"172.16.{i // 64}.{(i % 64) * 4}/30") for i in range(n - 1)]
+    for i in range(n):
+        r = f"r{i + 1}"
+        addresses[r] = [f"{next(lans[i].hosts())}/24"]
+        if i > 0:
+            addresses[r].append(f"{list(links[i - 1].hosts())[1]}/30")
+        if i < n - 1:
+            addresses[r].append(f"{list(links[i].hosts())[0]}/30")
+        routes[r] = []
+        for j in range(n):
+            if j < i:
+                routes[r].append((str(lans[j]), str(list(links[i - 1].hosts())[0])))
+            elif j > i:
+                routes[r].append((str(lans[j]), str(list(links[i].hosts())[1])))
+    return addresses, routes
+
+
+def legacy(base, addresses, routes):
+    # requests.post senza sessione: una connessione TCP per chiamata
+    for r, cidrs in addresses.items():
+        for cidr in cidrs:
+            requests.post(f"{base}/router/{ryu_routing.dpid_of(r)}", json={"address": cidr}, timeout=5).raise_for_status()
+    time.sleep(0.5)
+    for r, rts in routes.items():
+        for dest, gw in rts:
+            requests.post(f"{base}/router/{ryu_routing.dpid_of(r)}", json={"destination": dest, "gateway": gw}, timeout=5).raise_for_status()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--routers", type=int, nargs="+", default=[4, 16, 64])
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    ap.add_argument("--workers", type=int, default=ryu_routing.MAX_WORKERS)
+    args = ap.parse_args()
+
+    report = []
+    for n in args.routers:
+        addresses, routes = chain_config(n)
+        calls = sum(map(len, addresses.values())) + sum(map(len, routes.values()))
+
+        server, _ = serve(0, args.latency_ms / 1000)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        t0 = time.perf_counter()
+        legacy(base, addresses, routes)
+        t_legacy = time.perf_counter() - t0
+        server.shutdown()
+
+        server, table = serve(0, args.latency_ms / 1000)
+        ryu_routing.BASE = f"http://127.0.0.1:{server.server_address[1]}"
+        ryu_routing.session = ryu_routing.make_session(args.workers)
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            t0 = time.perf_counter()
+            first = ryu_routing.provision(addresses, routes, workers=args.workers)
+            t_new = time.perf_counter() - t0
+            requests_first = table.requests
+            t0 = time.perf_counter()
+            again = ryu_routing.provision(addresses, routes, workers=args.workers)
+            t_again = time.perf_counter() - t0
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        server.shutdown()
+
+        report.append({
+            "routers": n,
+            "config_calls": calls,
+            "legacy_s": round(t_legacy, 3),
+            "pooled_concurrent_s": round(t_new, 3),
+            "pooled_requests": requests_first,
+            "changes": sum(first.values()),
+            "rerun_s": round(t_again, 3),
+            "rerun_changes": sum(again.values()),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
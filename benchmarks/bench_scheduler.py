@@ -0,0 +1,101 @@
+"""Latenza di stop e numero di thread: un thread per host (schema precedente,
+polling di experiment_state ogni 0.5 s) vs ExperimentScheduler asyncio.
+
+I client iperf3 sono simulati: di default con attese cancellabili, con
+--subprocess con veri processi `sleep` (come farebbe iperf3 via mnexec).
+
+Uso: python3 benchmarks/bench_scheduler.py [--hosts 10 100 1000] [--subprocess]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from experiment_scheduler import ExperimentScheduler, HostProcess
+
+OFFSET = 0.01      # offset tra host (s), ridotto per il benchmark
+RUN_BEFORE_STOP = 0.5
+
+
+def legacy(n):
+    state = {"running": True}
+    lock = threading.Lock()
+    stop_server = threading.Event()   # kill del server iperf: i client in corso terminano
+
+    def task(delay):
+        waited, step = 0.0, 0.5
+        while waited < delay:
+            with lock:
+                if not state["running"]:
+                    return
+            time.sleep(step)
+            waited += step
+        stop_server.wait()
+
+    threads = [threading.Thread(target=task, args=(i * OFFSET,), daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+    time.sleep(RUN_BEFORE_STOP)
+    peak = threading.active_count()
+    t0 = time.perf_counter()
+    with lock:
+        state["running"] = False
+    stop_server.set()
+    for t in threads:
+        t.join()
+    return peak, time.perf_counter() - t0
+
+
+def scheduled(n, use_subprocess):
+    async def job():
+        if use_subprocess:
+            proc = HostProcess(["sleep", "3600"])
+            try:
+                await proc.wait()
+            except asyncio.CancelledError:
+                await proc.terminate()
+                raise
+        else:
+            await asyncio.sleep(3600)
+
+    sched = ExperimentScheduler()
+    runner = threading.Thread(target=sched.run, args=([(i * OFFSET, job) for i in range(n)],), daemon=True)
+    runner.start()
+    time.sleep(RUN_BEFORE_STOP)
+    peak = threading.active_count()
+    t0 = time.perf_counter()
+    sched.stop()
+    runner.join()
+    return peak, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hosts", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--subprocess", action="store_true")
+    args = ap.parse_args()
+    report = []
+    for n in args.hosts:
+        base = threading.active_count()
+        lt, ll = legacy(n)
+        st, sl = scheduled(n, args.subprocess)
+        row = {
+            "hosts": n,
+            "legacy_threads": lt - base,
+            "legacy_stop_ms": round(ll * 1e3, 1),
+            "scheduler_threads": st - base,
+            "scheduler_stop_ms": round(sl * 1e3, 1),
+        }
+        report.append(row)
+        print(f"{n:>5} host: thread {row['legacy_threads']:>5} -> {row['scheduler_threads']:>2}   "
+              f"stop {row['legacy_stop_ms']:>7} ms -> {row['scheduler_stop_ms']:>7} ms")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Time-to-first-byte tra host della rete Mininet, per confrontare il controller
+dei router: rest_router (rotte via ryu_routing.py, voci per destinazione
+installate ai primi packet-in) contro ryu_static_router.py (tutto installato
+alla connessione degli switch).
+
+Su ogni host di destinazione parte un piccolo server TCP che invia un byte a
+ogni connessione; da un host sorgente in un'altra LAN si misurano `--count`
+connessioni (connect + primo byte). La prima connessione di ogni coppia e'
+"a freddo": cache ARP della sorgente svuotata e, con le coppie di default,
+destinazione mai contattata prima (un solo sorgente per destinazione); le
+successive sono "a caldo". Da eseguire come root con la rete appena avviata:
+
+    sudo python3 mininet_topology.py                                   # terminale 1
+    ryu-manager --ofp-tcp-listen-port 6633 ryu.app.rest_router && python3 ryu_routing.py
+    sudo python3 benchmarks/bench_ttfb.py --label rest_router --out rest.json
+    (riavvio della rete)
+    ryu-manager --ofp-tcp-listen-port 6633 ryu_static_router.py
+    sudo python3 benchmarks/bench_ttfb.py --label static_router --out static.json
+    python3 benchmarks/bench_ttfb.py --compare rest.json static.json
+
+`--pairs all` misura tutte le coppie ordinate di host in LAN diverse.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from host_registry import HostRegistry
+from topology_spec import Topology, load_spec, DEFAULT_SPEC
+
+SERVER = """
+import socket, sys
+s = socket.socket(); s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+s.bind(("0.0.0.0", int(sys.argv[1]))); s.listen(64)
+print("ready", flush=True)
+while True:
+    c, _ = s.accept(); c.sendall(b"x"); c.close()
+"""
+
+CLIENT = """
+import json, socket, sys, time
+out = []
+for i in range(int(sys.argv[3])):
+    t0 = time.perf_counter()
+    try:
+        c = socket.create_connection((sys.argv[1], int(sys.argv[2])), timeout=float(sys.argv[4]))
+        ok = c.recv(1) == b"x"
+        c.close()
+        out.append((time.perf_counter() - t0) * 1e3 if ok else None)
+    except OSError:
+        out.append(None)
+    time.sleep(float(sys.argv[5]))
+print(json.dumps(out))
+"""
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+def summary(vals):
+    vals = sorted(v for v in vals if v is not None)
+    return {"n": len(vals), "p50_ms": percentile(vals, 50), "p95_ms": percentile(vals, 95),
+            "max_ms": vals[-1] if vals else None}
+
+
+def host_pairs(topo: Topology, mode: str) -> list:
+    lan_of = {h: i for i, lan in enumerate(topo.lans) for h in lan.get("hosts", {})}
+    hosts = list(lan_of)
+    if mode == "all":
+        return [(s, d) for s in hosts for d in hosts if lan_of[s] != lan_of[d]]
+    # una sola sorgente per destinazione, a rotazione tra gli host delle altre LAN
+    pairs = []
+    for i, dst in enumerate(hosts):
+        others = [h for h in hosts if lan_of[h] != lan_of[dst]]
+        if others:
+            pairs.append((others[i % len(others)], dst))
+    return pairs
+
+
+def run_in(pid, args, **kw):
+    return subprocess.run(["mnexec", "-a", str(pid)] + args, capture_output=True, text=True, **kw)
+
+
+def measure(args):
+    topo = Topology(load_spec(args.spec))
+    ips = {h: cidr.split("/")[0] for h, (cidr, _) in topo.hosts().items()}
+    pairs = host_pairs(topo, args.pairs)
+    registry = HostRegistry()
+    servers = []
+    try:
+        for dst in sorted({d for _, d in pairs}):
+            proc = subprocess.Popen(["mnexec", "-a", str(registry.resolve(dst)), "python3", "-c", SERVER, str(args.port)],
+                                    stdout=subprocess.PIPE, text=True)
+            proc.stdout.readline()  # "ready"
+            servers.append(proc)
+        results = []
+        for src, dst in pairs:
+            pid = registry.resolve(src)
+            run_in(pid, ["ip", "neigh", "flush", "all"])
+            r = run_in(pid, ["python3", "-c", CLIENT, ips[dst], str(args.port), str(args.count),
+                             str(args.timeout), str(args.gap)], timeout=args.count * (args.timeout + args.gap) + 10)
+            ttfb = json.loads(r.stdout) if r.returncode == 0 else [None] * args.count
+            results.append({"src": src, "dst": dst, "cold_ms": ttfb[0], "warm_ms": ttfb[1:]})
+            print(f"{src} -> {dst}: freddo {ttfb[0]} ms, caldo {summary(ttfb[1:])['p50_ms']} ms", file=sys.stderr)
+    finally:
+        for proc in servers:
+            proc.terminate()
+    return {
+        "label": args.label, "spec": args.spec, "pairs": results, "timestamp": time.time(),
+        "cold": summary([r["cold_ms"] for r in results]),
+        "warm": summary([v for r in results for v in r["warm_ms"]]),
+        "failures": sum(v is None for r in results for v in [r["cold_ms"]] + r["warm_ms"]),
+    }
+
+
+def compare(paths):
+    reports = [json.load(open(p)) for p in paths]
+    out = {}
+    for phase in ("cold", "warm"):
+        out[phase] = {r["label"]: r[phase] for r in reports}
+    base = reports[0]
+    for r in reports[1:]:
+        for phase in ("cold", "warm"):
+            a, b = base[phase]["p50_ms"], r[phase]["p50_ms"]
+            if a and b:
+                out[phase][f"{r['label']}_vs_{base['label']}_p50"] = round(b / a, 3)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--spec", default=DEFAULT_SPEC)
+    ap.add_argument("--label", default="controller")
+    ap.add_argument("--pairs", choices=("fresh", "all"), default="fresh")
+    ap.add_argument("--count", type=int, default=10, help="connessioni per coppia (la prima e' a freddo)")
+    ap.add_argument("--port", type=int, default=5301)
+    ap.add_argument("--timeout", type=float, default=5.0)
+    ap.add_argument("--gap", type=float, default=0.05, help="pausa (s) tra due connessioni")
+    ap.add_argument("--out", help="salva il report JSON")
+    ap.add_argument("--compare", nargs="+", metavar="REPORT", help="confronta report salvati con --out")
+    args = ap.parse_args()
+
+    report = compare(args.compare) if args.compare else measure(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report if args.compare else {k: report[k] for k in ("label", "cold", "warm", "failures")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Finto rest_router di Ryu per benchmark senza controller: GET/POST/DELETE su
+/router/<dpid> con lo stesso formato JSON, stato in memoria e un ritardo
+configurabile per richiesta (simula il round-trip verso lo switch).
+Risponde anche a GET /stats/port/<dpid> e /stats/flow/<dpid> (ofctl_rest) con
+contatori sintetici che crescono nel tempo (`--ports` porte per datapath).
+
+Uso: python3 benchmarks/fakes/rest_router.py [--port 8080] [--latency-ms 5]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RouterTable:
+    def __init__(self, ports=4):
+        self.ports = ports
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.routers = {}  # dpid -> {"address": [...], "route": [...], "next_id": n}
+        self.requests = 0
+
+    def get(self, dpid):
+        return self.routers.setdefault(dpid, {"address": [], "route": [], "next_id": 1})
+
+    def snapshot(self, dpid):
+        with self.lock:
+            r = self.get(dpid)
+            net = {"address": list(r["address"]), "route": list(r["route"])}
+        return [{"switch_id": dpid, "internal_network": [net]}]
+
+    def post(self, dpid, body):
+        with self.lock:
+            r = self.get(dpid)
+            if "address" in body:
+                r["address"].append({"address_id": r["next_id"], "address": body["address"]})
+                msg = f"Add address [address_id={r['next_id']}]"
+            else:
+                dest = body.get("destination", "0.0.0.0/0")
+                r["route"].append({"route_id": r["next_id"], "destination": dest, "gateway": body["gateway"]})
+                msg = f"Add route [route_id={r['next_id']}]"
+            r["next_id"] += 1
+        return [{"switch_id": dpid, "command_result": [{"result": "success", "details": msg}]}]
+
+    def port_stats(self, dpid):
+        # porta p trasmette p Mbit/s e ne riceve la meta'; 1 pacchetto ogni 1000 byte, 1 scarto ogni 100
+        t = time.time() - self.started
+        stats = []
+        for p in range(1, self.ports + 1):
+            tx = int(p * 125000 * t)
+            rx = tx // 2
+            stats.append({"port_no": p, "tx_bytes": tx, "rx_bytes": rx, "tx_packets": tx // 1000,
+                          "rx_packets": rx // 1000, "tx_dropped": tx // 100000, "rx_dropped": 0,
+                          "tx_errors": 0, "rx_errors": 0})
+        stats.append({"port_no": "LOCAL", "tx_bytes": 0, "rx_bytes": 0})
+        return {str(int(dpid)): stats}
+
+    def flow_stats(self, dpid):
+        with self.lock:
+            routes = list(self.get(f"{int(dpid):016x}")["route"])
+        t = time.time() - self.started
+        flows = [{"table_id": 0, "priority": 1000 + i, "match": {"ipv4_dst": r["destination"]},
+                  "packet_count": int(100 * t), "byte_count": int(100000 * t)} for i, r in enumerate(routes)]
+        return {str(int(dpid)): flows}
+
+    def delete(self, dpid, body):
+        with self.lock:
+            r = self.get(dpid)
+            for key, id_key in (("address", "address_id"), ("route", "route_id")):
+                if id_key in body:
+                    r[key] = [e for e in r[key] if e[id_key] != int(body[id_key])]
+        return [{"switch_id": dpid, "command_result": [{"result": "success", "details": "Delete"}]}]
+
+
+def make_handler(table, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # header e corpo in un solo segmento, come un server reale (niente ritardi da delayed ACK)
+        wbufsize = 1 << 16
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload):
+            time.sleep(latency)
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dpid(self):
+            parts = self.path.strip("/").split("/")
+            return parts[1] if len(parts) > 1 and parts[0] == "router" else None
+
+        def _body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(n) or b"{}")
+
+        def do_GET(self):
+            table.requests += 1
+            parts = self.path.strip("/").split("/")
+            if parts[:2] == ["stats", "port"]:
+                return self._reply(table.port_stats(parts[2]))
+            if parts[:2] == ["stats", "flow"]:
+                return self._reply(table.flow_stats(parts[2]))
+            self._reply(table.snapshot(self._dpid()))
+
+        def do_POST(self):
+            table.requests += 1
+            self._reply(table.post(self._dpid(), self._body()))
+
+        def do_DELETE(self):
+            table.requests += 1
+            self._reply(table.delete(self._dpid(), self._body()))
+
+    return Handler
+
+
+def serve(port=0, latency=0.005, ports=4):
+    """Avvia il server in un thread; ritorna (server, tabella)."""
+    table = RouterTable(ports)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(table, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, table
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    ap.add_argument("--ports", type=int, default=4)
+    args = ap.parse_args()
+    server, _ = serve(args.port, args.latency_ms / 1000, args.ports)
+    print(f"finto rest_router su http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
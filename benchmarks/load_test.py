@@ -0,0 +1,91 @@
+"""Carico concorrente sugli endpoint di lettura dell'Experiment Controller:
+`--clients` thread (ognuno con la propria sessione HTTP keep-alive) alternano
+GET /results e GET /experiment_status per `--duration` secondi; per ogni
+endpoint riporta richieste/s, errori e latenze p50/p95/p99 in ms.
+
+Confronto tra server di sviluppo e modalita' di produzione:
+    python3 server_flask.py                                  # porta 5000
+    python3 runner.py & gunicorn -k gthread -w 4 --threads 16 -b 0.0.0.0:5000 wsgi:app
+    python3 benchmarks/load_test.py --url http://127.0.0.1:5000 --clients 32 --duration 20
+
+`--results-query` aggiunge parametri a /results (es. "limit=100" oppure
+"experiment_id=exp_..."); `--mix` e' la quota di richieste a /results.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+import requests
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+def client(base, paths, mix, deadline, seed, out):
+    rnd = random.Random(seed)
+    session = requests.Session()
+    lat = {name: [] for name in paths}
+    errors = {name: 0 for name in paths}
+    while time.monotonic() < deadline:
+        name = "results" if rnd.random() < mix else "status"
+        t0 = time.perf_counter()
+        try:
+            r = session.get(base + paths[name], timeout=30)
+            r.content
+            ok = r.status_code == 200
+        except requests.RequestException:
+            ok = False
+        if ok:
+            lat[name].append(time.perf_counter() - t0)
+        else:
+            errors[name] += 1
+    out.append((lat, errors))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--mix", type=float, default=0.5, help="quota di richieste a /results")
+    ap.add_argument("--results-query", default="limit=100")
+    args = ap.parse_args()
+
+    base = args.url.rstrip("/")
+    paths = {"results": "/results" + (f"?{args.results_query}" if args.results_query else ""),
+             "status": "/experiment_status"}
+    out = []
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=client, args=(base, paths, args.mix, deadline, i, out))
+               for i in range(args.clients)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+
+    report = {"url": base, "clients": args.clients, "duration_s": round(elapsed, 2), "endpoints": {}}
+    for name, path in paths.items():
+        vals = sorted(v for lat, _ in out for v in lat[name])
+        errs = sum(e[name] for _, e in out)
+        report["endpoints"][path] = {
+            "requests": len(vals),
+            "errors": errs,
+            "rps": round(len(vals) / elapsed, 1),
+            "p50_ms": round(percentile(vals, 50) * 1e3, 2) if vals else None,
+            "p95_ms": round(percentile(vals, 95) * 1e3, 2) if vals else None,
+            "p99_ms": round(percentile(vals, 99) * 1e3, 2) if vals else None,
+        }
+    report["total_rps"] = round(sum(e["rps"] for e in report["endpoints"].values()), 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
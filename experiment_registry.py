@@ -0,0 +1,51 @@
+import os
+import threading
+
+# Supporto per esperimenti concorrenti: pool di porte per i server iperf3
+# (uno per esperimento) e limite di ammissione basato sulle CPU disponibili.
+
+
+class PortPool:
+    """Porte [base, base + size) assegnate in esclusiva a un esperimento alla volta."""
+
+    def __init__(self, base: int, size: int):
+        self.base = base
+        self.size = size
+        self._free = list(range(base, base + size))
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            return self._free.pop(0) if self._free else None
+
+    def release(self, port: int):
+        with self._lock:
+            if port is not None and self.base <= port < self.base + self.size and port not in self._free:
+                self._free.append(port)
+                self._free.sort()
+
+    @property
+    def available(self) -> int:
+        with self._lock:
+            return len(self._free)
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def default_admission_limit(cpus_per_experiment: int = 2) -> int:
+    """Esperimenti concorrenti ammessi: server iperf3 e client di un esperimento
+    occupano indicativamente `cpus_per_experiment` core."""
+    return max(1, available_cpus() // cpus_per_experiment)
+
+
+def cpu_saturated() -> bool:
+    """True se il carico medio dell'ultimo minuto supera le CPU disponibili."""
+    try:
+        return os.getloadavg()[0] >= available_cpus()
+    except OSError:
+        return False
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+
+# Scheduler a evento unico per un esperimento: un solo thread con un event loop
+# asyncio lancia i job ai rispettivi offset e ne attende il completamento.
+# stop() e' thread-safe e cancella subito sia i job in attesa sia quelli in corso.
+
+POLL_INTERVAL = 0.05  # fallback se pidfd_open non e' disponibile
+
+
+class HostProcess:
+    """Processo figlio gestito dall'event loop senza thread di attesa: l'uscita
+    e' notificata tramite pidfd, stdout/stderr sono letti in modo non bloccante.
+    `on_stdout(chunk)`, se fornito, riceve i dati di stdout appena arrivano."""
+
+    def __init__(self, argv: list, on_stdout=None):
+        self._loop = asyncio.get_running_loop()
+        self.on_stdout = on_stdout
+        self.popen = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        self.pid = self.popen.pid
+        self.stdout = bytearray()
+        self.stderr = bytearray()
+        self._pipes = []
+        for pipe, buf in ((self.popen.stdout, self.stdout), (self.popen.stderr, self.stderr)):
+            fd = pipe.fileno()
+            os.set_blocking(fd, False)
+            eof = self._loop.create_future()
+            self._pipes.append((fd, eof))
+            self._loop.add_reader(fd, self._on_readable, fd, buf, eof)
+        self._exited = self._loop.create_future()
+        self._pidfd = None
+        try:
+            self._pidfd = os.pidfd_open(self.pid)
+            self._loop.add_reader(self._pidfd, self._on_exit)
+        except (AttributeError, OSError):
+            self._poller = self._loop.create_task(self._poll_exit())
+
+    @property
+    def returncode(self):
+        return self.popen.returncode
+
+    def _on_readable(self, fd, buf, eof):
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data:
+            buf += data
+            if self.on_stdout is not None and fd == self.popen.stdout.fileno():
+                self.on_stdout(data)
+            return
+        self._loop.remove_reader(fd)
+        if not eof.done():
+            eof.set_result(None)
+
+    def _on_exit(self):
+        self._loop.remove_reader(self._pidfd)
+        os.close(self._pidfd)
+        self._pidfd = None
+        self.popen.wait()
+        if not self._exited.done():
+            self._exited.set_result(self.popen.returncode)
+
+    async def _poll_exit(self):
+        while self.popen.poll() is None:
+            await asyncio.sleep(POLL_INTERVAL)
+        if not self._exited.done():
+            self._exited.set_result(self.popen.returncode)
+
+    async def wait(self):
+        """Attende l'uscita del processo e la chiusura delle pipe."""
+        await asyncio.shield(self._exited)
+        await asyncio.gather(*(asyncio.shield(eof) for _, eof in self._pipes))
+        self.close()
+        return self.returncode
+
+    async def communicate(self):
+        await self.wait()
+        return bytes(self.stdout), bytes(self.stderr)
+
+    def interrupt(self):
+        """SIGINT al gruppo di processi: iperf3 chiude il test e stampa il riepilogo."""
+        if not self._exited.done():
+            try:
+                os.killpg(self.pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+
+    async def terminate(self, grace: float = 5.0):
+        """SIGTERM al gruppo di processi, SIGKILL se non esce entro `grace` secondi."""
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            if self._exited.done():
+                break
+            try:
+                os.killpg(self.pid, sig)
+            except ProcessLookupError:
+                break
+            try:
+                await asyncio.wait_for(asyncio.shield(self._exited), timeout=grace)
+            except asyncio.TimeoutError:
+                continue
+        self.close()
+
+    def close(self):
+        for fd, eof in self._pipes:
+            if not eof.done():
+                self._loop.remove_reader(fd)
+                eof.set_result(None)
+        for pipe in (self.popen.stdout, self.popen.stderr):
+            pipe.close()
+        if self._pidfd is not None and self.popen.poll() is not None:
+            self._loop.remove_reader(self._pidfd)
+            os.close(self._pidfd)
+            self._pidfd = None
+
+
+class ExperimentScheduler:
+    """Esegue `jobs` = [(offset_s, async_fn), ...]: ogni async_fn() parte a
+    offset_s secondi dall'avvio di run(). Ritorna i risultati non None dei job
+    completati; `launch_offsets` registra l'istante effettivo di avvio.
+    run_phased() lancia invece ogni job alla fine della fase precedente."""
+
+    def __init__(self):
+        self.stopped = threading.Event()
+        self.launch_offsets = {}
+        self._loop = None
+        self._tasks = []
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self.stopped.set()
+        with self._lock:
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._cancel_all)
+            except RuntimeError:
+                pass
+
+    def _cancel_all(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def run(self, jobs: list) -> list:
+        return asyncio.run(self._main(jobs))
+
+    def run_phased(self, jobs: list, wait_phase, on_finish) -> list:
+        """`jobs` = [async_fn, ...] lanciati in sequenza: il job i+1 parte quando
+        `await wait_phase(i)` ritorna (fine della fase aperta dal job i); dopo
+        l'ultima fase `on_finish()` chiede ai job in corso di concludersi."""
+        return asyncio.run(self._main_phased(jobs, wait_phase, on_finish))
+
+    async def _launch(self, name, at, fn):
+        loop = asyncio.get_running_loop()
+        delay = at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.launch_offsets[name] = loop.time() - self._t0
+        return await fn()
+
+    async def _main(self, jobs):
+        loop = asyncio.get_running_loop()
+        self._t0 = loop.time()
+        with self._lock:
+            self._loop = loop
+        try:
+            if self.stopped.is_set():
+                return []
+            self._tasks = [
+                asyncio.create_task(self._launch(i, self._t0 + offset, fn), name=f"job_{i}")
+                for i, (offset, fn) in enumerate(jobs)
+            ]
+            outcomes = await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            with self._lock:
+                self._loop = None
+        return [r for r in outcomes if r is not None and not isinstance(r, BaseException)]
+
+    async def _main_phased(self, jobs, wait_phase, on_finish):
+        loop = asyncio.get_running_loop()
+        self._t0 = loop.time()
+        with self._lock:
+            self._loop = loop
+        self._tasks = []
+        try:
+            for i, fn in enumerate(jobs):
+                if self.stopped.is_set():
+                    break
+                self.launch_offsets[i] = loop.time() - self._t0
+                self._tasks.append(asyncio.create_task(fn(), name=f"job_{i}"))
+                # anche l'attesa della fase e' cancellata da stop()
+                phase = asyncio.create_task(wait_phase(i), name=f"phase_{i}")
+                self._tasks.append(phase)
+                try:
+                    await phase
+                except asyncio.CancelledError:
+                    break
+            if not self.stopped.is_set():
+                on_finish()
+            jobs_done = [t for t in self._tasks if t.get_name().startswith("job_")]
+            outcomes = await asyncio.gather(*jobs_done, return_exceptions=True)
+        finally:
+            with self._lock:
+                self._loop = None
+        return [r for r in outcomes if r is not None and not isinstance(r, BaseException)]
@@ -0,0 +1,111 @@
+import os
+import threading
+
+# Registro hostname Mininet -> PID della shell dell'host (e relativi namespace).
+# La scansione completa della tabella dei processi avviene una volta per
+# esperimento; le richieste successive sono validate con una sola lettura di
+# /proc/<pid>/cmdline.
+
+NAMESPACES = ("net", "mnt", "uts", "ipc")
+
+
+def host_tag(hostname: str) -> bytes:
+    return f"mininet:{hostname}".encode()
+
+
+def scan_proc(proc_root: str = "/proc") -> dict:
+    """Scansione diretta di /proc (senza psutil ne' pgrep): ritorna {hostname: pid}."""
+    processes = {}
+    try:
+        entries = os.listdir(proc_root)
+    except OSError:
+        return processes
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc_root, entry, "cmdline"), "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if b"mininet:" not in cmdline:
+            continue
+        for part in cmdline.split(b"\0"):
+            if part.startswith(b"mininet:"):
+                processes[part.split(b":", 1)[1].decode(errors="replace")] = int(entry)
+                break
+    return processes
+
+
+class HostRegistry:
+    """Cache dei PID degli host Mininet con invalidazione alla morte del processo.
+
+    `scanner` e' la funzione di scansione completa ({hostname: pid}); viene
+    richiamata solo da refresh() o quando un PID in cache non e' piu' valido."""
+
+    def __init__(self, scanner=None, proc_root: str = "/proc"):
+        self.proc_root = proc_root
+        self._scanner = scanner or (lambda: scan_proc(proc_root))
+        self._lock = threading.Lock()
+        self._pids = {}
+        self._ns_fds = {}
+        self.scans = 0
+
+    def _valid(self, hostname: str, pid: int) -> bool:
+        try:
+            with open(f"{self.proc_root}/{pid}/cmdline", "rb") as f:
+                return host_tag(hostname) in f.read().split(b"\0")
+        except OSError:
+            return False
+
+    def _close_fds(self, hostname: str):
+        for fd in self._ns_fds.pop(hostname, {}).values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def refresh(self) -> dict:
+        """Scansione completa: da chiamare all'avvio di ogni esperimento."""
+        found = self._scanner()
+        with self._lock:
+            self.scans += 1
+            for hostname, pid in list(self._pids.items()):
+                if found.get(hostname) != pid:
+                    self._close_fds(hostname)
+            self._pids = dict(found)
+            return dict(self._pids)
+
+    def invalidate(self, hostname: str = None):
+        with self._lock:
+            names = [hostname] if hostname else list(self._pids)
+            for name in names:
+                self._pids.pop(name, None)
+                self._close_fds(name)
+
+    def resolve(self, hostname: str):
+        with self._lock:
+            pid = self._pids.get(hostname)
+        if pid is not None:
+            if self._valid(hostname, pid):
+                return pid
+            # processo terminato (o PID riutilizzato): invalido e riscansiono
+            self.invalidate(hostname)
+        return self.refresh().get(hostname)
+
+    def namespace_fds(self, hostname: str) -> dict:
+        """Descrittori aperti su /proc/<pid>/ns/{net,mnt,uts,ipc} dell'host, utilizzabili con setns."""
+        pid = self.resolve(hostname)
+        if pid is None:
+            return {}
+        with self._lock:
+            fds = self._ns_fds.get(hostname)
+            if fds is None:
+                fds = {}
+                for ns in NAMESPACES:
+                    try:
+                        fds[ns] = os.open(f"{self.proc_root}/{pid}/ns/{ns}", os.O_RDONLY)
+                    except OSError:
+                        continue
+                self._ns_fds[hostname] = fds
+            return dict(fds)
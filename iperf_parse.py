@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from live_stream import UNIT, BYTE_UNIT
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# Parsing dell'output dei client iperf3 (-J oppure testo). Con -J e test lunghi il
+# documento e' di diversi MB quasi tutti di `intervals`, mentre il throughput sta
+# nell'oggetto `end` in coda: parse_iperf_output cerca la chiave `end` di primo
+# livello dalla fine e decodifica solo quell'oggetto. orjson, se installato,
+# accelera la decodifica completa (usata quando la ricerca mirata non si applica,
+# es. JSON compatto). Rielaborazione in blocco di output salvati, una riga JSON
+# per file:  python3 iperf_parse.py <file o directory>... [--workers N]
+
+# riga di riepilogo testuale: "... 1.10 GBytes   943 Mbits/sec   12   sender" (anche -f K/M/G: "MBytes/sec")
+SUMMARY_RE = re.compile(r"([\d.]+)\s+([KMGT]?)(bits|Bytes)/sec\b")
+_decoder = json.JSONDecoder()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def throughput_from_end(end: dict) -> float:
+    candidates = []
+    for key in ("sum_received", "sum_sent", "sum"):
+        if isinstance(end.get(key), dict):
+            bps = end[key].get("bits_per_second")
+            if bps is not None:
+                candidates.append(bps)
+    streams = end.get("streams", [])
+    for s in streams:
+        for side in ("recv", "send"):
+            sec = s.get(side)
+            if isinstance(sec, dict):
+                bps = sec.get("bits_per_second")
+                if bps is not None:
+                    candidates.append(bps)
+    for bps in candidates:
+        try:
+            mbps = float(bps) / 1_000_000.0
+            return round(mbps, 3)
+        except Exception:
+            continue
+    return 0.0
+
+
+def transport_stats(end: dict, intervals: list, udp: bool) -> dict:
+    """Jitter e perdite (UDP) o ritrasmissioni (TCP) dal riepilogo `end` del client,
+    altrimenti (output testuale) dai campioni per intervallo."""
+    end = end or {}
+    if udp:
+        s = end.get("sum") or {}
+        if s.get("packets") is not None:
+            return {"jitter_ms": s.get("jitter_ms"), "lost_packets": s.get("lost_packets"), "packets": s.get("packets"),
+                    "lost_percent": s.get("lost_percent")}
+        jitter = [i["jitter_ms"] for i in intervals if i.get("jitter_ms") is not None]
+        lost = [i["lost_packets"] for i in intervals if i.get("lost_packets") is not None]
+        return {"jitter_ms": round(sum(jitter) / len(jitter), 4) if jitter else None,
+                "lost_packets": sum(lost) if lost else None}
+    sent = end.get("sum_sent") or {}
+    if sent.get("retransmits") is not None:
+        return {"retransmits": sent["retransmits"]}
+    retransmits = [i["retransmits"] for i in intervals if i.get("retransmits") is not None]
+    return {"retransmits": sum(retransmits) if retransmits else None}
+
+
+def find_end(doc):
+    """Oggetto `end` di primo livello di un documento -J indentato (str o bytes),
+    senza decodificare il resto; None se non trovato o se il JSON e' compatto."""
+    if isinstance(doc, str):
+        nl, indent_chars, key, brace_char = "\n", (" ", "\t"), '"end":', "{"
+    else:
+        nl, indent_chars, key, brace_char = b"\n", (b" ", b"\t"), b'"end":', b"{"
+    first = doc.find(nl)
+    if first < 0:
+        return None
+    # l'indentazione della seconda riga e' quella delle chiavi di primo livello: le chiavi
+    # "end" annidate (intervalli, stream, server_output_json) sono piu' indentate
+    i = j = first + 1
+    while doc[j:j + 1] in indent_chars:
+        j += 1
+    if i == j:
+        return None
+    pos = doc.rfind(nl + doc[i:j] + key)
+    if pos < 0:
+        return None
+    brace = doc.find(brace_char, pos)
+    if brace < 0:
+        return None
+    tail = doc[brace:]
+    try:
+        end, _ = _decoder.raw_decode(tail if isinstance(tail, str) else tail.decode(errors="replace"))
+    except ValueError:
+        return None
+    return end if isinstance(end, dict) else None
+
+
+def parse_iperf_text_fallback(output: str) -> float:
+    """Throughput in Mbps dalle righe di riepilogo testuali, preferendo quella del ricevitore."""
+    sender = None
+    for line in output.splitlines():
+        is_receiver = "receiver" in line
+        if not is_receiver and "sender" not in line:
+            continue
+        m = SUMMARY_RE.search(line)
+        if not m:
+            continue
+        num, prefix, kind = m.groups()
+        try:
+            bps = float(num) * (UNIT[prefix] if kind == "bits" else BYTE_UNIT[prefix] * 8)
+        except ValueError:
+            continue
+        mbps = round(bps / 1_000_000.0, 3)
+        if is_receiver:
+            return mbps
+        if sender is None:
+            sender = mbps
+    return sender if sender is not None else 0.0
+
+
+def parse_iperf_output(output) -> float:
+    if not output:
+        return 0.0
+    head = output[:64].lstrip()
+    if head[:1] not in ("{", b"{"):
+        return parse_iperf_text_fallback(output if isinstance(output, str) else output.decode(errors="replace"))
+    end = find_end(output)
+    if end is not None:
+        return throughput_from_end(end)
+    try:
+        j = loads(output)
+    except Exception:
+        return parse_iperf_text_fallback(output if isinstance(output, str) else output.decode(errors="replace"))
+    return throughput_from_end(j.get("end", {}))
+
+
+def parse_file(path: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            return {"file": path, "throughput": parse_iperf_output(f.read())}
+    except OSError as e:
+        return {"file": path, "error": str(e)}
+
+
+def iter_paths(paths):
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield p
+
+
+def bulk_parse(paths, workers: int = None, chunksize: int = 8):
+    """parse_file su tutti i file in un pool di processi (un file da qualche MB per task)."""
+    files = list(iter_paths(paths))
+    if workers == 1 or len(files) < 2:
+        yield from map(parse_file, files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_file, files, chunksize=chunksize)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ricalcola il throughput da output iperf3 salvati")
+    ap.add_argument("paths", nargs="+", help="file o directory di output iperf3 (-J o testo)")
+    ap.add_argument("--workers", type=int, default=None, help="processi (default: numero di CPU)")
+    args = ap.parse_args()
+    for row in bulk_parse(args.paths, args.workers):
+        sys.stdout.write(json.dumps(row) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+# Supervisore del server iperf3 di un esperimento. stdout e stderr del server
+# sono letti di continuo da due thread (senza lettori la pipe da 64 KiB si riempie
+# e iperf3 si blocca a meta' test) e copiati in un log a rotazione. Il server gira
+# con -J: al termine di ogni test scrive un report JSON, da cui si ricava una
+# seconda misura di throughput (lato ricevitore) indicizzata per IP del client.
+# Prontezza e salute si verificano cercando il socket in LISTEN in /proc/net/tcp*
+# del namespace dell'host; se il server esce viene riavviato subito.
+
+TCP_LISTEN = "0A"
+
+
+def listening(port: int, proc_net_tcp: str) -> bool:
+    """True se il testo di /proc/net/tcp{,6} contiene un socket in LISTEN su `port`."""
+    suffix = f":{port:04X}"
+    for line in proc_net_tcp.splitlines():
+        fields = line.split()
+        if len(fields) > 3 and fields[1].endswith(suffix) and fields[3] == TCP_LISTEN:
+            return True
+    return False
+
+
+def client_ip(report: dict):
+    for conn in (report.get("start") or {}).get("connected") or []:
+        host = conn.get("remote_host")
+        if host:
+            return host[7:] if host.startswith("::ffff:") else host
+    return None
+
+
+class RotatingLog:
+    """File di log a byte con rotazione a dimensione (path, path.1, ... path.N)."""
+
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "ab")
+
+    def write(self, data: bytes):
+        with self._lock:
+            if self._f.closed:
+                return
+            if self._f.tell() + len(data) > self.max_bytes and self._f.tell() > 0:
+                self._rotate()
+            self._f.write(data)
+            self._f.flush()
+
+    def _rotate(self):
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._f = open(self.path, "wb")
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+class ReportParser:
+    """Estrae gli oggetti JSON completi da uno stream (output -J o --json-stream)."""
+
+    def __init__(self, on_report, max_buffer: int = 16 * 1024 * 1024):
+        self.on_report = on_report
+        self.max_buffer = max_buffer
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._start = None  # evento start di --json-stream in attesa del relativo end
+
+    def feed(self, chunk: bytes):
+        self._buf += chunk.decode(errors="replace")
+        # con -J un report finisce con la graffa di chiusura: prima e' inutile provare a decodificare
+        if not self._buf.rstrip().endswith("}"):
+            if len(self._buf) > self.max_buffer:
+                self._buf = ""
+            return
+        while True:
+            buf = self._buf.lstrip()
+            if not buf:
+                self._buf = ""
+                return
+            if buf[0] != "{":
+                nl = buf.find("\n")
+                self._buf = "" if nl < 0 else buf[nl + 1:]
+                continue
+            try:
+                obj, end = self._decoder.raw_decode(buf)
+            except ValueError:
+                self._buf = buf
+                return
+            self._buf = buf[end:]
+            self._object(obj)
+
+    def _object(self, obj: dict):
+        if "event" in obj:
+            if obj["event"] == "start":
+                self._start = obj.get("data")
+            elif obj["event"] == "end":
+                self.on_report({"start": self._start or {}, "end": obj.get("data") or {}})
+                self._start = None
+        elif "end" in obj:
+            self.on_report(obj)
+
+
+class IperfServer:
+    """`spawn(cmd)` avvia `cmd` nel namespace del server e ritorna un Popen con
+    stdout/stderr in pipe (in un proprio process group); `probe()` ritorna il testo
+    di /proc/net/tcp{,6} del namespace oppure None."""
+
+    def __init__(self, port: int, spawn, probe=None, log_path: str = None, logger=None,
+                 ready_timeout: float = 5.0, health_interval: float = 5.0,
+                 max_log_bytes: int = 5 * 1024 * 1024, log_backups: int = 3, max_reports: int = 64):
+        self.port = port
+        self.cmd = ["iperf3", "-s", "-p", str(port), "-J"]
+        self.spawn = spawn
+        self.probe = probe
+        self.logger = logger
+        self.ready_timeout = ready_timeout
+        self.health_interval = health_interval
+        self.max_reports = max_reports
+        self.log = RotatingLog(log_path, max_log_bytes, log_backups) if log_path else None
+        self.proc = None
+        self.restarts = 0
+        self.reports_total = 0
+        self._reports = {}  # ip client -> deque di (ts ricezione, report)
+        self._cond = threading.Condition()
+        self._exited = None
+        self._stopping = threading.Event()
+        self._monitor = None
+
+    def _log(self, level, msg):
+        if self.logger is not None:
+            getattr(self.logger, level)(f"iperf3 server :{self.port}: {msg}")
+
+    def is_listening(self):
+        """True/False dal probe, None se il probe non e' disponibile."""
+        if self.probe is None:
+            return None
+        text = self.probe()
+        return None if text is None else listening(self.port, text)
+
+    def start(self) -> bool:
+        if not self._spawn() or not self.wait_ready(self.ready_timeout):
+            return False
+        self._monitor = threading.Thread(target=self._watch, name=f"iperf3-server-{self.port}", daemon=True)
+        self._monitor.start()
+        return True
+
+    def _spawn(self) -> bool:
+        proc = self.spawn(self.cmd)
+        if proc is None:
+            return False
+        exited = threading.Event()
+        parser = ReportParser(self._add_report)
+        threading.Thread(target=self._drain, args=(proc.stdout, parser.feed, exited), daemon=True).start()
+        threading.Thread(target=self._drain, args=(proc.stderr, None, None), daemon=True).start()
+        self.proc, self._exited = proc, exited
+        return True
+
+    def _drain(self, pipe, on_chunk, exited):
+        fd = pipe.fileno()
+        try:
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                if self.log is not None:
+                    self.log.write(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+        except (OSError, ValueError):
+            pass
+        finally:
+            pipe.close()
+            if exited is not None:
+                exited.set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Attende il socket in LISTEN (backoff da 10 ms); False se il processo esce prima."""
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            if self.proc is None or self.proc.poll() is not None:
+                return False
+            state = self.is_listening()
+            if state or (state is None and self._exited.wait(0.2) is False):
+                # senza probe: pronto se il processo e' ancora vivo dopo 200 ms
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    def _watch(self):
+        failed_checks = 0
+        backoff = 0.1
+        while not self._stopping.is_set():
+            exited = self._exited.wait(self.health_interval)
+            if self._stopping.is_set():
+                return
+            if not exited:
+                if self.is_listening() is False:
+                    failed_checks += 1
+                    if failed_checks < 2:
+                        continue
+                    self._log("warning", "porta non in ascolto, riavvio")
+                    self._kill(self.proc)
+                else:
+                    failed_checks = 0
+                    backoff = 0.1
+                    continue
+            else:
+                self._log("warning", f"terminato (codice {self.proc.wait()}), riavvio")
+            failed_checks = 0
+            self.restarts += 1
+            if self._spawn() and self.wait_ready(self.ready_timeout):
+                self._log("info", f"riavviato (pid {self.proc.pid})")
+                backoff = 0.1
+            else:
+                self._log("error", f"riavvio fallito, nuovo tentativo tra {backoff:.1f}s")
+                if self.proc is not None:
+                    self._kill(self.proc)
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 5.0)
+
+    def _add_report(self, report: dict):
+        ip = client_ip(report)
+        with self._cond:
+            self.reports_total += 1
+            q = self._reports.get(ip)
+            if q is None:
+                q = self._reports[ip] = deque(maxlen=self.max_reports)
+            q.append((time.time(), report))
+            self._cond.notify_all()
+
+    def report(self, ip: str, since: float, timeout: float = 0.0):
+        """Primo report del client `ip` ricevuto dopo `since` (epoch), attendendo fino a `timeout` s."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for ts, rep in self._reports.get(ip, ()):
+                    if ts >= since:
+                        return rep
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping.is_set():
+                    return None
+                self._cond.wait(remaining)
+
+    def _kill(self, proc):
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+                proc.wait()
+        except ProcessLookupError:
+            pass
+
+    def stop(self):
+        self._stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._exited is not None:
+            self._exited.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout=5)
+        self._kill(self.proc)
+        if self.log is not None:
+            self.log.close()
+
+    def status(self) -> dict:
+        return {
+            "port": self.port,
+            "pid": self.proc.pid if self.proc is not None else None,
+            "alive": self.proc is not None and self.proc.poll() is None,
+            "restarts": self.restarts,
+            "reports": self.reports_total,
+        }
@@ -0,0 +1,157 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Campioni per intervallo dei client iperf3 letti mentre il test e' in corso:
+# con --json-stream (iperf3 >= 3.17) ogni riga e' un evento JSON, altrimenti
+# si usa l'output testuale con --forceflush.
+
+INTERVAL_RE = re.compile(
+    r"^\[\s*(?:\d+|SUM)\]\s+([\d.]+)-([\d.]+)\s+sec\s+([\d.]+)\s+([KMGT]?)Bytes\s+([\d.]+)\s+([KMGT]?)bits/sec(.*)$"
+)
+UNIT = {"": 1, "K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12}
+BYTE_UNIT = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def sample_from_sum(s: dict) -> dict:
+    return {
+        "start": s.get("start"),
+        "end": s.get("end"),
+        "bytes": s.get("bytes"),
+        "bits_per_second": s.get("bits_per_second"),
+        "retransmits": s.get("retransmits"),
+        "jitter_ms": s.get("jitter_ms"),
+        "lost_packets": s.get("lost_packets"),
+        "ts": time.time(),
+    }
+
+
+def parse_text_interval(line: str, udp: bool = False):
+    m = INTERVAL_RE.match(line.strip())
+    if not m or "sender" in line or "receiver" in line:
+        return None
+    start, end, nbytes, bunit, rate, runit, rest = m.groups()
+    extra = rest.split()
+    count = int(extra[0]) if extra and extra[0].isdigit() else None
+    return {
+        "start": float(start),
+        "end": float(end),
+        "bytes": int(float(nbytes) * BYTE_UNIT[bunit]),
+        "bits_per_second": float(rate) * UNIT[runit],
+        "retransmits": None if udp else count,
+        "jitter_ms": None,
+        "lost_packets": None,
+        "ts": time.time(),
+    }
+
+
+class IperfIntervalReader:
+    """Divide lo stdout di un client iperf3 in righe e ne estrae i campioni.
+
+    `on_sample(sample)` e' chiamato per ogni intervallo; con --json-stream
+    l'evento finale e' conservato in `end` (stesso contenuto di `end` di -J)."""
+
+    def __init__(self, on_sample=None, json_stream: bool = True, udp: bool = False):
+        self.on_sample = on_sample
+        self.json_stream = json_stream
+        self.udp = udp
+        self.intervals = []
+        self.end = None
+        self.error = None
+        self._partial = b""
+
+    def feed(self, chunk: bytes):
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line.decode(errors="replace"))
+
+    def _line(self, line: str):
+        if not line.strip():
+            return
+        sample = None
+        if self.json_stream:
+            try:
+                ev = json.loads(line)
+            except ValueError:
+                return
+            kind = ev.get("event")
+            data = ev.get("data") or {}
+            if kind == "interval" and isinstance(data.get("sum"), dict):
+                sample = sample_from_sum(data["sum"])
+            elif kind == "end":
+                self.end = data
+            elif kind == "error":
+                self.error = data
+        else:
+            sample = parse_text_interval(line, self.udp)
+        if sample is not None:
+            self.intervals.append(sample)
+            if self.on_sample is not None:
+                self.on_sample(sample)
+
+
+class IntervalHub:
+    """Ring buffer per (esperimento, host) piu' un registro ordinato degli eventi
+    per gli stream SSE. Tiene gli ultimi `max_experiments` esperimenti."""
+
+    def __init__(self, ring_size: int = 600, max_events: int = 10000, max_experiments: int = 8):
+        self.ring_size = ring_size
+        self.max_experiments = max_experiments
+        self._cond = threading.Condition()
+        self._buffers = OrderedDict()
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+
+    def _publish(self, experiment_id, hostname, kind, payload):
+        self._seq += 1
+        self._events.append((self._seq, experiment_id, hostname, kind, payload))
+        self._cond.notify_all()
+
+    def push(self, experiment_id: str, hostname: str, sample: dict):
+        with self._cond:
+            hosts = self._buffers.get(experiment_id)
+            if hosts is None:
+                hosts = self._buffers[experiment_id] = {}
+                while len(self._buffers) > self.max_experiments:
+                    self._buffers.popitem(last=False)
+            ring = hosts.get(hostname)
+            if ring is None:
+                ring = hosts[hostname] = deque(maxlen=self.ring_size)
+            ring.append(sample)
+            self._publish(experiment_id, hostname, "interval", sample)
+
+    def finish(self, experiment_id: str):
+        with self._cond:
+            self._publish(experiment_id, None, "end", {})
+
+    def series(self, experiment_id: str, hostname: str = None) -> dict:
+        with self._cond:
+            hosts = self._buffers.get(experiment_id, {})
+            names = [hostname] if hostname else list(hosts)
+            return {h: list(hosts[h]) for h in names if h in hosts}
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def _since(self, seq, experiment_id):
+        return [e for e in self._events if e[0] > seq and (experiment_id is None or e[1] == experiment_id)]
+
+    def wait(self, seq: int, experiment_id: str = None, timeout: float = 15.0) -> list:
+        """Eventi con sequenza > seq; attende fino a `timeout` se non ce ne sono."""
+        with self._cond:
+            if self._seq <= seq or not self._since(seq, experiment_id):
+                deadline = time.monotonic() + timeout
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    self._cond.wait(remaining)
+                    events = self._since(seq, experiment_id)
+                    if events:
+                        return events
+            return self._since(seq, experiment_id)
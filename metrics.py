@@ -0,0 +1,300 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Metriche interne in formato Prometheus/OpenMetrics senza dipendenze esterne.
+# Bucket e contatori sono preallocati alla creazione: observe()/inc() non
+# allocano. Con METRICS=0 le metriche non registrano nulla e instrumented_lock()
+# ritorna un threading.Lock semplice.
+# In modalita' di produzione i worker gunicorn (wsgi.py) servono /results da se':
+# ogni worker scrive periodicamente istogrammi e contatori in WORKERS_DIR
+# (export_worker) e il runner, che risponde a /metrics, li somma ai propri
+# (aggregate_workers). I gauge restano quelli del runner.
+
+ENABLED = os.environ.get("METRICS", "1") != "0"
+PREFIX = "experiment_controller_"
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+WORKERS_DIR = os.environ.get("METRICS_WORKERS_DIR", "/tmp/experiment_controller_metrics")
+WORKER_EXPORT_INTERVAL = 5.0  # s tra due scritture delle metriche di un worker
+
+_metrics = []
+_workers_dir = None   # impostato dal runner con aggregate_workers()
+_exporter_pid = None  # processo che ha avviato export_worker() (i figli di un fork lo riavviano)
+
+
+def _fmt(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _labels(pairs) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Istogramma a bucket fissi; con `label` = (nome, valori) un figlio per valore,
+    tutti creati subito (`child(valore)` e' solo un lookup)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS, label=None, register=True):
+        self.name = PREFIX + name
+        self.help = help
+        self.bounds = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self.label = None
+        self._children = {}
+        if label is not None:
+            self.label = label[0]
+            self._children = {v: Histogram(name, help, buckets, register=False) for v in label[1]}
+        if register:
+            _metrics.append(self)
+
+    def child(self, value):
+        return self._children[value]
+
+    def observe(self, value: float):
+        if not ENABLED:
+            return
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def _state(self) -> list:
+        with self._lock:
+            return self._counts + [self._sum, self._count]
+
+    def state(self) -> dict:
+        if not self._children:
+            return {"": self._state()}
+        return {value: child._state() for value, child in self._children.items()}
+
+    def _samples(self, labels=(), extra=None):
+        with self._lock:
+            counts, total, n = list(self._counts), self._sum, self._count
+        if extra:
+            counts = [a + b for a, b in zip(counts, extra)]
+            total, n = total + extra[-2], n + extra[-1]
+        cumulative = 0
+        for bound, c in zip(self.bounds + (float("inf"),), counts):
+            cumulative += c
+            yield f"{self.name}_bucket{_labels(labels + (('le', _fmt(bound)),))} {cumulative}"
+        yield f"{self.name}_sum{_labels(labels)} {_fmt(total)}"
+        yield f"{self.name}_count{_labels(labels)} {n}"
+
+    def samples(self, openmetrics=False, extra=None):
+        extra = extra or {}
+        if not self._children:
+            yield from self._samples(extra=extra.get(""))
+            return
+        for value, child in self._children.items():
+            yield from child._samples(((self.label, value),), extra.get(value))
+
+
+class Counter:
+    """Contatore; con `label` i valori dell'etichetta sono creati al primo uso."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label: str = None):
+        self.name = PREFIX + name
+        self.help = help
+        self.label = label
+        self._lock = threading.Lock()
+        self._values = {None: 0} if label is None else {}
+        _metrics.append(self)
+
+    def inc(self, value=None, amount: int = 1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[value] = self._values.get(value, 0) + amount
+
+    def state(self) -> dict:
+        with self._lock:
+            return {"" if k is None else k: n for k, n in self._values.items()}
+
+    def samples(self, openmetrics=False, extra=None):
+        with self._lock:
+            values = dict(self._values)
+        for key, n in (extra or {}).items():
+            value = None if key == "" and self.label is None else key
+            values[value] = values.get(value, 0) + n
+        for value, n in sorted(values.items(), key=lambda kv: str(kv[0])):
+            labels = () if value is None else ((self.label, value),)
+            yield f"{self.name}_total{_labels(labels)} {n}"
+
+
+class Gauge:
+    """Valore istantaneo; con `fn` e' letto alla richiesta di /metrics."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn=None):
+        self.name = PREFIX + name
+        self.help = help
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._value = 0
+        _metrics.append(self)
+
+    def inc(self, amount: int = 1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: int = 1):
+        self.inc(-amount)
+
+    def samples(self, openmetrics=False, extra=None):
+        value = self.fn() if self.fn is not None else self._value
+        yield f"{self.name} {_fmt(value)}"
+
+
+class InstrumentedLock:
+    """threading.Lock che misura l'attesa quando e' conteso. Il caso senza
+    contesa costa un acquire non bloccante."""
+
+    def __init__(self, name: str, help: str):
+        self._lock = threading.Lock()
+        self.wait = Histogram(f"{name}_wait_seconds", f"Attesa per acquisire {help} quando conteso")
+        self.acquisitions = Counter(f"{name}_acquisitions", f"Acquisizioni di {help}")
+        self.contended = Counter(f"{name}_contended", f"Acquisizioni di {help} che hanno dovuto attendere")
+        self.waiting = Gauge(f"{name}_waiters", f"Thread in attesa di {help}")
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            self.acquisitions.inc()
+            return True
+        if not blocking:
+            return False
+        self.waiting.inc()
+        t0 = time.perf_counter()
+        try:
+            ok = self._lock.acquire(True, timeout)
+        finally:
+            self.waiting.dec()
+        if ok:
+            self.wait.observe(time.perf_counter() - t0)
+            self.acquisitions.inc()
+            self.contended.inc()
+        return ok
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def instrumented_lock(name: str, help: str):
+    return InstrumentedLock(name, help) if ENABLED else threading.Lock()
+
+
+def timed_stream(chunks, histogram: Histogram):
+    """Inoltra i chunk di un generatore registrando solo il tempo speso a produrli
+    (escluso quello in cui il client li consuma)."""
+    total = 0.0
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        total += time.perf_counter() - t0
+        yield chunk
+        t0 = time.perf_counter()
+    histogram.observe(total + time.perf_counter() - t0)
+
+
+def snapshot() -> dict:
+    """Stato di istogrammi e contatori di questo processo, sommabile con merge_workers()."""
+    return {m.name: m.state() for m in _metrics if m.kind != "gauge"}
+
+
+def _write_snapshot(directory: str):
+    path = os.path.join(directory, f"worker_{os.getpid()}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp, path)
+
+
+def export_worker(directory: str = WORKERS_DIR, interval: float = WORKER_EXPORT_INTERVAL):
+    """Avvia (una volta per processo) la scrittura periodica delle metriche del worker."""
+    global _exporter_pid
+    if not ENABLED or _exporter_pid == os.getpid():
+        return
+    _exporter_pid = os.getpid()
+    os.makedirs(directory, exist_ok=True)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                _write_snapshot(directory)
+            except OSError:
+                pass
+
+    threading.Thread(target=run, name="metrics-export", daemon=True).start()
+    atexit.register(lambda: _write_snapshot(directory))
+
+
+def aggregate_workers(directory: str = WORKERS_DIR):
+    """Nel runner: render() somma le metriche scritte dai worker in `directory`.
+    I file di un avvio precedente vengono rimossi."""
+    global _workers_dir
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "worker_*.json")):
+        os.unlink(path)
+    _workers_dir = directory
+
+
+def merge_workers(directory: str) -> dict:
+    merged = {}
+    for path in glob.glob(os.path.join(directory, "worker_*.json")):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, series in data.items():
+            out = merged.setdefault(name, {})
+            for key, value in series.items():
+                if isinstance(value, list):
+                    prev = out.get(key)
+                    out[key] = value if prev is None else [a + b for a, b in zip(prev, value)]
+                else:
+                    out[key] = out.get(key, 0) + value
+    return merged
+
+
+def render(openmetrics: bool = False) -> str:
+    workers = merge_workers(_workers_dir) if _workers_dir else {}
+    lines = []
+    for m in _metrics:
+        # nel formato Prometheus 0.0.4 il tipo counter si riferisce al nome con _total
+        family = m.name + "_total" if m.kind == "counter" and not openmetrics else m.name
+        lines.append(f"# HELP {family} {m.help}")
+        lines.append(f"# TYPE {family} {m.kind}")
+        lines.extend(m.samples(openmetrics, workers.get(m.name)))
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
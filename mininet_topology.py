@@ -3,11 +3,40 @@ from mininet.node import Controller, RemoteController, OVSSwitch
 from mininet.cli import CLI
 from mininet.log import setLogLevel, info
 from mininet.link import TCLink
+from mininet.util import quietRun
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import subprocess
 import time
 import os
+from topology_spec import Topology, load_spec, generate_mesh, generate_leaf_spine, DEFAULT_SPEC
 
+BUILD_WORKERS = 16  # nodi configurati in parallelo
+CONNECT_TIMEOUT = 10.0  # attesa massima (s) della connessione degli switch ai controller
 
-def create_network():
+
+def parallel(fn, items, workers=BUILD_WORKERS):
+    # ogni nodo Mininet ha la propria shell: operazioni su nodi diversi sono indipendenti
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(fn, items))
+
+
+def wait_connected(expected: int, timeout: float = CONNECT_TIMEOUT) -> int:
+    """Attende che `expected` switch siano connessi al controller; una sola
+    interrogazione ovs-vsctl per tutti gli switch. Ritorna quanti sono connessi."""
+    deadline = time.monotonic() + timeout
+    while True:
+        connected = quietRun('ovs-vsctl --columns=is_connected list Controller').count('true')
+        if connected >= expected or time.monotonic() >= deadline:
+            return connected
+        time.sleep(0.1)
+
+
+def create_network(topo: Topology, workers: int = BUILD_WORKERS, timings: dict = None, connect_timeout: float = CONNECT_TIMEOUT):
+    """Crea la rete dalla specifica; `timings` (se fornito) riceve la durata in
+    secondi delle fasi nodes, links, controllers."""
+    timings = {} if timings is None else timings
 
     # Inizializza Mininet con controller remoto (Ryu)
     net = Mininet(
@@ -18,123 +47,196 @@ def create_network():
     )
 
     info('*** Aggiunta del controller Ryu\n')
-    controller = net.addController(
-        'c0',
-        controller=RemoteController,
-        ip='127.0.0.1',  
-        port=6633  
-    )
-    
-    controller_c1 = net.addController(
-        'c1',
-        controller=RemoteController,
-        ip='127.0.0.1',  
-        port=6634  
-    )
-    
-
-    info('*** Aggiunta degli switch\n')
+    controllers = {}
+    for name, c in topo.controllers.items():
+        controllers[name] = net.addController(
+            name,
+            controller=RemoteController,
+            ip=c.get('ip', '127.0.0.1'),
+            port=c.get('port', 6633)
+        )
+
+    t0 = time.perf_counter()
+    info('*** Aggiunta degli switch e degli host\n')
     """Gli switch e i router vengono creati allo stesso modo
     la differenza avviene con le logiche di controllo nel controller SDN per i router
     e nell'abilitazione dell'IP forwarding per gli switch """
 
-    
-    s1 = net.addSwitch('s1', protocols='OpenFlow13')
-
-    r1 = net.addSwitch('r1', protocols='OpenFlow13')
-    r2 = net.addSwitch('r2', protocols='OpenFlow13')
-    r3 = net.addSwitch('r3', protocols='OpenFlow13')
-    r4 = net.addSwitch('r4', protocols='OpenFlow13')
-
-    info('*** Aggiunta degli host\n')
-    h1 = net.addHost('h1', ip='10.1.1.10/24', defaultRoute='via 10.1.1.1')
-    h2 = net.addHost('h2', ip='10.1.1.20/24', defaultRoute='via 10.1.1.1')
-    h3 = net.addHost('h3', ip='10.1.1.30/24', defaultRoute='via 10.1.1.1')
-
-    h4 = net.addHost('h4', ip='10.2.1.10/24', defaultRoute='via 10.2.1.1')
-    h5 = net.addHost('h5', ip='10.2.1.20/24', defaultRoute='via 10.2.1.1')
-
-    h6 = net.addHost('h6', ip='10.3.1.10/24', defaultRoute='via 10.3.1.1')
-
-    h7 = net.addHost('h7', ip='10.4.1.10/24', defaultRoute='via 10.4.1.1')
-    h8 = net.addHost('h8', ip='10.4.1.20/24', defaultRoute='via 10.4.1.1')
-
-    h9 = net.addHost('h9', ip='10.8.1.10/24', defaultRoute='via 10.8.1.1')
-
+    switch_names = list(topo.switches) + list(topo.routers)
+    hosts = topo.hosts()
+    host_macs = topo.host_macs()
+
+    def add_node(name):
+        if name not in hosts:
+            # batch=True: i comandi ovs-vsctl sono accodati e applicati in un'unica transazione
+            return net.addSwitch(name, cls=OVSSwitch, protocols='OpenFlow13', batch=True)
+        ip, gateway = hosts[name]
+        # MAC esplicito (topology_spec.mac_of): il contatore di autoSetMacs non e' sicuro tra thread,
+        # e ryu_static_router.py installa gli stessi indirizzi senza attendere ARP
+        return net.addHost(name, ip=ip, defaultRoute=f'via {gateway}', mac=host_macs[name])
+
+    names = switch_names + list(hosts)
+    nodes = dict(zip(names, parallel(add_node, names, workers)))
+    order = {name: i for i, name in enumerate(names)}
+    net.switches.sort(key=lambda n: order[n.name])
+    net.hosts.sort(key=lambda n: order[n.name])
+    timings['nodes'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
     info('*** Creazione dei collegamenti con parametri specificati\n')
-    net.addLink(h1, s1, bw=54, delay='0.05ms')
-    net.addLink(h2, s1, bw=54, delay='0.05ms')
-    net.addLink(h3, s1, bw=54, delay='0.05ms')
-    net.addLink(s1, r1, bw=1000, delay='0.05ms')
-
-    net.addLink(h4, r3, bw=1, delay='0.5ms')
-    net.addLink(h5, r3, bw=1, delay='0.5ms')
-
-    net.addLink(h6, r3, bw=1, delay='0.5ms')
-
-    net.addLink(h7, r2, bw=1000, delay='0.01ms')
-    net.addLink(h8, r2, bw=100, delay='0.01ms')  
-
-    net.addLink(h9, r4, bw=100, delay='0.05ms') 
-
-    net.addLink(r1, r2, bw=100, delay='2ms')
-    net.addLink(r1, r4, bw=10, delay='2ms')
-    net.addLink(r4, r3, bw=50, delay='2ms')
-    
-    info('*** Costruzione rete\n')
-    net.build()
-    
+    # i veth sono creati in sequenza senza tc; banda e ritardo sono applicati dopo, in parallelo per nodo
+    tc = {}
+
+    def add_link(a, b, bw=None, delay=None):
+        params = {k: v for k, v in (('bw', bw), ('delay', delay)) if v is not None}
+        link = net.addLink(nodes[a], nodes[b])
+        tc[link.intf1] = tc[link.intf2] = params
+
+    for lan in topo.lans:
+        # host collegati allo switch della LAN (se presente) o direttamente al router
+        attach = lan.get('switch') or lan['router']
+        for name, h in lan.get('hosts', {}).items():
+            add_link(name, attach, h.get('bw'), h.get('delay'))
+        if lan.get('switch'):
+            uplink = lan.get('uplink', {})
+            add_link(attach, lan['router'], uplink.get('bw'), uplink.get('delay'))
+
+    for link in topo.links:
+        a, b = link['routers']
+        add_link(a, b, link.get('bw'), link.get('delay'))
+
+    def config_tc(node):
+        for intf in node.intfList():
+            if tc.get(intf):
+                intf.config(**tc[intf])
+
+    def config_host(host):
+        host.configDefault()
+        config_tc(host)
+
+    info('*** Configurazione degli host\n')
+    parallel(config_host, net.hosts, workers)
+    net.built = True
+    timings['links'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
     info('***Avvio controller\n')
-    controller.start()
-    controller_c1.start()
-    
-    info('***Assegnazione controller')
-    s1.start([controller_c1])    
-    r1.start([controller])             
-    r2.start([controller])
-    r3.start([controller])
-    r4.start([controller])
+    for c in controllers.values():
+        c.start()
+
+    info('***Assegnazione controller\n')
+    for name, cfg in list(topo.switches.items()) + list(topo.routers.items()):
+        nodes[name].start([controllers[cfg['controller']]])
+    switches = [nodes[name] for name in switch_names]
+    # un'unica transazione ovs-vsctl per bridge, porte e controller di tutti gli switch
+    OVSSwitch.batchStartup(switches)
+    # OVS sovrascrive la configurazione tc delle porte: la riapplico in parallelo
+    parallel(config_tc, switches, workers)
+    for intf, params in tc.items():
+        # dopo batchStartup, che altrimenti li applicherebbe una seconda volta in sequenza
+        intf.params.update(params)
+    connected = wait_connected(len(switches), connect_timeout) if connect_timeout else None
+    timings['controllers'] = time.perf_counter() - t0
+    if connected is not None and connected < len(switches):
+        info(f'*** Attenzione: {connected}/{len(switches)} switch connessi al controller\n')
 
     info('*** Rete pronta\n')
     info('*** Avvia il controller Ryu con: ryu-manager rest_router.py --ofp-tcp-listen-port 6633 --verbose \n ryu-manager simple_switch_13.py --ofp-tcp-listen-port 6634 --verbose\n')
-    info('*** Poi configura i router tramite REST API\n')
+    info('*** Poi configura i router tramite REST API (python3 ryu_routing.py)\n')
 
     return net
 
 
-def display_network_info():
+def stop_network(net, workers: int = BUILD_WORKERS):
+    """Teardown rapido: bridge OVS rimossi con un solo ovs-vsctl, veth tra switch
+    con un solo `ip -batch`, shell dei nodi terminate in parallelo (i veth degli
+    host spariscono con il loro namespace)."""
+    for c in net.controllers:
+        c.stop()
+    OVSSwitch.batchShutdown(net.switches)
+    root_links = [link.intf1.name for link in net.links
+                  if not link.intf1.node.inNamespace and not link.intf2.node.inNamespace]
+    if root_links:
+        subprocess.run(['ip', '-force', '-batch', '-'], input=''.join(f'link del {i}\n' for i in root_links),
+                       text=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # batchShutdown termina gia' gli switch
+    parallel(lambda host: host.terminate(), net.hosts, workers)
+
+
+def display_network_info(topo: Topology):
     """Mostra informazioni sulla configurazione di rete"""
     info('\n*** CONFIGURAZIONE DI RETE ***\n')
     info('Subnet configurate:\n')
-    info(' 10.1.1.0/24 - H1, H2, H3, S1 (via R1)\n')
-    info(' 10.2.1.0/24 - H4, H5 (via R3)\n')
-    info(' 10.3.1.0/24 - H6 (via R3)\n')
-    info(' 10.4.1.0/24 - H7, H8 (via R2)\n')
-    info(' 10.8.1.0/24 - H9 (via R4)\n')
+    for lan in topo.lans:
+        members = [h.upper() for h in lan.get('hosts', {})] + ([lan['switch'].upper()] if lan.get('switch') else [])
+        info(f" {lan['subnet']} - {', '.join(members)} (via {lan['router'].upper()})\n")
     info('\nSubnet point-to-point:\n')
-    info(' 180.1.2.0/30 - R3-R4\n')
-    info(' 170.0.0.0/30 - R4-R1\n')
-    info(' 100.0.0.0/30 - R1-R2\n')
+    for link in topo.links:
+        info(f" {link['subnet']} - {'-'.join(r.upper() for r in link['routers'])}\n")
+
+
+def build_spec(args) -> dict:
+    if args.generate == 'mesh':
+        return generate_mesh(args.routers, args.extra_links, args.hosts_per_lan, args.l2_switches, args.seed)
+    if args.generate == 'leaf-spine':
+        return generate_leaf_spine(args.spines, args.leaves, args.hosts_per_lan, args.l2_switches, seed=args.seed)
+    return load_spec(args.spec)
+
+
+def report_timings(timings: dict, path: str = None):
+    info('\n*** Tempi di costruzione: ' + ', '.join(f'{k} {v:.2f}s' for k, v in timings.items()) +
+         f' (totale {sum(timings.values()):.2f}s)\n')
+    if path:
+        with open(path, 'w') as f:
+            json.dump({k: round(v, 4) for k, v in timings.items()}, f, indent=2)
 
 
 def main():
     """Funzione principale"""
+    parser = argparse.ArgumentParser(description='Crea la rete Mininet dalla specifica della topologia')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='specifica della topologia (JSON o YAML)')
+    parser.add_argument('--generate', choices=('mesh', 'leaf-spine'), help='genera una topologia invece di leggere --spec')
+    parser.add_argument('--routers', type=int, default=100, help='router della mesh casuale')
+    parser.add_argument('--extra-links', type=int, default=None, help='link oltre all\'albero nella mesh (default: uno per router)')
+    parser.add_argument('--spines', type=int, default=4)
+    parser.add_argument('--leaves', type=int, default=16)
+    parser.add_argument('--hosts-per-lan', type=int, default=1)
+    parser.add_argument('--l2-switches', action='store_true', help='host di ogni LAN dietro uno switch L2 (controller c1)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-spec', help='salva la specifica generata (da passare a ryu_routing.py --spec)')
+    parser.add_argument('--workers', type=int, default=BUILD_WORKERS, help='nodi configurati in parallelo')
+    parser.add_argument('--connect-timeout', type=float, default=CONNECT_TIMEOUT, help='attesa connessione ai controller (0 = non attendere)')
+    parser.add_argument('--no-cli', action='store_true', help='costruisce e smonta la rete senza CLI (misura dei tempi)')
+    parser.add_argument('--timings-json', help='file in cui salvare i tempi per fase')
+    args = parser.parse_args()
     setLogLevel('info')
+    spec = build_spec(args)
+    if args.save_spec:
+        with open(args.save_spec, 'w') as f:
+            json.dump(spec, f, indent=2)
+    topo = Topology(spec)
 
     #Info configurazione
-    display_network_info()
+    if not args.generate:
+        display_network_info(topo)
 
     #Creazione rete
-    net = create_network()
+    timings = {}
+    net = create_network(topo, args.workers, timings, args.connect_timeout)
+    report_timings(timings)
 
     try:
-        # Avvia CLI per test manuali
-        info('\n*** Rete creata. Configura i router tramite REST API prima di testare\n')
-        CLI(net)
+        if not args.no_cli:
+            # Avvia CLI per test manuali
+            info('\n*** Rete creata. Configura i router tramite REST API prima di testare\n')
+            CLI(net)
 
     finally:
         info('*** Fermata della rete\n')
-        net.stop()
+        t0 = time.perf_counter()
+        stop_network(net, args.workers)
+        timings['teardown'] = time.perf_counter() - t0
+        report_timings(timings, args.timings_json)
 
 
 if __name__ == '__main__':
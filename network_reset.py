@@ -0,0 +1,70 @@
+import re
+
+import requests
+
+# Ripristino rapido della rete tra due esperimenti, senza ricreare Mininet:
+#   - processi iperf3 rimasti negli host: cercati con pgrep per nome esatto e
+#     namespace di rete dell'host (--ns/--nslist net), mai con pattern -f sulla
+#     riga di comando, e terminati per PID;
+#   - code dei TCLink: si attende che il backlog di tutte le qdisc (lato host e
+#     lato switch/router, nel namespace radice) torni a zero;
+#   - voci di flusso apprese da ryu_static_router.py (cookie COOKIE_LEARNED),
+#     rimosse via ofctl_rest: le rotte installate alla connessione restano.
+#     Con rest_router (nessuna API per le sole voci apprese degli host, cookie
+#     condivisi con indirizzi e rotte) i router sono riportati "unsupported";
+#   - contatori di porta: OpenFlow non permette di azzerarli, la telemetria
+#     riparte da una nuova base (TelemetryCollector.reset_baseline);
+#   - un ping verso il server iperf3 conferma che la rete e' pronta.
+# Questo modulo contiene la parte indipendente da Flask; l'orchestrazione e' in
+# server_flask.reset_network().
+
+COOKIE_STATIC = 0x5354  # ryu_static_router.COOKIE (il modulo richiede ryu)
+COOKIE_LEARNED = 0x5355  # ryu_static_router.COOKIE_LEARNED
+OFPTT_ALL = 255
+ROOT_NS_PID = 1  # `mnexec -a 1`: namespace radice, dove stanno le porte degli switch OVS
+
+BACKLOG_RE = re.compile(r"backlog (\d+(?:\.\d+)?)([KMG]?)b (\d+)p")
+SIZE_UNIT = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+RTT_RE = re.compile(r"time[=<]([\d.]+) ms")
+
+
+def pgrep_netns_cmd(host_pid: int, name: str = "iperf3") -> list:
+    """pgrep dei processi chiamati esattamente `name` nel namespace di rete di `host_pid`."""
+    return ["pgrep", "-x", name, "--ns", str(host_pid), "--nslist", "net"]
+
+
+def parse_pids(output: str) -> list:
+    return [int(tok) for tok in (output or "").split() if tok.isdigit()]
+
+
+def qdisc_backlog(output: str) -> tuple:
+    """Output di `tc -s qdisc show` -> (byte, pacchetti) in coda, sommati su tutte le qdisc."""
+    nbytes = packets = 0
+    for size, unit, pk in BACKLOG_RE.findall(output or ""):
+        nbytes += int(float(size) * SIZE_UNIT[unit])
+        packets += int(pk)
+    return nbytes, packets
+
+
+def ping_rtt(output: str):
+    """RTT (ms) della prima risposta di `ping`, None se nessuna risposta."""
+    m = RTT_RE.search(output or "")
+    return float(m.group(1)) if m else None
+
+
+def static_router_managed(session: requests.Session, base_url: str, dpid: int, timeout: float = 2.0) -> bool:
+    """True se il datapath ha le voci proattive di ryu_static_router.py (cookie COOKIE_STATIC).
+    False con rest_router, o se il controller non espone ofctl_rest (404)."""
+    r = session.post(f"{base_url}/stats/flow/{dpid}", timeout=timeout, json={
+        "cookie": COOKIE_STATIC, "cookie_mask": 0xFFFFFFFFFFFFFFFF, "table_id": OFPTT_ALL})
+    if r.status_code != 200:
+        return False
+    return bool(r.json().get(str(dpid)))
+
+
+def delete_learned_flows(session: requests.Session, base_url: str, dpid: int, cookie: int = COOKIE_LEARNED,
+                         timeout: float = 2.0) -> bool:
+    """Rimuove da tutte le tabelle del datapath le voci con `cookie` (ofctl_rest)."""
+    r = session.post(f"{base_url}/stats/flowentry/delete", timeout=timeout, json={
+        "dpid": dpid, "cookie": cookie, "cookie_mask": 0xFFFFFFFFFFFFFFFF, "table_id": OFPTT_ALL})
+    return r.status_code == 200
@@ -0,0 +1,167 @@
+import ctypes
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+
+# Esecuzione comandi negli host Mininet tramite un helper persistente per host
+# (ns_helper.py), gia' attaccato ai namespace dell'host: ogni comando evita
+# l'avvio di sudo (PAM/auth) e l'exec di mnexec.
+
+HELPER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ns_helper.py")
+CAP_SYS_ADMIN = 21
+CLONE_FLAGS = {"net": 0x40000000, "mnt": 0x00020000, "uts": 0x04000000, "ipc": 0x08000000}
+
+
+class ExecutorError(Exception):
+    pass
+
+
+def has_cap_sys_admin() -> bool:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("CapEff:"):
+                    return bool(int(line.split()[1], 16) & (1 << CAP_SYS_ADMIN))
+    except OSError:
+        pass
+    return False
+
+
+def _setns_preexec(ns_fds: dict):
+    libc = ctypes.CDLL(None, use_errno=True)
+
+    def enter():
+        # eseguito nel figlio dopo il fork (processo a thread singolo, richiesto per mnt)
+        for ns in ("uts", "ipc", "net", "mnt"):
+            fd = ns_fds.get(ns)
+            if fd is not None and libc.setns(fd, CLONE_FLAGS[ns]) != 0:
+                raise OSError(ctypes.get_errno(), f"setns {ns} fallita")
+        os.setsid()
+    return enter
+
+
+class HostExecutor:
+    """Helper persistente per un singolo host; le richieste concorrenti sono
+    multiplexate sulla stessa pipe e associate alle risposte tramite id."""
+
+    def __init__(self, hostname: str, pid: int, argv: list, preexec_fn=None, pass_fds=()):
+        self.hostname = hostname
+        self.pid = pid
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            preexec_fn=preexec_fn,
+            pass_fds=pass_fds,
+        )
+        self._reader = threading.Thread(target=self._read_loop, name=f"ns_helper_{hostname}", daemon=True)
+        self._reader.start()
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                slot = self._pending.pop(msg.get("id"), None)
+            if slot is not None:
+                slot[1] = msg
+                slot[0].set()
+        # helper terminato: sblocco chi e' ancora in attesa
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for slot in pending.values():
+            slot[0].set()
+
+    def run(self, cmd: list, timeout=None) -> subprocess.CompletedProcess:
+        rid = next(self._ids)
+        slot = [threading.Event(), None]
+        with self._lock:
+            self._pending[rid] = slot
+        try:
+            self.proc.stdin.write(json.dumps({"id": rid, "cmd": cmd, "timeout": timeout}) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(rid, None)
+            raise ExecutorError(f"helper {self.hostname} non disponibile: {e}")
+        if not slot[0].wait(None if timeout is None else timeout + 5):
+            with self._lock:
+                self._pending.pop(rid, None)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        msg = slot[1]
+        if msg is None:
+            raise ExecutorError(f"helper {self.hostname} terminato")
+        if msg.get("timeout"):
+            raise subprocess.TimeoutExpired(cmd, timeout, output=msg.get("stdout"), stderr=msg.get("stderr"))
+        if msg.get("error"):
+            raise ExecutorError(msg["error"])
+        return subprocess.CompletedProcess(cmd, msg["returncode"], msg.get("stdout", ""), msg.get("stderr", ""))
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class NamespaceExecutor:
+    """Pool di HostExecutor, uno per host, creati alla prima richiesta.
+
+    Con CAP_SYS_ADMIN l'helper entra nei namespace via setns usando i fd del
+    HostRegistry; altrimenti e' avviato una sola volta con `mnexec_argv -a <pid>`."""
+
+    def __init__(self, registry, mnexec_argv: list, use_setns=None, python=sys.executable):
+        self.registry = registry
+        self.mnexec_argv = list(mnexec_argv)
+        self.use_setns = has_cap_sys_admin() if use_setns is None else use_setns
+        self.python = python
+        self._lock = threading.Lock()
+        self._executors = {}
+
+    def _spawn(self, hostname: str, pid: int) -> HostExecutor:
+        helper = [self.python, "-u", HELPER]
+        if self.use_setns:
+            fds = self.registry.namespace_fds(hostname)
+            if fds:
+                return HostExecutor(hostname, pid, helper, preexec_fn=_setns_preexec(fds), pass_fds=tuple(fds.values()))
+        return HostExecutor(hostname, pid, self.mnexec_argv + ["-a", str(pid)] + helper)
+
+    def get(self, hostname: str) -> HostExecutor:
+        pid = self.registry.resolve(hostname)
+        if pid is None:
+            raise ExecutorError(f"PID non trovato per {hostname}")
+        with self._lock:
+            ex = self._executors.get(hostname)
+            if ex is not None and (ex.pid != pid or not ex.alive()):
+                ex.close()
+                ex = None
+            if ex is None:
+                ex = self._executors[hostname] = self._spawn(hostname, pid)
+            return ex
+
+    def run(self, hostname: str, cmd: list, timeout=None) -> subprocess.CompletedProcess:
+        return self.get(hostname).run(cmd, timeout)
+
+    def close(self):
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for ex in executors.values():
+            ex.close()
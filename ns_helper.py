@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+import threading
+
+# Helper persistente avviato gia' dentro i namespace di un host Mininet
+# (via setns o mnexec -a <pid>). Legge richieste JSON una per riga da stdin:
+#   {"id": 1, "cmd": ["pgrep", "-f", "iperf3"], "timeout": 2}
+# e risponde su stdout, una riga per richiesta:
+#   {"id": 1, "returncode": 0, "stdout": "...", "stderr": "..."}
+# Le richieste sono eseguite in parallelo: l'ordine delle risposte non e' garantito.
+
+out_lock = threading.Lock()
+
+
+def reply(msg: dict):
+    try:
+        line = json.dumps(msg) + "\n"
+    except (TypeError, ValueError) as e:
+        # ogni id deve ricevere una risposta, altrimenti il client attende il proprio timeout
+        line = json.dumps({"id": msg.get("id"), "returncode": None, "error": f"risposta non serializzabile: {e}",
+                           "stdout": "", "stderr": ""}) + "\n"
+    with out_lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+
+def as_text(value) -> str:
+    # TimeoutExpired riporta l'output parziale in bytes anche con text=True
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+    return value or ""
+
+
+def handle(req: dict):
+    rid = req.get("id")
+    try:
+        cp = subprocess.run(req["cmd"], capture_output=True, text=True, timeout=req.get("timeout"))
+        reply({"id": rid, "returncode": cp.returncode, "stdout": cp.stdout, "stderr": cp.stderr})
+    except subprocess.TimeoutExpired as e:
+        reply({"id": rid, "returncode": None, "timeout": True, "stdout": as_text(e.stdout), "stderr": as_text(e.stderr)})
+    except Exception as e:
+        reply({"id": rid, "returncode": None, "error": str(e), "stdout": "", "stderr": ""})
+
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            req = json.loads(line)
+        except ValueError:
+            continue
+        threading.Thread(target=handle, args=(req,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+
+from telemetry import DeltaRing
+
+# Campionamento delle risorse lato host durante gli esperimenti. Su una macchina
+# carica un throughput basso puo' dipendere dalla contesa di CPU tra i namespace
+# e non dai link emulati: un thread legge a intervallo fisso /proc/stat (CPU
+# totale, core piu' carico, tempo in softirq) e /proc/softirqs (NET_RX/NET_TX),
+# e /proc/<pid>/stat dei processi osservati (client e server iperf3, shell degli
+# host), e salva le differenze in ring buffer a memoria fissa come la telemetria.
+# Ogni risultato riceve il riassunto della propria finestra e i flag di
+# saturazione: sopra `threshold` il risultato e' marcato host_limited, cioe'
+# misura il limite della macchina e non quello della rete.
+# Legge /proc direttamente (nessuna dipendenza da psutil): solo Linux.
+
+SYSTEM_FIELDS = ("ts", "dt", "busy", "max_core", "softirq", "max_softirq", "iowait", "net_rx", "net_tx")
+PROCESS_FIELDS = ("ts", "dt", "cpu")
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def read_cpu_times(path: str = "/proc/stat") -> dict:
+    """{"cpu": (...), "cpu0": (...), ...} con (user, nice, system, idle, iowait, irq, softirq, steal) in tick."""
+    out = {}
+    with open(path) as f:
+        for line in f:
+            if not line.startswith("cpu"):
+                break
+            parts = line.split()
+            out[parts[0]] = tuple(int(v) for v in (parts[1:9] + ["0"] * 8)[:8])
+    return out
+
+
+def read_net_softirqs(path: str = "/proc/softirqs") -> tuple:
+    """(NET_RX, NET_TX) sommati su tutte le CPU."""
+    counts = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, values = line.partition(":")
+                if name.strip() in ("NET_RX", "NET_TX"):
+                    counts[name.strip()] = sum(int(v) for v in values.split())
+    except OSError:
+        pass
+    return counts.get("NET_RX", 0), counts.get("NET_TX", 0)
+
+
+def read_process_ticks(pid: int):
+    """utime + stime del processo in tick, None se non esiste piu'."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # il nome del processo, tra parentesi, puo' contenere spazi
+    fields = raw[raw.rfind(")") + 2:].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def process_names(pid: int) -> set:
+    """Nome del processo e del programma eseguito (anche se script: `python3 /percorso/iperf3`)."""
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            names = {f.read().strip()}
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            argv = f.read().split(b"\0")[:2]
+    except OSError:
+        return set()
+    return names | {os.path.basename(a.decode(errors="replace")) for a in argv if a}
+
+
+def children(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def find_process(pid: int, name: str = None):
+    """`pid` o il primo discendente chiamato `name`: il processo avviato e' `sudo mnexec`,
+    che a sua volta esegue iperf3."""
+    queue = [pid]
+    while queue:
+        p = queue.pop(0)
+        if name is None or name in process_names(p):
+            return p
+        queue.extend(children(p))
+    return None
+
+
+def busy_fraction(cur: tuple, prev: tuple) -> tuple:
+    # (occupata, softirq, iowait) come frazione del tempo trascorso tra due letture
+    delta = [c - p for c, p in zip(cur, prev)]
+    total = sum(delta)
+    if total <= 0:
+        return 0.0, 0.0, 0.0
+    idle = delta[3] + delta[4]
+    return (total - idle) / total, delta[6] / total, delta[4] / total
+
+
+def window_stats(ring: DeltaRing, start: float, end: float, peaks=()) -> dict:
+    """Media di ogni campo dei campioni con ts in (start, end], piu' il massimo dei campi `peaks`."""
+    rows = [row for row in ring.rows() if start < row[0] <= end]
+    out = {"samples": len(rows)}
+    for j, field in enumerate(ring.fields[2:], start=2):
+        values = [row[j] for row in rows]
+        out[field] = round(sum(values) / len(values), 3) if values else None
+        if field in peaks:
+            out[f"{field}_peak"] = round(max(values), 3) if values else None
+    return out
+
+
+class ResourceSampler:
+    """`watch(key, pid, name)` osserva un processo (o il suo discendente `name`) fino a
+    `unwatch(key)`; `summary(start, end, processes)` riassume la finestra."""
+
+    def __init__(self, interval: float = 0.5, ring_size: int = 7200, threshold: float = 0.9, logger=None):
+        self.interval = interval
+        self.ring_size = ring_size
+        self.threshold = threshold
+        self.logger = logger
+        self.samples = 0
+        self.errors = 0
+        self.last_error = None
+        self.system = DeltaRing(SYSTEM_FIELDS, ring_size)
+        self._lock = threading.Lock()
+        self._cpu_last = None      # (ts, read_cpu_times(), read_net_softirqs())
+        self._watched = {}         # key -> [pid avviato, nome, pid risolto, (ts, tick)]
+        self._rings = {}           # key -> DeltaRing(PROCESS_FIELDS)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - t0)))
+
+    def watch(self, key, pid: int, name: str = None):
+        if pid:
+            with self._lock:
+                if self._watched.get(key, [None])[0] != pid:
+                    self._watched[key] = [pid, name, None, None]
+
+    def unwatch(self, key):
+        with self._lock:
+            self._watched.pop(key, None)
+            self._rings.pop(key, None)
+
+    def sample_once(self):
+        ts = time.time()
+        cpus, net = read_cpu_times(), read_net_softirqs()
+        with self._lock:
+            prev = self._cpu_last
+            self._cpu_last = (ts, cpus, net)
+            if prev is not None:
+                dt = ts - prev[0]
+                busy, softirq, iowait = busy_fraction(cpus["cpu"], prev[1]["cpu"])
+                cores = [busy_fraction(v, prev[1][k]) for k, v in cpus.items() if k != "cpu" and k in prev[1]]
+                self.system.append((ts, dt, busy, max((c[0] for c in cores), default=busy),
+                                    softirq, max((c[1] for c in cores), default=softirq), iowait,
+                                    (net[0] - prev[2][0]) / dt, (net[1] - prev[2][1]) / dt))
+            for key, entry in list(self._watched.items()):
+                self._sample_process(key, entry, ts)
+            self.samples += 1
+
+    def _sample_process(self, key, entry, ts):
+        # da chiamare con _lock acquisito; il discendente `name` puo' comparire dopo il watch
+        if entry[2] is None:
+            entry[2] = find_process(entry[0], entry[1])
+            if entry[2] is None:
+                return
+        ticks = read_process_ticks(entry[2])
+        if ticks is None:
+            return  # processo terminato: il ring resta fino a unwatch
+        prev, entry[3] = entry[3], (ts, ticks)
+        if prev is None or ts <= prev[0]:
+            return
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = DeltaRing(PROCESS_FIELDS, self.ring_size)
+        ring.append((ts, ts - prev[0], (ticks - prev[1]) / CLK_TCK / (ts - prev[0])))
+
+    def summary(self, start: float, end: float, processes: dict = None) -> dict:
+        """Risorse nella finestra (start, end]: `processes` = {nome nel riassunto: key}.
+        CPU dei processi in frazione di un core (iperf3 e' a thread singolo)."""
+        with self._lock:
+            out = {"system": window_stats(self.system, start, end, ("busy", "max_core"))}
+            for label, key in (processes or {}).items():
+                ring = self._rings.get(key)
+                out[label] = window_stats(ring, start, end, ("cpu",)) if ring is not None else None
+        out.update(self.check(out))
+        return out
+
+    def check(self, summary: dict) -> dict:
+        """Validita' della misura: flag di saturazione e host_limited."""
+        system = summary.get("system") or {}
+        flags = []
+        if (system.get("busy") or 0) >= self.threshold:
+            flags.append("system_cpu")
+        if (system.get("max_core") or 0) >= self.threshold:
+            flags.append("core_saturated")
+        if (system.get("max_softirq") or 0) >= self.threshold:
+            flags.append("softirq")
+        for label, stats in summary.items():
+            if label != "system" and isinstance(stats, dict) and (stats.get("cpu") or 0) >= self.threshold:
+                flags.append(f"{label}_cpu")
+        return {"threshold": self.threshold, "flags": flags, "host_limited": bool(flags)}
+
+    def status(self) -> dict:
+        with self._lock:
+            watched = len(self._watched)
+        return {
+            "interval": self.interval,
+            "ring_size": self.ring_size,
+            "threshold": self.threshold,
+            "samples": self.samples,
+            "watched": watched,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
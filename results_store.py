@@ -0,0 +1,451 @@
+import bisect
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+
+# Archivio risultati append-only in formato JSON Lines: un record per riga,
+# ogni append costa O(1) indipendentemente dallo storico gia' salvato.
+
+TAIL_BLOCK = 64 * 1024
+
+
+def _valid_line(line: bytes) -> bool:
+    if not line.strip():
+        return True
+    try:
+        json.loads(line)
+        return True
+    except ValueError:
+        return False
+
+
+def _line_start(f, pos: int) -> int:
+    """Posizione del primo byte dopo l'ultimo '\\n' nell'intervallo [0, pos)."""
+    while pos > 0:
+        start = max(0, pos - TAIL_BLOCK)
+        f.seek(start)
+        nl = f.read(pos - start).rfind(b"\n")
+        if nl != -1:
+            return start + nl + 1
+        pos = start
+    return 0
+
+
+def recover(path: str) -> int:
+    """Tronca una eventuale coda incompleta o corrotta (crash durante un append).
+
+    Ritorna la dimensione valida del file dopo il ripristino."""
+    if not os.path.exists(path):
+        return 0
+    size = os.path.getsize(path)
+    good_end = size
+    with open(path, "rb") as f:
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                # riga finale senza terminatore: scrittura interrotta
+                good_end = _line_start(f, size)
+        while good_end > 0:
+            start = _line_start(f, good_end - 1)
+            f.seek(start)
+            if _valid_line(f.read(good_end - start)):
+                break
+            # riga completa ma illeggibile (es. blocco azzerato dopo un crash): la scarto
+            good_end = start
+    if good_end != size:
+        with open(path, "rb+") as f:
+            f.truncate(good_end)
+            f.flush()
+            os.fsync(f.fileno())
+    return good_end
+
+
+def parse_time(value):
+    """Accetta timestamp epoch (numero o stringa numerica) o ISO 8601; None se assente."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+INDEX_FIELDS = ("experiment_id", "hostname", "protocol", "sweep_id")
+
+
+class ResultIndex:
+    """Indice su disco (sidecar `<risultati>.idx`, JSONL) dei record del ResultsStore.
+
+    Ogni riga contiene [offset, lunghezza, <valori di INDEX_FIELDS>, start_ts].
+    In memoria i campi sono tenuti in array compatti con posting list per chiave,
+    cosi' le query non leggono ne' parsano il file dei risultati."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._reset()
+
+    def _reset(self):
+        self.offsets = array("q")
+        self.lengths = array("l")
+        self.start_ts = array("d")
+        self.codes = {f: array("l") for f in INDEX_FIELDS}
+        self._values = {f: {} for f in INDEX_FIELDS}
+        self.postings = {f: {} for f in INDEX_FIELDS}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def end(self) -> int:
+        return self.offsets[-1] + self.lengths[-1] if self.offsets else 0
+
+    def _add(self, offset, length, values, ts):
+        seq = len(self.offsets)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.start_ts.append(ts)
+        for field, value in zip(INDEX_FIELDS, values):
+            table = self._values[field]
+            code = table.get(value)
+            if code is None:
+                code = table[value] = len(table)
+                self.postings[field][code] = array("l")
+            self.codes[field].append(code)
+            self.postings[field][code].append(seq)
+        return seq
+
+    def add(self, offset: int, length: int, record: dict):
+        values = [record.get(f) for f in INDEX_FIELDS]
+        try:
+            ts = parse_time(record.get("start_time"))
+        except (TypeError, ValueError):
+            ts = None
+        ts = float("nan") if ts is None else ts
+        self._add(offset, length, values, ts)
+        if self._fd is None:
+            return  # sola lettura: indice solo in memoria
+        entry = [offset, length] + values + [None if ts != ts else ts]
+        os.write(self._fd, (json.dumps(entry, separators=(",", ":")) + "\n").encode())
+
+    def open(self, data_path: str, data_size: int, readonly: bool = False):
+        """Carica il sidecar e lo riallinea al file dati (ricostruzione incrementale).
+        In sola lettura il sidecar non viene modificato e l'indice resta in memoria."""
+        if not readonly:
+            recover(self.path)
+        stale = False
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        off, length, *values, ts = json.loads(line)
+                    except ValueError:
+                        continue
+                    if len(values) != len(INDEX_FIELDS):
+                        # indice scritto con un altro insieme di campi
+                        stale = True
+                        break
+                    self._add(off, length, values, float("nan") if ts is None else ts)
+        if stale or self.end > data_size:
+            # campi cambiati o file dati troncato (ripristino dopo crash): ricostruisco da zero
+            self._reset()
+            if not readonly:
+                os.unlink(self.path)
+        if not readonly:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if self.end < data_size:
+            with open(data_path, "rb") as f:
+                f.seek(self.end)
+                pos = self.end
+                for line in f:
+                    if pos + len(line) > data_size:
+                        break
+                    if line.strip():
+                        try:
+                            self.add(pos, len(line), json.loads(line))
+                        except ValueError:
+                            pass
+                    pos += len(line)
+
+    def sync(self):
+        if self._fd is not None:
+            os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def query(self, filters: dict, since=None, until=None, cursor: int = -1, limit=None):
+        """Ritorna (sequenze dei record selezionati, cursore successivo o None).
+
+        `filters` mappa campi di INDEX_FIELDS a valori; `cursor` e' l'ultima
+        sequenza gia' restituita (paginazione per cursore)."""
+        n = len(self.offsets)
+        wanted = {}
+        candidates = None
+        for field, value in filters.items():
+            code = self._values[field].get(value)
+            if code is None:
+                return [], None
+            wanted[field] = code
+            plist = self.postings[field][code]
+            if candidates is None or len(plist) < len(candidates):
+                candidates = plist
+        if candidates is None:
+            candidates = range(n)
+            start = max(cursor + 1, 0)  # un indice negativo ripartirebbe dalla fine
+        else:
+            start = bisect.bisect_right(candidates, cursor)
+        page = []
+        for i in range(start, len(candidates)):
+            seq = candidates[i]
+            if seq >= n:
+                break
+            if any(self.codes[f][seq] != code for f, code in wanted.items()):
+                continue
+            ts = self.start_ts[seq]
+            if since is not None and not ts >= since:
+                continue
+            if until is not None and not ts <= until:
+                continue
+            if limit is not None and len(page) >= limit:
+                return page, page[-1] if page else None
+            page.append(seq)
+        return page, None
+
+
+def count_records(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    n = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            n += chunk.count(b"\n")
+    return n
+
+
+class ResultsStore:
+    """Archivio JSONL con fsync a lotti: sincronizza ogni `fsync_every` record
+    oppure al massimo dopo `fsync_interval` secondi dal primo record non sincronizzato.
+    `lock` sostituisce il lock interno (es. per misurarne la contesa); `on_write`
+    riceve la durata in secondi di ogni append con il lock acquisito, `on_append`
+    ogni record scritto, nello stesso ordine del file (es. aggregati incrementali).
+
+    Con `readonly` (processi API accanto al runner, wsgi.py) il file non viene mai
+    scritto ne' ripristinato: ogni query indicizza prima le righe complete aggiunte
+    nel frattempo dal processo che scrive."""
+
+    def __init__(self, path: str, fsync_every: int = 16, fsync_interval: float = 1.0,
+                 lock=None, on_write=None, readonly: bool = False, on_append=None):
+        self.path = path
+        self.readonly = readonly
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.on_write = on_write
+        self.on_append = on_append
+        self._lock = lock if lock is not None else threading.Lock()
+        self._fd = None
+        self._size = 0
+        self._pending = 0
+        self._timer = None
+        self._read_fd = None
+        self.count = 0
+        self.index = ResultIndex(path + ".idx")
+
+    def open(self):
+        with self._lock:
+            self._open_locked()
+        return self
+
+    def _open_locked(self):
+        if self.readonly:
+            self._refresh_locked()
+            return
+        if self._fd is not None:
+            return
+        self._size = recover(self.path)
+        self.count = count_records(self.path)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._read_fd = os.open(self.path, os.O_RDONLY)
+        self.index.open(self.path, self._size)
+
+    def _refresh_locked(self):
+        if self._read_fd is not None:
+            st = os.stat(self.path)
+            if st.st_ino != os.fstat(self._read_fd).st_ino or st.st_size < self._size:
+                # file sostituito (migrazione) o troncato dal ripristino del processo che scrive
+                os.close(self._read_fd)
+                self._read_fd = None
+                self.index = ResultIndex(self.index.path)
+        if self._read_fd is None:
+            self._read_fd = os.open(self.path, os.O_RDONLY | os.O_CREAT, 0o644)
+            with open(self.path, "rb") as f:
+                # solo righe complete: l'ultima puo' essere in scrittura
+                self._size = _line_start(f, os.fstat(self._read_fd).st_size)
+            self.index.open(self.path, self._size, readonly=True)
+            self.count = len(self.index)
+            return
+        size = os.fstat(self._read_fd).st_size
+        if size <= self._size:
+            return
+        data = os.pread(self._read_fd, size - self._size, self._size)
+        data = data[:data.rfind(b"\n") + 1]
+        pos = self._size
+        for line in data.splitlines(keepends=True):
+            if line.strip():
+                try:
+                    self.index.add(pos, len(line), json.loads(line))
+                    self.count += 1
+                except ValueError:
+                    pass
+            pos += len(line)
+        self._size = pos
+
+    def append(self, record: dict) -> int:
+        """Aggiunge un record e ritorna l'offset della riga scritta."""
+        if self.readonly:
+            raise OSError(f"{self.path} aperto in sola lettura")
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            t0 = time.perf_counter()
+            self._open_locked()
+            offset = self._size
+            view = memoryview(line)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            self._size += len(line)
+            self.count += 1
+            self.index.add(offset, len(line), record)
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self._sync_locked()
+            elif self._timer is None and self.fsync_interval > 0:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+            if self.on_write is not None:
+                self.on_write(time.perf_counter() - t0)
+            if self.on_append is not None:
+                self.on_append(record)
+        return offset
+
+    def _sync_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._fd is not None and self._pending:
+            os.fsync(self._fd)
+            self.index.sync()
+        self._pending = 0
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        with self._lock:
+            self._sync_locked()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if self._read_fd is not None:
+                os.close(self._read_fd)
+                self._read_fd = None
+            self.index.close()
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._size
+
+    def query(self, filters=None, since=None, until=None, cursor: int = -1, limit=None):
+        with self._lock:
+            self._open_locked()
+            return self.index.query(filters or {}, parse_time(since), parse_time(until), cursor, limit)
+
+    def etag(self, query_key: str, page: list, next_cursor) -> str:
+        """ETag calcolato solo dall'indice: l'archivio e' append-only, quindi le
+        sequenze selezionate identificano univocamente il contenuto della risposta."""
+        ident = os.fstat(self._read_fd).st_ino if self._read_fd is not None else 0
+        raw = f"{ident}|{query_key}|{len(page)}|{page[:1]}|{page[-1:]}|{next_cursor}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def read_raw(self, seq: int) -> bytes:
+        """Riga JSON del record `seq` cosi' come salvata (senza newline finale)."""
+        return os.pread(self._read_fd, self.index.lengths[seq], self.index.offsets[seq]).rstrip(b"\n")
+
+    def stream_json_array(self, seqs, chunk_size: int = 64 * 1024):
+        """Generatore di chunk di un array JSON con i record `seqs`, letti con pread
+        direttamente dal file senza parse/serializzazione."""
+        buf = bytearray(b"[")
+        for i, seq in enumerate(seqs):
+            if i:
+                buf += b","
+            buf += self.read_raw(seq)
+            if len(buf) >= chunk_size:
+                yield bytes(buf)
+                buf.clear()
+        buf += b"]"
+        yield bytes(buf)
+
+    def iter_records(self):
+        """Scorre i record salvati fino alla dimensione confermata al momento della chiamata."""
+        limit = self.size if self._fd is not None else (os.path.getsize(self.path) if os.path.exists(self.path) else 0)
+        if limit == 0:
+            return
+        with open(self.path, "rb") as f:
+            pos = 0
+            for line in f:
+                pos += len(line)
+                if pos > limit:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def migrate_legacy(legacy_path: str, store_path: str) -> int:
+    """Converte una sola volta il vecchio file JSON (array indentato) in JSONL.
+
+    Il file originale viene rinominato in `<nome>.migrated`. Ritorna i record migrati."""
+    if not os.path.exists(legacy_path):
+        return 0
+    if os.path.exists(store_path) and os.path.getsize(store_path) > 0:
+        return 0
+    try:
+        with open(legacy_path, "r") as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        data = []
+    if not isinstance(data, list):
+        data = [data]
+    tmp = store_path + ".tmp"
+    with open(tmp, "w") as f:
+        for rec in data:
+            f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, store_path)
+    os.replace(legacy_path, legacy_path + ".migrated")
+    return len(data)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "migrate":
+        print("Uso: python3 results_store.py migrate <legacy.json> <results.jsonl>")
+        sys.exit(1)
+    t0 = time.time()
+    n = migrate_legacy(sys.argv[2], sys.argv[3])
+    print(f"Migrati {n} record in {time.time() - t0:.2f}s")
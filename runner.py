@@ -0,0 +1,48 @@
+import argparse
+import logging
+import os
+import signal
+
+from werkzeug.serving import make_server
+
+import metrics
+import server_flask
+
+# Runner della modalita' di produzione: l'unico processo che possiede esperimenti,
+# sweep, server iperf3 e telemetria (lo stato resta nei dizionari di server_flask).
+# Espone la stessa app Flask solo su un socket Unix locale; i worker gunicorn di
+# wsgi.py servono da se' le letture su disco (/results, /results/summary) e gli
+# inoltrano tutto il resto. Riavviare o scalare i worker non tocca gli esperimenti.
+#
+#   python3 runner.py [--socket /tmp/experiment_runner.sock]
+#   gunicorn -k gthread -w 4 --threads 16 -b 0.0.0.0:5000 wsgi:app
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--socket", default=server_flask.RUNNER_SOCKET)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    server_flask.startup()
+    # /metrics del runner include le metriche dei worker di wsgi.py
+    metrics.aggregate_workers()
+    # un thread per richiesta: long-poll e stream SSE restano aperti a lungo
+    server = make_server(f"unix://{args.socket}", 0, server_flask.app, threaded=True)
+    os.chmod(args.socket, 0o660)
+
+    def shutdown(sig, frame):
+        server_flask.app.logger.info("Runner: arresto richiesto")
+        try:
+            server_flask.signal_handler(sig, frame)
+        finally:
+            if os.path.exists(args.socket):
+                os.unlink(args.socket)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    server_flask.app.logger.info(f"Runner in ascolto su unix://{args.socket}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,172 @@
-import requests
+import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from topology_spec import Topology, load_spec, compile_routes, DEFAULT_SPEC, DEFAULT_ROUTE, WEIGHTS, AGGREGATE_MODES
+
+BASE = "http://127.0.0.1:8080"
+MAX_WORKERS = 8  # chiamate REST in parallelo
+READY_TIMEOUT = 10.0  # attesa massima (s) perche' gli indirizzi compaiano su GET /router/<dpid>
+POLL_INTERVAL = 0.05
+
+# La configurazione desiderata (indirizzi e rotte per router) e' ricavata dalla
+# specifica della topologia con topology_spec.compile_routes(). Il provisioning
+# la confronta con lo stato attuale del controller e invia solo le differenze,
+# quindi puo' essere rieseguito.
+
+
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    # connessioni keep-alive riusate da tutti i worker
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
 
-BASE = "http://127.0.0.1:8080" 
+session = make_session()
 
 def dpid_of(name: str) -> str:
     assert name[0] in ("r", "s"), "Atteso prefisso r/s"
     num = int(name[1:])
     return f"{num:016x}"
 
+def router_path(router, vlan=None):
+    return f"/router/{dpid_of(router)}" + (f"/{vlan}" if vlan is not None else "")
+
 def post(url, data):
-    r = requests.post(url, json=data, timeout=5)
+    r = session.post(url, json=data, timeout=5)
+    r.raise_for_status()
+    return r.json()
+
+def delete(url, data):
+    r = session.delete(url, json=data, timeout=5)
     r.raise_for_status()
     return r.json()
 
 def add_addr(router, cidr, vlan=None):
-    path = f"/router/{dpid_of(router)}" + (f"/{vlan}" if vlan is not None else "")
     print(f"[{router}] + address {cidr}")
-    return post(BASE + path, {"address": cidr})
+    return post(BASE + router_path(router, vlan), {"address": cidr})
 
 def add_route(router, dest, gw, vlan=None):
-    path = f"/router/{dpid_of(router)}" + (f"/{vlan}" if vlan is not None else "")
     payload = {"destination": dest, "gateway": gw}
     print(f"[{router}] + route {dest} via {gw}")
-    return post(BASE + path, payload)
+    return post(BASE + router_path(router, vlan), payload)
 
 def add_default(router, gw, vlan=None):
-    path = f"/router/{dpid_of(router)}" + (f"/{vlan}" if vlan is not None else "")
     print(f"[{router}] + default via {gw}")
-    return post(BASE + path, {"gateway": gw})
+    return post(BASE + router_path(router, vlan), {"gateway": gw})
+
+def del_addr(router, address_id, cidr, vlan=None):
+    print(f"[{router}] - address {cidr}")
+    return delete(BASE + router_path(router, vlan), {"address_id": address_id})
+
+def del_route(router, route_id, dest, vlan=None):
+    print(f"[{router}] - route {dest}")
+    return delete(BASE + router_path(router, vlan), {"route_id": route_id})
+
+def router_state(router, vlan=None):
+    """Stato attuale da rest_router: ({cidr: address_id}, {destinazione: (gateway, route_id)})."""
+    r = session.get(BASE + router_path(router, vlan), timeout=5)
+    r.raise_for_status()
+    addresses, routes = {}, {}
+    for sw in r.json():
+        for net in sw.get("internal_network", []):
+            if vlan is not None and net.get("vlan_id") != vlan:
+                continue
+            for a in net.get("address", []):
+                addresses[a["address"]] = a["address_id"]
+            for rt in net.get("route", []):
+                routes[rt["destination"]] = (rt["gateway"], rt["route_id"])
+    return addresses, routes
+
+def wait_for_addresses(router, cidrs, vlan=None, timeout=READY_TIMEOUT):
+    """Attende che tutti gli indirizzi risultino installati (sostituisce la pausa fissa)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        addresses, _ = router_state(router, vlan)
+        missing = set(cidrs) - set(addresses)
+        if not missing:
+            return addresses
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"[{router}] indirizzi non installati: {', '.join(sorted(missing))}")
+        time.sleep(POLL_INTERVAL)
+
+def replace_route(router, dest, gw, old_route_id=None, vlan=None):
+    if old_route_id is not None:
+        del_route(router, old_route_id, dest, vlan)
+    if dest == DEFAULT_ROUTE:
+        return add_default(router, gw, vlan)
+    return add_route(router, dest, gw, vlan)
+
+def plan_router(router, addresses, routes, default_gw=None, prune=False, vlan=None):
+    """Differenze tra configurazione desiderata e stato attuale del router:
+    ritorna (operazioni sugli indirizzi, operazioni sulle rotte), ciascuna
+    una tupla (funzione, argomenti) indipendente dalle altre della stessa fase."""
+    current_addrs, current_routes = router_state(router, vlan)
+    addr_ops = [(add_addr, (router, cidr, vlan)) for cidr in addresses if cidr not in current_addrs]
+    if prune:
+        addr_ops += [(del_addr, (router, address_id, cidr, vlan))
+                     for cidr, address_id in current_addrs.items() if cidr not in addresses]
+    desired = dict(routes)
+    if default_gw is not None:
+        desired[DEFAULT_ROUTE] = default_gw
+    route_ops = []
+    for dest, gw in desired.items():
+        current = current_routes.get(dest)
+        if current is None or current[0] != gw:
+            route_ops.append((replace_route, (router, dest, gw, current[1] if current else None, vlan)))
+    if prune:
+        route_ops += [(del_route, (router, route_id, dest, vlan))
+                      for dest, (_, route_id) in current_routes.items() if dest not in desired]
+    return addr_ops, route_ops
+
+def provision(addresses, routes, defaults=None, prune=False, workers=MAX_WORKERS):
+    """Porta tutti i router alla configurazione desiderata con al massimo `workers`
+    chiamate REST in parallelo; ritorna il numero di modifiche per router."""
+    defaults = defaults or {}
+    routers = sorted(set(addresses) | set(routes))
+
+    def run(op):
+        fn, fn_args = op
+        return fn(*fn_args)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        plans = dict(zip(routers, pool.map(
+            lambda r: plan_router(r, addresses.get(r, []), routes.get(r, []), defaults.get(r), prune), routers)))
+        list(pool.map(run, [op for r in routers for op in plans[r][0]]))
+        # le rotte richiedono che il gateway sia in una subnet gia' configurata
+        changed = [r for r in routers if plans[r][0]]
+        list(pool.map(lambda r: wait_for_addresses(r, addresses.get(r, [])), changed))
+        list(pool.map(run, [op for r in routers for op in plans[r][1]]))
+    return {r: len(plans[r][0]) + len(plans[r][1]) for r in routers}
 
 def main():
-    
-    add_addr("r1", "10.1.1.1/24")
-    add_addr("r1", "100.0.0.1/30")
-    add_addr("r1", "170.0.0.1/30")
-
-    add_addr("r2", "10.4.1.1/24")
-    add_addr("r2", "100.0.0.2/30")
-
-    add_addr("r3", "10.2.1.1/24")
-    add_addr("r3", "10.3.1.1/24")
-    add_addr("r3", "180.1.2.1/30")
-
-    add_addr("r4", "10.8.1.1/24")
-    add_addr("r4", "170.0.0.2/30")
-    add_addr("r4", "180.1.2.2/30")
-
-    #Piccola pausa per far aggiornare le tabelle interne
-    time.sleep(0.5)
-
-    #R1: raggiunge le LAN dietro R2 e R3/R4
-    add_route("r1", "10.4.1.0/24", "100.0.0.2")     
-    add_route("r1", "10.8.1.0/24", "170.0.0.2")    
-    add_route("r1", "10.2.1.0/24", "170.0.0.2")    
-    add_route("r1", "10.3.1.0/24", "170.0.0.2")    
-
-    # R2: raggiunge il resto passando da R1
-    add_route("r2", "10.1.1.0/24", "100.0.0.1")
-    add_route("r2", "10.8.1.0/24", "100.0.0.1")    
-    add_route("r2", "10.2.1.0/24", "100.0.0.1")    
-    add_route("r2", "10.3.1.0/24", "100.0.0.1")
-
-    # R3: tutto tramite R4
-    add_route("r3", "10.1.1.0/24", "180.1.2.2")    
-    add_route("r3", "10.4.1.0/24", "180.1.2.2")   
-    add_route("r3", "10.8.1.0/24", "180.1.2.2")    
-
-    # R4: instrada verso R1 e R3
-    add_route("r4", "10.1.1.0/24", "170.0.0.1")   
-    add_route("r4", "10.4.1.0/24", "170.0.0.1")   
-    add_route("r4", "10.2.1.0/24", "180.1.2.1")   
-    add_route("r4", "10.3.1.0/24", "180.1.2.1")   
+    global BASE
+    parser = argparse.ArgumentParser(description="Configura indirizzi e rotte dei router tramite rest_router")
+    parser.add_argument("--spec", default=DEFAULT_SPEC, help="specifica della topologia (JSON o YAML)")
+    parser.add_argument("--weight", choices=WEIGHTS, default="delay", help="metrica dei cammini minimi")
+    parser.add_argument("--aggregate", choices=AGGREGATE_MODES, default="exact", help="aggregazione delle rotte")
+    parser.add_argument("--base", default=BASE, help="URL delle REST API di Ryu")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="chiamate REST in parallelo")
+    parser.add_argument("--prune", action="store_true", help="rimuove indirizzi e rotte non presenti nella configurazione")
+    args = parser.parse_args()
+    BASE = args.base.rstrip("/")
+
+    topo = Topology(load_spec(args.spec))
+    addresses = topo.router_addresses()
+    routes = compile_routes(topo, args.weight, args.aggregate)
+    print(f"{sum(map(len, routes.values()))} rotte compilate per {len(routes)} router ({args.weight}, {args.aggregate})")
+
+    t0 = time.monotonic()
+    changes = provision(addresses, routes, prune=args.prune, workers=args.workers)
+    print(f"\n{sum(changes.values())} modifiche in {time.monotonic() - t0:.2f}s "
+          f"({', '.join(f'{r}: {n}' for r, n in changes.items())})")
 
     print("\nConfigurazione completata. Verifica con:")
-    for r in ("r1", "r2", "r3", "r4"):
+    for r in sorted(changes):
         print(f"  curl {BASE}/router/{dpid_of(r)}")
 
 if __name__ == "__main__":
@@ -0,0 +1,241 @@
+import ipaddress
+import os
+
+from ryu.base import app_manager
+from ryu.controller import ofp_event
+from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, set_ev_cls
+from ryu.lib.packet import arp, ethernet, icmp, ipv4, packet
+from ryu.ofproto import ether, inet, ofproto_v1_3
+
+from topology_spec import Topology, load_spec, compile_multipath_routes, router_mac, DEFAULT_SPEC
+
+# Applicazione Ryu per i router r1..rN, alternativa a ryu.app.rest_router + ryu_routing.py:
+#   ryu-manager --ofp-tcp-listen-port 6633 ryu_static_router.py ryu.app.ofctl_rest
+# Indirizzi e rotte sono gli stessi che ryu_routing.py invia a rest_router (stessa
+# specifica, stessi pesi e aggregazione), ma sono installati tutti alla connessione
+# dello switch, senza attendere packet-in:
+#   - ARP: le richieste per gli indirizzi del router ricevono risposta dallo switch
+#     stesso (azioni NXActionRegMove di OVS), con MAC virtuali topology_spec.router_mac;
+#   - host delle LAN connesse: una voce /32 con il MAC noto (topology_spec.host_macs);
+#   - rotte: una voce per prefisso (priorita' crescente con la lunghezza, come
+#     rest_router) che decrementa il TTL e riscrive i MAC verso il next hop; con
+#     piu' next hop a pari costo un gruppo SELECT con pesi proporzionali alla banda
+#     del primo link (ECMP pesato; OVS sceglie il bucket con un hash del flusso).
+# Il controller riceve solo i pacchetti per gli indirizzi del router (ping) e quelli
+# per host delle LAN connesse non presenti nella specifica (risolti con ARP).
+#
+# Variabili d'ambiente: TOPOLOGY_SPEC, ROUTING_WEIGHT (delay|bw|hops),
+# ROUTING_AGGREGATE (none|exact|summary), ROUTING_ECMP ("0" = un solo next hop).
+
+TOPOLOGY_SPEC = os.environ.get("TOPOLOGY_SPEC", DEFAULT_SPEC)
+ROUTING_WEIGHT = os.environ.get("ROUTING_WEIGHT", "delay")
+ROUTING_AGGREGATE = os.environ.get("ROUTING_AGGREGATE", "exact")
+ROUTING_ECMP = os.environ.get("ROUTING_ECMP", "1") != "0"
+
+COOKIE = 0x5354  # voci installate alla connessione
+COOKIE_LEARNED = 0x5355  # voci /32 apprese via ARP (rimovibili senza toccare le rotte)
+LEARNED_IDLE_TIMEOUT = 1800
+
+PRIORITY_ARP = 1000
+PRIORITY_LOCAL = 900  # indirizzi del router e risposte ARP -> controller
+PRIORITY_HOST = 300
+PRIORITY_CONNECTED = 200  # + lunghezza del prefisso
+PRIORITY_ROUTE = 100  # + lunghezza del prefisso
+
+
+def dpid_of(name: str) -> int:
+    # come ryu_routing.dpid_of: Mininet ricava il dpid dalle cifre del nome
+    return int(name[1:])
+
+
+class RouterConfig:
+    """Configurazione di un router ricavata dalla specifica."""
+
+    def __init__(self, name: str, topo: Topology, port_map: dict, routes: list, host_macs: dict):
+        self.name = name
+        self.interfaces = {}  # porta -> (ip, rete, mac)
+        gateways = {}  # ip del next hop -> (porta, mac)
+        for (node, port), info in port_map.items():
+            if node != name or "address" not in info:
+                continue
+            self.interfaces[port] = (info["address"], ipaddress.ip_network(info["network"]), router_mac(name, port))
+            if info["peer"] in topo.routers:
+                peer = port_map[(info["peer"], info["peer_port"])]
+                gateways[peer["address"]] = (port, router_mac(info["peer"], info["peer_port"]))
+        # host delle LAN connesse: porta verso l'host o verso lo switch L2 della LAN
+        self.hosts = {}  # ip -> (porta, mac)
+        for lan in topo.lans:
+            if lan["router"] != name:
+                continue
+            for host, h in lan.get("hosts", {}).items():
+                attach = lan.get("switch") or host
+                port = next(p for (node, p), info in port_map.items() if node == name and info["peer"] == attach)
+                self.hosts[h["ip"]] = (port, host_macs[host])
+        self.routes = []  # (rete, [(porta, mac, peso)])
+        for dest, gws in routes:
+            hops = [gateways[gw] + (weight,) for gw, weight in gws if gw in gateways]
+            if hops:
+                self.routes.append((ipaddress.ip_network(dest), hops))
+
+    def local_ips(self) -> set:
+        return {ip for ip, _, _ in self.interfaces.values()}
+
+
+class StaticRouter(app_manager.RyuApp):
+    OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        topo = Topology(load_spec(TOPOLOGY_SPEC))
+        routes = compile_multipath_routes(topo, ROUTING_WEIGHT, ROUTING_AGGREGATE)
+        if not ROUTING_ECMP:
+            routes = {r: [(dest, gws[:1]) for dest, gws in table] for r, table in routes.items()}
+        port_map = topo.port_map()
+        host_macs = topo.host_macs()
+        self.routers = {dpid_of(r): RouterConfig(r, topo, port_map, routes[r], host_macs) for r in topo.routers}
+        self.learned = {dpid: {} for dpid in self.routers}  # ip -> (porta, mac) appresi via ARP
+        self.logger.info(f"Specifica {TOPOLOGY_SPEC}: {len(self.routers)} router, "
+                         f"{sum(len(c.routes) for c in self.routers.values())} rotte ({ROUTING_WEIGHT}, "
+                         f"{ROUTING_AGGREGATE}, ECMP {'attivo' if ROUTING_ECMP else 'disattivo'})")
+
+    # --- installazione proattiva ---
+
+    @staticmethod
+    def add_flow(dp, priority, match, actions, cookie=COOKIE, idle_timeout=0):
+        parser = dp.ofproto_parser
+        inst = [parser.OFPInstructionActions(dp.ofproto.OFPIT_APPLY_ACTIONS, actions)]
+        dp.send_msg(parser.OFPFlowMod(dp, cookie=cookie, priority=priority, match=match,
+                                      instructions=inst, idle_timeout=idle_timeout))
+
+    @staticmethod
+    def forward_actions(dp, out_port, src_mac, dst_mac):
+        parser = dp.ofproto_parser
+        return [parser.OFPActionDecNwTtl(),
+                parser.OFPActionSetField(eth_src=src_mac),
+                parser.OFPActionSetField(eth_dst=dst_mac),
+                parser.OFPActionOutput(out_port)]
+
+    def arp_responder(self, dp, port, ip, mac):
+        # la richiesta diventa la risposta: scambio dei campi e uscita dalla porta d'ingresso
+        ofp, parser = dp.ofproto, dp.ofproto_parser
+        match = parser.OFPMatch(in_port=port, eth_type=ether.ETH_TYPE_ARP, arp_op=arp.ARP_REQUEST, arp_tpa=ip)
+        actions = [parser.NXActionRegMove(src_field="eth_src", dst_field="eth_dst", n_bits=48),
+                   parser.OFPActionSetField(eth_src=mac),
+                   parser.OFPActionSetField(arp_op=arp.ARP_REPLY),
+                   parser.NXActionRegMove(src_field="arp_sha", dst_field="arp_tha", n_bits=48),
+                   parser.NXActionRegMove(src_field="arp_spa", dst_field="arp_tpa", n_bits=32),
+                   parser.OFPActionSetField(arp_sha=mac),
+                   parser.OFPActionSetField(arp_spa=ip),
+                   parser.OFPActionOutput(ofp.OFPP_IN_PORT)]
+        self.add_flow(dp, PRIORITY_ARP, match, actions)
+
+    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
+    def switch_features_handler(self, ev):
+        dp = ev.msg.datapath
+        cfg = self.routers.get(dp.id)
+        if cfg is None:
+            self.logger.warning(f"Datapath {dp.id:016x} non presente nella specifica: ignorato")
+            return
+        ofp, parser = dp.ofproto, dp.ofproto_parser
+        # riconnessione: OVS conserva voci e gruppi, si riparte da zero
+        dp.send_msg(parser.OFPFlowMod(dp, cookie=COOKIE, cookie_mask=0xffffffffffffffff, table_id=ofp.OFPTT_ALL,
+                                      command=ofp.OFPFC_DELETE, out_port=ofp.OFPP_ANY, out_group=ofp.OFPG_ANY))
+        dp.send_msg(parser.OFPGroupMod(dp, command=ofp.OFPGC_DELETE, group_id=ofp.OFPG_ALL))
+        self.learned[dp.id].clear()
+        flows = groups = 0
+        to_controller = [parser.OFPActionOutput(ofp.OFPP_CONTROLLER, ofp.OFPCML_NO_BUFFER)]
+
+        for port, (ip, net, mac) in cfg.interfaces.items():
+            self.arp_responder(dp, port, ip, mac)
+            self.add_flow(dp, PRIORITY_LOCAL, parser.OFPMatch(eth_type=ether.ETH_TYPE_IP, ipv4_dst=ip), to_controller)
+            # host della stessa subnet su altre porte del router: proxy ARP
+            for host_ip, (host_port, _) in cfg.hosts.items():
+                if host_port != port and ipaddress.ip_address(host_ip) in net:
+                    self.arp_responder(dp, port, host_ip, mac)
+                    flows += 1
+            flows += 2
+        self.add_flow(dp, PRIORITY_LOCAL, parser.OFPMatch(eth_type=ether.ETH_TYPE_ARP, arp_op=arp.ARP_REPLY), to_controller)
+        for net in {net for _, net, _ in cfg.interfaces.values()}:
+            match = parser.OFPMatch(eth_type=ether.ETH_TYPE_IP, ipv4_dst=(str(net.network_address), str(net.netmask)))
+            self.add_flow(dp, PRIORITY_CONNECTED + net.prefixlen, match, to_controller)
+            flows += 1
+        for host_ip, (port, host_mac) in cfg.hosts.items():
+            self.add_flow(dp, PRIORITY_HOST, parser.OFPMatch(eth_type=ether.ETH_TYPE_IP, ipv4_dst=host_ip),
+                          self.forward_actions(dp, port, cfg.interfaces[port][2], host_mac))
+            flows += 1
+
+        group_ids = {}  # next hop -> id del gruppo, condiviso tra le rotte
+        for net, hops in cfg.routes:
+            if len(hops) == 1:
+                port, gw_mac, _ = hops[0]
+                actions = self.forward_actions(dp, port, cfg.interfaces[port][2], gw_mac)
+            else:
+                key = tuple(hops)
+                if key not in group_ids:
+                    group_ids[key] = len(group_ids) + 1
+                    # watch_port: il bucket e' escluso quando la porta e' giu'
+                    buckets = [parser.OFPBucket(weight=weight, watch_port=port, watch_group=ofp.OFPG_ANY,
+                                                actions=self.forward_actions(dp, port, cfg.interfaces[port][2], gw_mac))
+                               for port, gw_mac, weight in hops]
+                    dp.send_msg(parser.OFPGroupMod(dp, ofp.OFPGC_ADD, ofp.OFPGT_SELECT, group_ids[key], buckets))
+                    groups += 1
+                actions = [parser.OFPActionGroup(group_ids[key])]
+            match = parser.OFPMatch(eth_type=ether.ETH_TYPE_IP, ipv4_dst=(str(net.network_address), str(net.netmask)))
+            self.add_flow(dp, PRIORITY_ROUTE + net.prefixlen, match, actions)
+            flows += 1
+        dp.send_msg(parser.OFPBarrierRequest(dp))
+        self.logger.info(f"[{cfg.name}] {flows} voci e {groups} gruppi installati")
+
+    # --- packet-in: ping verso il router e host non presenti nella specifica ---
+
+    def send_packet(self, dp, port, pkt):
+        ofp, parser = dp.ofproto, dp.ofproto_parser
+        pkt.serialize()
+        dp.send_msg(parser.OFPPacketOut(dp, buffer_id=ofp.OFP_NO_BUFFER, in_port=ofp.OFPP_CONTROLLER,
+                                        actions=[parser.OFPActionOutput(port)], data=pkt.data))
+
+    @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+    def packet_in_handler(self, ev):
+        msg = ev.msg
+        dp = msg.datapath
+        cfg = self.routers.get(dp.id)
+        if cfg is None:
+            return
+        in_port = msg.match["in_port"]
+        pkt = packet.Packet(msg.data)
+        eth = pkt.get_protocol(ethernet.ethernet)
+        arp_pkt = pkt.get_protocol(arp.arp)
+        if arp_pkt is not None and arp_pkt.opcode == arp.ARP_REPLY:
+            self.learn(dp, cfg, in_port, arp_pkt.src_ip, arp_pkt.src_mac)
+            return
+        ip_pkt = pkt.get_protocol(ipv4.ipv4)
+        if ip_pkt is None:
+            return
+        if ip_pkt.dst in cfg.local_ips():
+            echo = pkt.get_protocol(icmp.icmp)
+            if echo is not None and echo.type == icmp.ICMP_ECHO_REQUEST and in_port in cfg.interfaces:
+                reply = packet.Packet()
+                reply.add_protocol(ethernet.ethernet(ethertype=ether.ETH_TYPE_IP, dst=eth.src, src=cfg.interfaces[in_port][2]))
+                reply.add_protocol(ipv4.ipv4(dst=ip_pkt.src, src=ip_pkt.dst, proto=inet.IPPROTO_ICMP))
+                reply.add_protocol(icmp.icmp(type_=icmp.ICMP_ECHO_REPLY, code=0, csum=0, data=echo.data))
+                self.send_packet(dp, in_port, reply)
+            return
+        # host sconosciuto di una LAN connessa: richiesta ARP su tutte le porte della subnet;
+        # il pacchetto e' scartato, la ritrasmissione usera' la voce /32 appresa
+        dst = ipaddress.ip_address(ip_pkt.dst)
+        for port, (ip, net, mac) in cfg.interfaces.items():
+            if dst in net:
+                req = packet.Packet()
+                req.add_protocol(ethernet.ethernet(ethertype=ether.ETH_TYPE_ARP, dst="ff:ff:ff:ff:ff:ff", src=mac))
+                req.add_protocol(arp.arp(opcode=arp.ARP_REQUEST, src_mac=mac, src_ip=ip,
+                                         dst_mac="00:00:00:00:00:00", dst_ip=ip_pkt.dst))
+                self.send_packet(dp, port, req)
+
+    def learn(self, dp, cfg, port, ip, mac):
+        if port not in cfg.interfaces or ip in cfg.hosts or self.learned[dp.id].get(ip) == (port, mac):
+            return
+        self.learned[dp.id][ip] = (port, mac)
+        match = dp.ofproto_parser.OFPMatch(eth_type=ether.ETH_TYPE_IP, ipv4_dst=ip)
+        self.add_flow(dp, PRIORITY_HOST, match, self.forward_actions(dp, port, cfg.interfaces[port][2], mac),
+                      cookie=COOKIE_LEARNED, idle_timeout=LEARNED_IDLE_TIMEOUT)
+        self.logger.info(f"[{cfg.name}] host {ip} ({mac}) appreso sulla porta {port}")
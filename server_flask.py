@@ -1,15 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
+import asyncio
 import subprocess
 import threading
 import time
+import math
 import json
 from datetime import datetime
 import os
 import signal
 import sys
 import logging
+import shlex
+import re
+from functools import lru_cache
+from urllib.parse import urlencode
+from results_store import ResultsStore, migrate_legacy, parse_time, INDEX_FIELDS
+from host_registry import HostRegistry, scan_proc
+from ns_executor import NamespaceExecutor, ExecutorError, has_cap_sys_admin
+from experiment_scheduler import ExperimentScheduler, HostProcess
+from adaptive_timing import PhaseTimer, parse_config as parse_adaptive
+from live_stream import IntervalHub, IperfIntervalReader
+from timeseries_store import TimeseriesStore
+from experiment_registry import PortPool, default_admission_limit, cpu_saturated
+from sweeps import SweepManager, SweepError, expand_matrix
+from topology_spec import Topology, load_spec, WEIGHTS
+from throughput_model import ThroughputModel, information_gain
+from telemetry import TelemetryCollector, dpid_int
+from resource_sampler import ResourceSampler
+from iperf_server import IperfServer, listening
+from iperf_parse import parse_iperf_output, throughput_from_end, transport_stats
+from analytics import ResultsAnalytics, export as export_rows, EXPORT_FORMATS, EXPORT_LEVELS
+from state_snapshot import StatePublisher
+import metrics
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests as http_requests
+import network_reset
 
-#psutil è opzionale: se non presente usa pgrep come fallback
+#psutil è opzionale: se non presente scansiona direttamente /proc
 try:
     import psutil
 except Exception:
@@ -18,9 +46,44 @@ except Exception:
 app = Flask(__name__)
 
 IPERF_SERVER_HOST = "10.4.1.10"  # H7 (iPerf server)
-JSON_RESULTS = "experiment_results.json"
+JSON_RESULTS = "experiment_results.jsonl"  # JSON Lines, append-only
+LEGACY_JSON_RESULTS = "experiment_results.json"  # vecchio formato (array), migrato all'avvio
+TIMESERIES_DIR = "timeseries"  # campioni per intervallo, formato colonnare (timeseries_store.py)
+EXPERIMENT_ID_RE = re.compile(r"exp_\d+(_\d+)?")  # formato degli id generati da admit_experiment
 EXPERIMENT_DURATION_PER_HOST = 30  # offset tra attivazioni (s)
 EXCLUDED_HOSTS = {"h6", "h7"}  # esclude Experiment Controller (H6) e iPerf Server (H7)
+MNEXEC_CMD = shlex.split(os.environ.get("MNEXEC_CMD", "sudo mnexec"))
+# NS_EXECUTOR=1: helper persistente per host (ns_executor.py) per i comandi non in background
+NS_EXECUTOR = os.environ.get("NS_EXECUTOR", "0") == "1"
+# IPERF_JSON_STREAM: "auto" (usa --json-stream se iperf3 lo supporta), "1" o "0" (testo con --forceflush)
+IPERF_JSON_STREAM = os.environ.get("IPERF_JSON_STREAM", "auto")
+SSE_KEEPALIVE = 15  # s tra commenti keepalive sullo stream SSE
+LONG_POLL_TIMEOUT = 30  # s massimi di attesa con ?since_version= su /experiment_status, /experiments, /results/current
+IPERF_BASE_PORT = int(os.environ.get("IPERF_BASE_PORT", 5201))  # un server iperf3 per esperimento su H7
+IPERF_PORT_POOL_SIZE = int(os.environ.get("IPERF_PORT_POOL_SIZE", 16))
+# esperimenti concorrenti ammessi (default: 1 ogni 2 CPU disponibili)
+MAX_CONCURRENT_EXPERIMENTS = int(os.environ.get("MAX_CONCURRENT_EXPERIMENTS", 0)) or default_admission_limit()
+FINISHED_EXPERIMENTS_KEPT = 20  # esperimenti conclusi mantenuti nel registro per /experiment_status
+IPERF_SERVER_LOG_DIR = "iperf_server_logs"  # output dei server iperf3 (log a rotazione, uno per porta)
+# socket locale del runner (runner.py) a cui i worker gunicorn (wsgi.py) inoltrano le richieste
+RUNNER_SOCKET = os.environ.get("RUNNER_SOCKET", "/tmp/experiment_runner.sock")
+SWEEPS_DIR = "sweeps"  # journal degli sweep (sweeps.py), uno per sweep
+TOPOLOGY_SPEC = os.environ.get("TOPOLOGY_SPEC", "topology.json")  # specifica della rete (topology_spec.py)
+# TELEMETRY_INTERVAL: periodo (s) di lettura dei contatori OpenFlow via ofctl_rest (ryu.app.ofctl_rest
+# caricata nei controller), 0 = telemetria disattivata (default)
+TELEMETRY_INTERVAL = float(os.environ.get("TELEMETRY_INTERVAL", 0))
+TELEMETRY_RING_SIZE = 3600  # campioni mantenuti per porta (1 h con periodo 1 s)
+TELEMETRY_DEFAULT_WINDOW = 60  # s riassunti da /telemetry senza experiment_id/since
+# ADAPTIVE_TIMING=1: fasi adattive (adaptive_timing.py) per le richieste senza 'adaptive'
+ADAPTIVE_TIMING = os.environ.get("ADAPTIVE_TIMING", "0") == "1"
+# RESOURCE_SAMPLE_INTERVAL: periodo (s) di lettura di /proc per CPU e softirq (resource_sampler.py), 0 = disattivato
+RESOURCE_SAMPLE_INTERVAL = float(os.environ.get("RESOURCE_SAMPLE_INTERVAL", 0.5))
+RESOURCE_RING_SIZE = 7200  # campioni mantenuti (1 h con periodo 0.5 s)
+# CPU_LIMIT_THRESHOLD: frazione di CPU oltre la quale un risultato e' marcato host_limited
+CPU_LIMIT_THRESHOLD = float(os.environ.get("CPU_LIMIT_THRESHOLD", 0.9))
+RESET_DRAIN_TIMEOUT = 2.0  # s massimi di attesa dello svuotamento delle code in /reset
+RESET_MAX_DRAIN_TIMEOUT = 30.0  # limite di drain_timeout accettato da /reset
+INTERRUPT_GRACE = 5  # s concessi a iperf3 per il riepilogo dopo il SIGINT di fine esperimento adattivo
 
 HOSTS_CONFIG = {
     "h1": "10.1.1.10",
@@ -34,23 +97,72 @@ HOSTS_CONFIG = {
     "h9": "10.8.1.10"
 }
 
-# Stato globale (protezione con state_lock)
-experiment_state = {
-    "running": False,
-    "current_experiment_id": None,
-    "active_hosts": [],
-    "results": [],
-    "start_time": None,
-    "iperf_server_process": None
-}
+# Registro degli esperimenti (protezione con state_lock): experiment_id -> stato dell'esperimento,
+# in ordine di avvio; ogni esperimento ha il proprio server iperf3 su una porta del pool
+experiment_state = OrderedDict()
+# istantanee immutabili di experiment_state per gli endpoint di polling (letti senza state_lock)
+state_snapshots = StatePublisher()
+
+# metriche dei percorsi critici, esposte su /metrics (disattivabili con METRICS=0)
+SPAWN_SECONDS = metrics.Histogram("mnexec_spawn_seconds", "Latenza di avvio dei comandi nel namespace degli host",
+                                  label=("mode", ("popen", "host_process")))
+COMMAND_SECONDS = metrics.Histogram("host_command_seconds", "Durata dei comandi sincroni nel namespace degli host, esecuzione inclusa",
+                                    label=("via", ("executor", "mnexec")))
+HOST_PID_SECONDS = metrics.Histogram("host_pid_resolve_seconds", "Tempo di risoluzione del PID di un host Mininet")
+SAVE_RESULT_SECONDS = metrics.Histogram("save_result_seconds", "Durata di save_result, attesa del lock inclusa")
+RESULT_WRITE_SECONDS = metrics.Histogram("results_store_write_seconds", "Scrittura di un risultato con il lock acquisito")
+RESULTS_SERIALIZE_SECONDS = metrics.Histogram("results_serialization_seconds", "Tempo di serializzazione di una risposta /results")
+TRAFFIC_TESTS_ACTIVE = metrics.Gauge("traffic_tests_active", "Test iperf3 in corso")
+IPERF_FAILURES = metrics.Counter("iperf3_failures", "Test iperf3 terminati con codice diverso da 0", label="returncode")
+metrics.Gauge("threads", "Thread attivi nel processo", fn=threading.active_count)
+
+state_lock = metrics.instrumented_lock("state_lock", "state_lock")
+iperf_ports = PortPool(IPERF_BASE_PORT, IPERF_PORT_POOL_SIZE)
+# aggregati per esperimento/sweep aggiornati a ogni risultato scritto, nell'ordine del file (analytics.py)
+results_analytics = ResultsAnalytics(JSON_RESULTS + ".analytics.json")
+results_store = ResultsStore(JSON_RESULTS, lock=metrics.instrumented_lock("results_store_lock", "il lock di results_store"),
+                             on_write=RESULT_WRITE_SECONDS.observe, on_append=results_analytics.add)
+interval_hub = IntervalHub()
+timeseries_store = TimeseriesStore(TIMESERIES_DIR)
+
+def new_experiment_state(experiment_id: str, port: int, tags: dict = None) -> dict:
+    return {
+        "experiment_id": experiment_id,
+        # campi aggiunti a ogni risultato (es. sweep_id/point_id per gli sweep)
+        "tags": dict(tags or {}),
+        "running": True,
+        "port": port,
+        "active_hosts": [],
+        "results": [],
+        "start_time": datetime.now().isoformat(),
+        "end_time": None,
+        "iperf_server": None,
+        # PhaseTimer dei run adattivi (fine fase alla convergenza del throughput), None con offset fissi
+        "phase_timer": None,
+        "phases_planned": 0,
+        # creato subito: uno stop che arriva prima dell'avvio dei client non va perso
+        "scheduler": ExperimentScheduler()
+    }
 
-json_lock = threading.Lock()
-state_lock = threading.Lock()
+def running_experiments() -> list:
+    # da chiamare con state_lock acquisito
+    return [st for st in experiment_state.values() if st["running"]]
+
+def latest_experiment():
+    # da chiamare con state_lock acquisito
+    return next(reversed(experiment_state.values()), None)
+
+def publish_state(*changed):
+    # da chiamare con state_lock acquisito, dopo ogni modifica del registro: nuova istantanea
+    # con gli esperimenti `changed` aggiornati (gli altri sono condivisi con la precedente)
+    state_snapshots.publish(list(experiment_state), {
+        st["experiment_id"]: {"summary": experiment_summary(st), "results": tuple(st["results"])} for st in changed
+    })
 
 def find_mininet_processes():
     processes = {}
     if psutil is None:
-        return processes
+        return scan_proc()
     try:
         for proc in psutil.process_iter(['pid', 'cmdline']):
             try:
@@ -70,10 +182,20 @@ def find_mininet_processes():
         pass
     return processes
 
+# cache hostname -> PID, riscansionata una volta per esperimento (run_experiment_sequence)
+host_registry = HostRegistry(find_mininet_processes)
+
 def get_host_pid(hostname: str):
-    procs = find_mininet_processes()
-    if hostname in procs:
-        return procs[hostname]
+    t0 = time.perf_counter()
+    try:
+        return _get_host_pid(hostname)
+    finally:
+        HOST_PID_SECONDS.observe(time.perf_counter() - t0)
+
+def _get_host_pid(hostname: str):
+    pid = host_registry.resolve(hostname)
+    if pid:
+        return pid
     patterns = [
         f"mininet:{hostname}",
         f"mnexec.*{hostname}",
@@ -89,13 +211,32 @@ def get_host_pid(hostname: str):
     app.logger.error(f"get_host_pid: PID non trovato per {hostname} (patterns provati: {patterns})")
     return None
 
+ns_executor = None
+if NS_EXECUTOR:
+    if not has_cap_sys_admin():
+        # senza CAP_SYS_ADMIN l'helper e' comunque avviato una volta per host tramite MNEXEC_CMD
+        app.logger.warning("NS_EXECUTOR attivo senza CAP_SYS_ADMIN: avvio helper tramite mnexec")
+    ns_executor = NamespaceExecutor(host_registry, MNEXEC_CMD)
+
 def mnexec_cmd(hostname: str, cmd: list, background=False, timeout=None):
+    if ns_executor is not None and not background:
+        t0 = time.perf_counter()
+        try:
+            return ns_executor.run(hostname, cmd, timeout=timeout)
+        except ExecutorError as e:
+            app.logger.warning(f"mnexec_cmd: executor non disponibile per {hostname} ({e}), uso mnexec")
+        except Exception as e:
+            app.logger.error(f"mnexec_cmd errore su {hostname}: {e}")
+            return None
+        finally:
+            COMMAND_SECONDS.child("executor").observe(time.perf_counter() - t0)
     pid = get_host_pid(hostname)
     if not pid:
         app.logger.error(f"mnexec_cmd: PID non trovato per {hostname}")
         return None
-    base_cmd = ["sudo", "mnexec", "-a", str(pid)] + cmd
+    base_cmd = MNEXEC_CMD + ["-a", str(pid)] + cmd
     try:
+        t0 = time.perf_counter()
         if background:
             proc = subprocess.Popen(
                 base_cmd,
@@ -103,153 +244,213 @@ def mnexec_cmd(hostname: str, cmd: list, background=False, timeout=None):
                 stderr=subprocess.PIPE,
                 preexec_fn=os.setsid  
             )
+            SPAWN_SECONDS.child("popen").observe(time.perf_counter() - t0)
             return proc
         else:
             cp = subprocess.run(base_cmd, capture_output=True, text=True, timeout=timeout)
+            COMMAND_SECONDS.child("mnexec").observe(time.perf_counter() - t0)
             return cp
     except Exception as e:
         app.logger.error(f"mnexec_cmd errore su {hostname}: {e}")
         return None
 
 def save_result(result: dict):
-    # salva su JSON (append)
-    with json_lock:
-        try:
-            data = []
-            if os.path.exists(JSON_RESULTS):
-                try:
-                    with open(JSON_RESULTS, "r") as f:
-                        data = json.load(f)
-                except json.JSONDecodeError:
-                    app.logger.warning("JSON corrotto, ricreo")
-                    data = []
-            data.append(result)
-            with open(JSON_RESULTS, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            app.logger.error(f"save_result JSON error: {e}")
-
-def parse_iperf_text_fallback(output: str) -> float:
+    # salva su JSONL (append O(1), fsync a lotti gestito da results_store)
+    t0 = time.perf_counter()
     try:
-        for line in output.splitlines():
-            if 'bits/sec' in line and ('sender' in line or 'receiver' in line):
-                parts = line.split()
-                for i, part in enumerate(parts):
-                    if 'bits/sec' in part and i > 0:
-                        val = parts[i-1]
-                        try:
-                            num = float(val)
-                            if 'Gbits' in part:
-                                return num * 1000.0
-                            if 'Mbits' in part:
-                                return num
-                            if 'Kbits' in part:
-                                return num / 1000.0
-                        except Exception:
-                            continue
-    except Exception:
-        pass
-    return 0.0
+        results_store.append(result)
+        SAVE_RESULT_SECONDS.observe(time.perf_counter() - t0)
+    except Exception as e:
+        app.logger.error(f"save_result JSON error: {e}")
 
-def parse_iperf_output(output: str) -> float:
-    if not output:
-        return 0.0
+@lru_cache(maxsize=1)
+def iperf_supports_json_stream() -> bool:
+    if IPERF_JSON_STREAM in ("0", "1"):
+        return IPERF_JSON_STREAM == "1"
     try:
-        j = json.loads(output)
+        cp = subprocess.run(["iperf3", "--help"], capture_output=True, text=True, timeout=5)
+        return "--json-stream" in (cp.stdout + cp.stderr)
     except Exception:
-        return parse_iperf_text_fallback(output)
-    end = j.get("end", {})
-    candidates = []
-    for key in ("sum_received", "sum_sent", "sum"):
-        if isinstance(end.get(key), dict):
-            bps = end[key].get("bits_per_second")
-            if bps is not None:
-                candidates.append(bps)
-    streams = end.get("streams", [])
-    for s in streams:
-        for side in ("recv", "send"):
-            sec = s.get(side)
-            if isinstance(sec, dict):
-                bps = sec.get("bits_per_second")
-                if bps is not None:
-                    candidates.append(bps)
-    for bps in candidates:
-        try:
-            mbps = float(bps) / 1_000_000.0
-            return round(mbps, 3)
-        except Exception:
-            continue
-    return 0.0
+        return False
+
+def iperf_server_pattern(port: int) -> str:
+    # identifica solo il server di questo esperimento: esperimenti concorrenti non si interferiscono
+    return f"iperf3 -s -p {port}( |$)"
+
+# server iperf3 supervisionati (iperf_server.py), per porta: servono a run_traffic_test per i report lato server
+iperf_servers = {}
+
+def h7_proc_net_tcp():
+    # tabelle dei socket TCP del namespace di H7 (per verificare la porta in ascolto senza attese fisse)
+    cp = mnexec_cmd("h7", ["cat", "/proc/net/tcp", "/proc/net/tcp6"], background=False, timeout=2)
+    if cp is None or cp.returncode not in (0, 1):
+        return None
+    return cp.stdout
+
+def wait_port_free(port: int, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        text = h7_proc_net_tcp()
+        if text is None or not listening(port, text):
+            return True
+        time.sleep(0.05)
+    return False
 
-def start_iperf_server():
+def start_iperf_server(port: int):
     try:
-        chk = mnexec_cmd("h7", ["pgrep", "-f", "iperf3"], background=False, timeout=2)
+        chk = mnexec_cmd("h7", ["pgrep", "-f", iperf_server_pattern(port)], background=False, timeout=2)
         if chk and getattr(chk, "returncode", 1) == 0 and chk.stdout.strip():
-            app.logger.info("iperf3 già in esecuzione su H7: provo a terminarlo (pkill in H7)")
-            mnexec_cmd("h7", ["pkill", "-f", "iperf3"], background=False, timeout=2)
-            time.sleep(1.0)
+            app.logger.info(f"iperf3 già in esecuzione su H7:{port}: provo a terminarlo (pkill in H7)")
+            mnexec_cmd("h7", ["pkill", "-f", iperf_server_pattern(port)], background=False, timeout=2)
+            wait_port_free(port)
     except Exception:
         pass
-    proc = mnexec_cmd("h7", ["iperf3", "-s", "-p", "5201"], background=True)
-    if proc:
-        app.logger.info("Server iperf avviato su H7 (mnexec background)")
-        time.sleep(1.5)
-    else:
-        app.logger.error("Impossibile avviare server iperf su H7")
-    return proc
+    server = IperfServer(port, lambda cmd: mnexec_cmd("h7", cmd, background=True), probe=h7_proc_net_tcp,
+                         log_path=os.path.join(IPERF_SERVER_LOG_DIR, f"iperf3_server_{port}.log"), logger=app.logger)
+    if not server.start():
+        app.logger.error(f"Impossibile avviare server iperf su H7:{port}")
+        server.stop()
+        return None
+    app.logger.info(f"Server iperf avviato su H7:{port} (pid {server.proc.pid}, in ascolto)")
+    with state_lock:
+        iperf_servers[port] = server
+    return server
 
-def stop_iperf_server(proc):
-    if proc and isinstance(proc, subprocess.Popen):
+def stop_iperf_server(server, port: int):
+    if resource_sampler is not None:
+        resource_sampler.unwatch(("server", port))
+    if server is not None:
+        with state_lock:
+            if iperf_servers.get(port) is server:
+                del iperf_servers[port]
         try:
-            if proc.poll() is None:
-                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-                try:
-                    proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
-                    proc.wait()
-            app.logger.info("iperf server (proc) terminato")
+            server.stop()
+            app.logger.info(f"iperf server su porta {port} terminato (riavvii: {server.restarts})")
         except Exception as e:
-            app.logger.warning(f"Errore terminazione proc iperf: {e}")
+            app.logger.warning(f"Errore terminazione server iperf: {e}")
     try:
-        mnexec_cmd("h7", ["pkill", "-f", "iperf3"], background=False, timeout=2)
+        mnexec_cmd("h7", ["pkill", "-f", iperf_server_pattern(port)], background=False, timeout=2)
     except Exception:
         pass
 
-def run_traffic_test(hostname, ip, protocol, bitrate, duration, experiment_id, delay_before_start=0):
-    app.logger.info(f"[{hostname}] scheduled delay={delay_before_start}s dur={duration}s proto={protocol} br={bitrate}")
-    if delay_before_start > 0:
-        waited = 0.0
-        step = 0.5
-        while waited < delay_before_start:
-            with state_lock:
-                if not experiment_state["running"]:
-                    app.logger.info(f"[{hostname}] cancellato (esperimento fermato)")
-                    return None
-            time.sleep(step)
-            waited += step
+async def start_host_process(hostname: str, cmd: list, on_stdout=None):
+    # variante asyncio di mnexec_cmd per i processi attesi dallo scheduler
+    pid = get_host_pid(hostname)
+    if not pid:
+        app.logger.error(f"start_host_process: PID non trovato per {hostname}")
+        return None
+    try:
+        t0 = time.perf_counter()
+        proc = HostProcess(MNEXEC_CMD + ["-a", str(pid)] + cmd, on_stdout=on_stdout)
+        SPAWN_SECONDS.child("host_process").observe(time.perf_counter() - t0)
+        return proc
+    except Exception as e:
+        app.logger.error(f"start_host_process errore su {hostname}: {e}")
+        return None
+
+async def communicate_until(proc, finish: asyncio.Event, timeout: float):
+    # come proc.communicate(), ma se `finish` scatta prima (fine dell'ultima fase adattiva)
+    # iperf3 riceve SIGINT e chiude il test in anticipo; ritorna (stdout, stderr, interrotto)
+    comm = asyncio.ensure_future(proc.communicate())
+    ended = asyncio.ensure_future(finish.wait())
+    try:
+        done, _ = await asyncio.wait({comm, ended}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            raise asyncio.TimeoutError()
+        interrupted = comm not in done
+        if interrupted:
+            proc.interrupt()
+        out, err = await asyncio.wait_for(comm, timeout=INTERRUPT_GRACE)
+        return out, err, interrupted
+    finally:
+        ended.cancel()
+        comm.cancel()
+
+async def collect_traffic_test(hostname, proc, reader, duration, finish=None) -> float:
+    # attende la fine di iperf3 e ne ricava il throughput (stream JSON o testo)
+    interrupted = False
+    try:
+        if finish is None:
+            out, err = await asyncio.wait_for(proc.communicate(), timeout=duration + 20)
+        else:
+            out, err, interrupted = await communicate_until(proc, finish, duration + 20)
+    except asyncio.CancelledError:
+        # esperimento fermato: termino iperf3 subito, senza salvare un risultato parziale
+        await proc.terminate()
+        app.logger.info(f"[{hostname}] cancellato (esperimento fermato)")
+        raise
+    except asyncio.TimeoutError:
+        await proc.terminate()
+        out, err = b"", b"timeout"
+    stdout = out.decode(errors="replace")
+    stderr = err.decode(errors="replace")
+    returncode = proc.returncode
+    if stderr:
+        app.logger.debug(f"[{hostname}] stderr (troncato): {stderr[:200]}")
+    if returncode != 0 and not interrupted:
+        IPERF_FAILURES.inc(str(returncode))
+        app.logger.warning(f"[{hostname}] iperf3 ritorna codice {returncode}")
+    reader.feed(b"\n")
+    if interrupted and reader.intervals:
+        # test chiuso a fine fase: media degli intervalli ricevuti, il riepilogo di un client interrotto non e' affidabile
+        return round(sum(s["bits_per_second"] for s in reader.intervals) / len(reader.intervals) / 1e6, 3)
+    if reader.end is not None:
+        return throughput_from_end(reader.end)
+    else:
+        return parse_iperf_output(stdout)
+
+async def server_throughput(port: int, ip: str, since: float):
+    # report del server per questo client (scritto da iperf3 -s a fine test, quasi insieme al client)
     with state_lock:
-        if not experiment_state["running"]:
-            return None
+        server = iperf_servers.get(port)
+    if server is None:
+        return None
+    report = await asyncio.get_running_loop().run_in_executor(None, server.report, ip, since, 2.0)
+    return throughput_from_end(report["end"]) if report else None
+
+async def run_traffic_test(hostname, ip, protocol, bitrate, duration, experiment_id, port=IPERF_BASE_PORT, tags=None,
+                           timing=None, finish=None):
+    # timing: PhaseTimer dell'esperimento adattivo (riceve i campioni); finish: evento di fine dell'ultima fase
     start_time = datetime.now().isoformat()
-    cmd = ["iperf3", "-c", IPERF_SERVER_HOST, "-t", str(duration), "-p", "5201", "-J"]
-    if str(protocol).lower() == "udp":
+    started = time.time()
+    udp = str(protocol).lower() == "udp"
+    json_stream = iperf_supports_json_stream()
+    # output letto per intervallo mentre il test e' in corso (SSE /experiment_stream)
+    cmd = ["iperf3", "-c", IPERF_SERVER_HOST, "-t", str(duration), "-p", str(port), "-i", "1"]
+    cmd += ["--json-stream"] if json_stream else ["--forceflush"]
+    if udp:
         cmd += ["-u", "-b", str(bitrate)]
     app.logger.debug(f"[{hostname}] cmd: {' '.join(cmd)}")
-    cp = mnexec_cmd(hostname, cmd, background=False, timeout=duration + 20)
+    def on_sample(sample):
+        interval_hub.push(experiment_id, hostname, sample)
+        timeseries_store.append(experiment_id, hostname, sample)
+        if timing is not None:
+            timing.add(hostname, sample)
+    reader = IperfIntervalReader(on_sample, json_stream, udp)
+    TRAFFIC_TESTS_ACTIVE.inc()
+    client_key = (experiment_id, hostname)
+    try:
+        proc = await start_host_process(hostname, cmd, on_stdout=reader.feed)
+        if proc is not None and resource_sampler is not None:
+            watch_resources(hostname, port, client_key, proc.pid)
+        if proc is None:
+            IPERF_FAILURES.inc("spawn")
+            app.logger.error(f"[{hostname}] mnexec_cmd fallito")
+            throughput = 0.0
+        else:
+            start_offset = timing.offset() if timing is not None else None
+            throughput = await collect_traffic_test(hostname, proc, reader, duration, finish)
+    finally:
+        TRAFFIC_TESTS_ACTIVE.dec()
+    server_mbps = await server_throughput(port, ip, started) if proc is not None else None
+    resources = None
+    if resource_sampler is not None:
+        # CPU di sistema, del client e del server iperf3 e della shell dell'host durante il test
+        resources = resource_sampler.summary(started, time.time(), {"iperf3_client": client_key,
+                                                                     "iperf3_server": ("server", port),
+                                                                     "host": ("host", hostname)})
+        resource_sampler.unwatch(client_key)
     end_time = datetime.now().isoformat()
-    if cp is None:
-        app.logger.error(f"[{hostname}] mnexec_cmd fallito")
-        throughput = 0.0
-    else:
-        stdout = getattr(cp, "stdout", "") or ""
-        stderr = getattr(cp, "stderr", "") or ""
-        returncode = getattr(cp, "returncode", -1)
-        if stderr:
-            app.logger.debug(f"[{hostname}] stderr (troncato): {stderr[:200]}")
-        if returncode != 0:
-            app.logger.warning(f"[{hostname}] iperf3 ritorna codice {returncode}")
-        throughput = parse_iperf_output(stdout)
     result = {
         "experiment_id": experiment_id,
         "hostname": hostname,
@@ -257,29 +458,55 @@ def run_traffic_test(hostname, ip, protocol, bitrate, duration, experiment_id, d
         "protocol": protocol,
         "bitrate": str(bitrate),
         "throughput": throughput,
+        "server_throughput": server_mbps,
         "start_time": start_time,
         "end_time": end_time,
-        "duration": duration
+        "duration": duration,
+        "timeseries": timeseries_store.path(experiment_id, hostname),
+        "samples": len(reader.intervals)
     }
+    # jitter/perdite (UDP) o ritrasmissioni (TCP), aggregati da /analytics
+    result.update(transport_stats(reader.end, reader.intervals, udp))
+    if resources is not None:
+        result["resources"] = resources
+        result["host_limited"] = resources["host_limited"]
+        if resources["host_limited"]:
+            app.logger.warning(f"[{hostname}] risultato limitato dalla CPU dell'host ({', '.join(resources['flags'])})")
+    if timing is not None:
+        # confini effettivi delle fasi (s dall'avvio della sequenza) e durata reale del client
+        result["timing"] = "adaptive"
+        result["start_offset"] = round(start_offset, 3) if proc is not None else None
+        result["elapsed"] = round(time.time() - started, 3)
+        result["phases"] = list(timing.phases)
+    result.update(tags or {})
     save_result(result)
     app.logger.info(f"[{hostname}] completato -> {throughput} Mbps")
     return result
 
-def run_experiment_sequence(host_configs, experiment_id):
-    app.logger.info(f"Avvio esperimento {experiment_id}")
+def watch_resources(hostname: str, port: int, client_key, client_pid: int):
+    # processi seguiti dal campionatore: client iperf3 (discendente di sudo/mnexec), server su H7, shell dell'host
+    resource_sampler.watch(client_key, client_pid, "iperf3")
     with state_lock:
-        experiment_state["running"] = True
-        experiment_state["current_experiment_id"] = experiment_id
-        experiment_state["start_time"] = datetime.now().isoformat()
-        experiment_state["results"].clear()
-        experiment_state["active_hosts"].clear()
-    iperf_proc = start_iperf_server()
+        server = iperf_servers.get(port)
+    if server is not None and server.proc is not None:
+        resource_sampler.watch(("server", port), server.proc.pid, "iperf3")
+    resource_sampler.watch(("host", hostname), get_host_pid(hostname))
+
+def run_experiment_sequence(host_configs, state, duration_per_host=None, adaptive=None):
+    # adaptive: None/False per gli offset fissi, altrimenti true o {threshold, window, min_phase, max_phase}
+    experiment_id, port = state["experiment_id"], state["port"]
+    duration_per_host = duration_per_host or EXPERIMENT_DURATION_PER_HOST
+    adaptive = parse_adaptive(adaptive, duration_per_host)
+    app.logger.info(f"Avvio esperimento {experiment_id} (iperf3 su porta {port})")
+    scheduler = state["scheduler"]
+    host_registry.refresh()
+    iperf_server = start_iperf_server(port)
     with state_lock:
-        experiment_state["iperf_server_process"] = iperf_proc
-    if iperf_proc is None:
+        state["iperf_server"] = iperf_server
+        publish_state(state)
+    if iperf_server is None:
         app.logger.error("Server iperf non disponibile: esco")
-        with state_lock:
-            experiment_state["running"] = False
+        finish_experiment(state)
         return
     try:
         active_hosts = [h for h in sorted(host_configs.keys()) if h not in EXCLUDED_HOSTS and h in HOSTS_CONFIG]
@@ -287,100 +514,680 @@ def run_experiment_sequence(host_configs, experiment_id):
         if total_hosts == 0:
             app.logger.warning("Nessun host valido per esperimento")
             return
-        total_experiment_duration = total_hosts * EXPERIMENT_DURATION_PER_HOST
-        threads = []
+        timer = PhaseTimer(**adaptive) if adaptive else None
+        finish = asyncio.Event() if adaptive else None
+        # in modalita' adattiva ogni fase dura al massimo max_phase: i client sono dimensionati
+        # sul caso peggiore e chiusi con SIGINT alla fine dell'ultima fase
+        phase_length = adaptive["max_phase"] if adaptive else duration_per_host
+        total_experiment_duration = total_hosts * phase_length
+        with state_lock:
+            state["phase_timer"] = timer
+            state["phases_planned"] = total_hosts
+        jobs = []
         for i, hostname in enumerate(active_hosts):
             cfg = host_configs[hostname]
-            start_delay = i * EXPERIMENT_DURATION_PER_HOST
+            start_delay = i * phase_length
             traffic_duration = total_experiment_duration - start_delay
+            if adaptive:
+                traffic_duration = math.ceil(traffic_duration)
             ip = HOSTS_CONFIG.get(hostname, "0.0.0.0")
-            def make_task(h, ip, cfg, dur, delay):
-                def task():
+            def make_task(h, ip, cfg, dur):
+                async def task():
                     try:
-                        res = run_traffic_test(h, ip, cfg.get("protocol", "TCP"), cfg.get("bitrate", "1M"), dur, experiment_id, delay)
+                        res = await run_traffic_test(h, ip, cfg.get("protocol", "TCP"), cfg.get("bitrate", "1M"), dur, experiment_id, port, state["tags"],
+                                                     timer, finish)
                         if res:
                             with state_lock:
-                                experiment_state["results"].append(res)
+                                state["results"].append(res)
+                                publish_state(state)
+                        return res
+                    except asyncio.CancelledError:
+                        raise
                     except Exception as e:
                         app.logger.error(f"Errore task {h}: {e}")
                 return task
-            task_fn = make_task(hostname, ip, cfg, traffic_duration, start_delay)
-            t = threading.Thread(target=task_fn, name=f"traffic_{hostname}", daemon=True)
-            t.start()
-            threads.append(t)
+            jobs.append((start_delay, make_task(hostname, ip, cfg, traffic_duration)))
             with state_lock:
-                experiment_state["active_hosts"].append(hostname)
-            app.logger.info(f"Scheduled {hostname}: start {start_delay}s dur {traffic_duration}s")
-        for t in threads:
-            t.join(timeout=total_experiment_duration + 30)
-            if t.is_alive():
-                app.logger.warning(f"Thread {t.name} ancora vivo dopo timeout")
+                state["active_hosts"].append(hostname)
+                publish_state(state)
+            if adaptive:
+                app.logger.info(f"Scheduled {hostname}: fase {i + 1}/{total_hosts}, max {traffic_duration}s")
+            else:
+                app.logger.info(f"Scheduled {hostname}: start {start_delay}s dur {traffic_duration}s")
+        if timer is None:
+            # un unico event loop lancia i client agli offset esatti; stop() li cancella subito
+            scheduler.run(jobs)
+        else:
+            async def wait_phase(i):
+                phase = await timer.wait_phase(active_hosts[:i + 1], active_hosts[i])
+                app.logger.info(f"Fase {i + 1}/{total_hosts} ({phase['host']}): {phase['seconds']}s, {phase['reason']}")
+                with state_lock:
+                    publish_state(state)
+                return phase
+            scheduler.run_phased([fn for _, fn in jobs], wait_phase, finish.set)
+            app.logger.info(f"Esperimento {experiment_id}: {timer.saved_seconds(total_hosts)}s risparmiati con le fasi adattive")
     except Exception as e:
         app.logger.error(f"Errore durante sequenza esperimento: {e}")
     finally:
-        stop_iperf_server(iperf_proc)
-        with state_lock:
-            experiment_state["running"] = False
-            experiment_state["active_hosts"].clear()
-            experiment_state["iperf_server_process"] = None
-        app.logger.info(f"Esperimento {experiment_id} terminato")
+        finish_experiment(state)
 
-# Flask API
-@app.route("/start_experiment", methods=["POST"])
-def start_experiment():
+def finish_experiment(state):
     with state_lock:
-        if experiment_state["running"]:
-            return jsonify({"error": "Esperimento già in corso"}), 409
-    data = request.get_json()
-    if not data or "hosts" not in data:
-        return jsonify({"error": "Devi fornire 'hosts' con configurazioni"}), 400
-    host_configs = data["hosts"]
+        proc = state["iperf_server"]
+        state["running"] = False
+        state["active_hosts"].clear()
+        state["iperf_server"] = None
+        state["scheduler"] = None
+        state["end_time"] = datetime.now().isoformat()
+        publish_state(state)
+    stop_iperf_server(proc, state["port"])
+    iperf_ports.release(state["port"])
+    interval_hub.finish(state["experiment_id"])
+    timeseries_store.close(state["experiment_id"])
+    app.logger.info(f"Esperimento {state['experiment_id']} terminato")
+
+def stop_experiments(experiment_id=None) -> list:
+    """Ferma l'esperimento indicato o tutti quelli in corso; ritorna gli id fermati."""
+    with state_lock:
+        targets = [st for st in running_experiments() if experiment_id in (None, st["experiment_id"])]
+        for st in targets:
+            st["running"] = False
+        publish_state(*targets)
+        schedulers = [st["scheduler"] for st in targets if st["scheduler"] is not None]
+    # il runner di ogni esperimento esce subito e chiude il proprio server in finish_experiment
+    for scheduler in schedulers:
+        scheduler.stop()
+    return [st["experiment_id"] for st in targets]
+
+def admit_experiment(tags: dict = None):
+    """Riserva porta e posto per un nuovo esperimento; ritorna (stato, None) o (None, (errore, codice))."""
+    with state_lock:
+        if network_resetting:
+            return None, ("Reset della rete in corso: riprova più tardi", 409)
+        running = len(running_experiments())
+        if running >= MAX_CONCURRENT_EXPERIMENTS:
+            return None, (f"Limite di {MAX_CONCURRENT_EXPERIMENTS} esperimenti concorrenti raggiunto", 429)
+        if running and cpu_saturated():
+            return None, ("CPU satura: riprova più tardi", 429)
+        port = iperf_ports.acquire()
+        if port is None:
+            return None, ("Nessuna porta iperf3 libera", 429)
+        base_id = experiment_id = f"exp_{int(time.time())}"
+        n = 1
+        while experiment_id in experiment_state:
+            n += 1
+            experiment_id = f"{base_id}_{n}"
+        state = new_experiment_state(experiment_id, port, tags)
+        experiment_state[experiment_id] = state
+        finished = [k for k, st in experiment_state.items() if not st["running"]]
+        for k in finished[:max(0, len(finished) - FINISHED_EXPERIMENTS_KEPT)]:
+            del experiment_state[k]
+        publish_state(state)
+    return state, None
+
+def experiment_summary(st) -> dict:
+    # da chiamare con state_lock acquisito
+    return {
+        "running": st["running"],
+        "current_experiment_id": st["experiment_id"],
+        "sweep_id": st["tags"].get("sweep_id"),
+        "port": st["port"],
+        "active_hosts": list(st["active_hosts"]),
+        "start_time": st["start_time"],
+        "end_time": st["end_time"],
+        "results_count": len(st["results"]),
+        "iperf_server": st["iperf_server"].status() if st["iperf_server"] is not None else None,
+        "timing": st["phase_timer"].describe(st["phases_planned"]) if st["phase_timer"] is not None else None
+    }
+
+def validate_host_configs(host_configs) -> str:
+    """Messaggio di errore per una configurazione host non valida, altrimenti None."""
     for h, cfg in host_configs.items():
         if h in EXCLUDED_HOSTS:
             continue
         if h not in HOSTS_CONFIG:
-            return jsonify({"error": f"Host {h} non valido"}), 400
+            return f"Host {h} non valido"
         proto = cfg.get("protocol", "").upper()
         if proto not in ("TCP", "UDP"):
-            return jsonify({"error": f"Protocollo non valido per {h} (TCP/UDP)"}), 400
+            return f"Protocollo non valido per {h} (TCP/UDP)"
         if "bitrate" not in cfg:
-            return jsonify({"error": f"Bitrate mancante per {h}"}), 400
-    experiment_id = f"exp_{int(time.time())}"
-    t = threading.Thread(target=run_experiment_sequence, args=(host_configs, experiment_id), name="experiment_runner", daemon=True)
+            return f"Bitrate mancante per {h}"
+    return None
+
+def run_sweep_point(sweep_id: str, point: dict, on_start):
+    """Esegue un punto di uno sweep nel thread del worker; ritorna (experiment_id, completato, info)."""
+    if point.get("reset"):
+        # saltato se altri esperimenti sono in corso (concurrency > 1): li interromperebbe
+        reset_network(list(point["host_configs"]))
+    state, error = admit_experiment({"sweep_id": sweep_id, "point_id": point["point_id"]})
+    if error:
+        return None, False, {}
+    on_start(state["experiment_id"])
+    scheduler = state["scheduler"]
+    run_experiment_sequence(point["host_configs"], state, point["duration_per_host"], point.get("adaptive"))
+    with state_lock:
+        completed = not scheduler.stopped.is_set() and bool(state["results"])
+        timer = state["phase_timer"]
+    info = {"saved_seconds": timer.saved_seconds(state["phases_planned"])} if timer is not None else {}
+    return state["experiment_id"], completed, info
+
+@lru_cache(maxsize=len(WEIGHTS))
+def throughput_model(weight: str = "delay") -> ThroughputModel:
+    # cammini e capacita' ricavati una sola volta dalla specifica; il server e' l'host con IPERF_SERVER_HOST
+    topo = Topology(load_spec(TOPOLOGY_SPEC))
+    server = next((h for h, (cidr, _) in topo.hosts().items() if cidr.split("/")[0] == IPERF_SERVER_HOST), None)
+    if server is None:
+        raise ValueError(f"Nessun host con indirizzo {IPERF_SERVER_HOST} nella specifica")
+    return ThroughputModel(topo, server, weight)
+
+def prediction_configs(host_configs: dict) -> dict:
+    # gli stessi host che run_experiment_sequence attiverebbe
+    return {h: cfg for h, cfg in host_configs.items() if h not in EXCLUDED_HOSTS and h in HOSTS_CONFIG}
+
+def validate_prescreen(options) -> str:
+    """Messaggio di errore per un campo `prescreen` dello sweep non valido, altrimenti None."""
+    if not isinstance(options, dict):
+        return "'prescreen' deve essere un oggetto {mode, min_gain, weight}"
+    if options.get("mode", "prioritize") not in ("prioritize", "skip"):
+        return "'prescreen.mode' deve essere 'prioritize' o 'skip'"
+    if options.get("weight", "delay") not in WEIGHTS:
+        return f"'prescreen.weight' deve essere uno tra {', '.join(WEIGHTS)}"
+    try:
+        min_gain = float(options.get("min_gain", 0.01))
+    except (TypeError, ValueError):
+        min_gain = -1.0
+    if not 0 <= min_gain <= 1:
+        return "'prescreen.min_gain' deve essere tra 0 e 1"
+    return None
+
+def prescreen_sweep(spec: dict, points: list) -> list:
+    """Ordina i punti per guadagno informativo previsto dal modello analitico (prima
+    quelli con la previsione piu' diversa dai precedenti); con mode "skip" i punti
+    sotto min_gain, la cui previsione coincide con un punto gia' in coda, sono saltati.
+    Il modello non dipende da duration_per_host: i punti sono confrontati solo con
+    quelli della stessa durata, cosi' l'asse delle durate non viene mai saltato."""
+    options = spec.get("prescreen")
+    if not options:
+        return points
+    model = throughput_model(options.get("weight", "delay"))
+    t0 = time.perf_counter()
+    vectors = model.score([prediction_configs(p["host_configs"]) for p in points])
+    by_duration = {}
+    for i, p in enumerate(points):
+        by_duration.setdefault(p["duration_per_host"], []).append(i)
+    ranking = []
+    for indices in by_duration.values():
+        sub_order, sub_gains = information_gain([vectors[i] for i in indices])
+        ranking += [(gain, rank, indices[j]) for rank, (j, gain) in enumerate(zip(sub_order, sub_gains))]
+    # gruppi intercalati per guadagno decrescente (a pari guadagno, posizione nel proprio gruppo)
+    ranking.sort(key=lambda t: (-t[0], t[1]))
+    order, gains = [i for _, _, i in ranking], [g for g, _, _ in ranking]
+    skip = options.get("mode", "prioritize") == "skip"
+    min_gain = float(options.get("min_gain", 0.01))
+    ranked = []
+    for i, gain in zip(order, gains):
+        point = dict(points[i], gain=gain,
+                     predicted={h: v for h, v in zip(model.hosts, vectors[i]) if v is not None})
+        if skip and gain < min_gain:
+            point["skipped"] = True
+        ranked.append(point)
+    app.logger.info(f"Prescreen di {len(points)} punti in {(time.perf_counter() - t0) * 1e3:.1f} ms: "
+                    f"{sum(1 for p in ranked if p.get('skipped'))} saltati")
+    return ranked
+
+sweep_manager = SweepManager(SWEEPS_DIR, run_sweep_point, stop_experiments, logger=app.logger, prescreen=prescreen_sweep)
+telemetry = None  # TelemetryCollector, avviato in start_telemetry()
+
+resource_sampler = None  # ResourceSampler, avviato in start_resource_sampler()
+
+def start_resource_sampler():
+    global resource_sampler
+    if RESOURCE_SAMPLE_INTERVAL <= 0 or not os.path.exists("/proc/stat"):
+        app.logger.info("Campionamento delle risorse disattivato")
+        return
+    resource_sampler = ResourceSampler(RESOURCE_SAMPLE_INTERVAL, RESOURCE_RING_SIZE, CPU_LIMIT_THRESHOLD, logger=app.logger)
+    resource_sampler.start()
+
+def rest_targets(topo: Topology, routers_only: bool = False) -> dict:
+    """{router o switch: URL ofctl_rest} per i datapath il cui controller ha un URL `rest` nella specifica."""
+    nodes = list(topo.routers.items()) + ([] if routers_only else list(topo.switches.items()))
+    targets = {}
+    for name, cfg in nodes:
+        rest = topo.controllers.get(cfg.get("controller"), {}).get("rest")
+        if rest:
+            targets[name] = rest.rstrip("/")
+    return targets
+
+def start_telemetry():
+    """Avvia la raccolta dei contatori per router e switch il cui controller ha un URL `rest` nella specifica."""
+    global telemetry
+    if TELEMETRY_INTERVAL <= 0:
+        return
+    try:
+        topo = Topology(load_spec(TOPOLOGY_SPEC))
+    except Exception as e:
+        app.logger.warning(f"Telemetria disattivata: specifica {TOPOLOGY_SPEC} non leggibile ({e})")
+        return
+    targets = rest_targets(topo)
+    if not targets:
+        app.logger.warning("Telemetria disattivata: nessun controller con URL REST nella specifica")
+        return
+    telemetry = TelemetryCollector(targets, topo.port_map(), TELEMETRY_INTERVAL, TELEMETRY_RING_SIZE, logger=app.logger)
+    telemetry.start()
+    app.logger.info(f"Telemetria attiva su {len(targets)} datapath (ogni {TELEMETRY_INTERVAL}s)")
+
+def kill_stray_iperf(hostname: str) -> list:
+    # iperf3 rimasti nel namespace di rete dell'host: per nome esatto e PID, senza pattern -f
+    pid = get_host_pid(hostname)
+    if not pid:
+        return []
+    found = []
+    for sig in ("-TERM", "-KILL"):
+        cp = mnexec_cmd(hostname, network_reset.pgrep_netns_cmd(pid), background=False, timeout=2)
+        pids = network_reset.parse_pids(cp.stdout if cp is not None else "")
+        if not pids:
+            break
+        found = found or pids
+        mnexec_cmd(hostname, ["kill", sig] + [str(p) for p in pids], background=False, timeout=2)
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            cp = mnexec_cmd(hostname, network_reset.pgrep_netns_cmd(pid), background=False, timeout=2)
+            if cp is None or not network_reset.parse_pids(cp.stdout):
+                return found
+            time.sleep(0.05)
+    return found
+
+def qdisc_backlog(hostname: str = None) -> tuple:
+    # (byte, pacchetti) in coda nelle qdisc dell'host, o del namespace radice (porte degli switch) se hostname e' None
+    cmd = ["tc", "-s", "qdisc", "show"]
+    if hostname is None:
+        try:
+            cp = subprocess.run(MNEXEC_CMD + ["-a", str(network_reset.ROOT_NS_PID)] + cmd, capture_output=True, text=True, timeout=2)
+        except Exception:
+            cp = None
+    else:
+        cp = mnexec_cmd(hostname, cmd, background=False, timeout=2)
+    if cp is None or cp.returncode != 0:
+        return None
+    return network_reset.qdisc_backlog(cp.stdout)
+
+def probe_host(hostname: str):
+    # RTT (ms) di un ping verso il server iperf3, None se non risponde
+    cp = mnexec_cmd(hostname, ["ping", "-c", "1", "-W", "1", IPERF_SERVER_HOST], background=False, timeout=3)
+    return network_reset.ping_rtt(cp.stdout) if cp is not None and cp.returncode == 0 else None
+
+network_resetting = False  # True durante reset_network(): admit_experiment rifiuta nuovi esperimenti
+
+def reset_network(hosts=None, flows: bool = True, drain_timeout: float = RESET_DRAIN_TIMEOUT):
+    """Stato pulito tra due esperimenti senza ricreare la rete (network_reset.py): iperf3
+    rimasti, code dei TCLink, voci apprese dal router, base della telemetria, verifica
+    di raggiungibilita'. Ritorna (report, []) oppure (None, esperimenti in corso) se non
+    e' possibile; durante il reset non vengono ammessi nuovi esperimenti."""
+    global network_resetting
+    with state_lock:
+        running = [st["experiment_id"] for st in running_experiments()]
+        if running or network_resetting:
+            return None, running
+        network_resetting = True
+    try:
+        return _reset_network(hosts, flows, drain_timeout), []
+    finally:
+        with state_lock:
+            network_resetting = False
+
+def _reset_network(hosts, flows: bool, drain_timeout: float) -> dict:
+    t0 = time.perf_counter()
+    hosts = sorted(set(hosts or HOSTS_CONFIG) & set(HOSTS_CONFIG) | {"h7"})
+    host_registry.refresh()
+    report = {"hosts": hosts}
+    with state_lock:
+        leftovers = list(iperf_servers.items())
+    for port, server in leftovers:
+        stop_iperf_server(server, port)
+    with ThreadPoolExecutor(max_workers=len(hosts) + 1) as pool:
+        killed = dict(zip(hosts, pool.map(kill_stray_iperf, hosts)))
+        report["killed"] = {h: pids for h, pids in killed.items() if pids}
+        report["flows_deleted"] = {}
+        report["flows"] = "skipped"
+        if flows:
+            try:
+                targets = rest_targets(Topology(load_spec(TOPOLOGY_SPEC)), routers_only=True)
+            except Exception as e:
+                app.logger.warning(f"/reset: specifica {TOPOLOGY_SPEC} non leggibile ({e})")
+                targets = {}
+            session = http_requests.Session()
+
+            def delete(node):
+                # True/False: voci apprese rimosse o no; "unsupported": router non gestito da ryu_static_router
+                try:
+                    if not network_reset.static_router_managed(session, targets[node], dpid_int(node)):
+                        return "unsupported"
+                except http_requests.RequestException:
+                    return "unreachable"
+                except ValueError:
+                    return "unsupported"
+                try:
+                    return network_reset.delete_learned_flows(session, targets[node], dpid_int(node))
+                except (http_requests.RequestException, ValueError):
+                    return False
+            report["flows_deleted"] = dict(zip(targets, pool.map(delete, list(targets))))
+            outcomes = [v for v in report["flows_deleted"].values() if isinstance(v, bool)]
+            report["flows"] = ("unsupported" if not outcomes else
+                               "deleted" if all(outcomes) else "failed")
+        if telemetry is not None:
+            telemetry.reset_baseline()
+        report["telemetry_baseline_reset"] = telemetry is not None
+        # code dei TCLink: senza mittenti si svuotano in pochi ms
+        t_drain = time.monotonic()
+        while True:
+            backlog = list(pool.map(qdisc_backlog, hosts + [None]))
+            queued = sum(b[0] for b in backlog if b is not None)
+            if queued == 0 or time.monotonic() - t_drain >= drain_timeout:
+                break
+            time.sleep(0.05)
+        report["qdisc"] = {"drained": queued == 0, "backlog_bytes": queued, "checked": sum(b is not None for b in backlog),
+                           "wait_ms": round((time.monotonic() - t_drain) * 1e3, 1)}
+        probes = [h for h in hosts if h not in EXCLUDED_HOSTS]
+        report["probe"] = dict(zip(probes, pool.map(probe_host, probes)))
+    report["ready"] = (report["qdisc"]["drained"] and report["flows"] != "failed"
+                       and all(v is not None for v in report["probe"].values()))
+    report["elapsed_ms"] = round((time.perf_counter() - t0) * 1e3, 1)
+    app.logger.info(f"Reset rete in {report['elapsed_ms']} ms: pronto={report['ready']}, "
+                    f"iperf3 terminati={sum(map(len, report['killed'].values()))}")
+    return report
+
+def experiment_running(experiment_id: str) -> bool:
+    with state_lock:
+        st = experiment_state.get(experiment_id)
+        return st is not None and st["running"]
+
+def experiment_window(experiment_id: str):
+    """(inizio, fine) epoch dell'esperimento; fine = adesso se in corso. None se sconosciuto."""
+    with state_lock:
+        st = experiment_state.get(experiment_id)
+        if st is not None:
+            end = parse_time(st["end_time"]) if st["end_time"] else time.time()
+            return parse_time(st["start_time"]), end
+    # esperimenti non piu' nel registro: estremi dai risultati salvati
+    seqs, _ = results_store.query({"experiment_id": experiment_id})
+    records = [json.loads(results_store.read_raw(seq)) for seq in seqs]
+    if not records:
+        return None
+    return min(parse_time(r["start_time"]) for r in records), max(parse_time(r["end_time"]) for r in records)
+
+# Flask API
+@app.route("/start_experiment", methods=["POST"])
+def start_experiment():
+    data = request.get_json()
+    if not data or "hosts" not in data:
+        return jsonify({"error": "Devi fornire 'hosts' con configurazioni"}), 400
+    host_configs = data["hosts"]
+    invalid = validate_host_configs(host_configs)
+    if invalid:
+        return jsonify({"error": invalid}), 400
+    adaptive = data.get("adaptive", ADAPTIVE_TIMING or None)
+    try:
+        parse_adaptive(adaptive, EXPERIMENT_DURATION_PER_HOST)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    state, error = admit_experiment()
+    if error:
+        return jsonify({"error": error[0]}), error[1]
+    experiment_id = state["experiment_id"]
+    t = threading.Thread(target=run_experiment_sequence, args=(host_configs, state, None, adaptive), name=f"experiment_runner_{experiment_id}", daemon=True)
     t.start()
-    return jsonify({"status": "started", "experiment_id": experiment_id}), 202
+    return jsonify({"status": "started", "experiment_id": experiment_id, "port": state["port"]}), 202
+
+def request_snapshot():
+    # ?since_version=N: long-poll finche' la versione pubblicata non supera N (al massimo ?timeout= s)
+    since = request.args.get("since_version", type=int)
+    if since is None:
+        return state_snapshots.current
+    timeout = min(request.args.get("timeout", LONG_POLL_TIMEOUT, type=float), LONG_POLL_TIMEOUT)
+    return state_snapshots.wait(since, timeout)
+
+def snapshot_response(snap, body: str):
+    resp = Response(body, mimetype="application/json")
+    resp.headers["X-State-Version"] = str(snap.version)
+    return resp
+
+def build_status(snap, experiment_id) -> str:
+    entry = snap.entries[experiment_id] if experiment_id else snap.latest()
+    status = dict(entry["summary"]) if entry else {
+        "running": False, "current_experiment_id": None, "active_hosts": [], "start_time": None, "results_count": 0
+    }
+    status["running_experiments"] = list(snap.running)
+    status["max_concurrent"] = MAX_CONCURRENT_EXPERIMENTS
+    status["version"] = snap.version
+    return app.json.dumps(status)
 
 @app.route("/experiment_status", methods=["GET"])
 def experiment_status():
-    with state_lock:
-        return jsonify({
-            "running": experiment_state["running"],
-            "current_experiment_id": experiment_state["current_experiment_id"],
-            "active_hosts": list(experiment_state["active_hosts"]),
-            "start_time": experiment_state["start_time"],
-            "results_count": len(experiment_state["results"])
-        })
+    # ?experiment_id= per un esperimento specifico, altrimenti l'ultimo avviato
+    experiment_id = request.args.get("experiment_id")
+    snap = request_snapshot()
+    if experiment_id and experiment_id not in snap.entries:
+        return jsonify({"error": f"Esperimento {experiment_id} sconosciuto"}), 404
+    return snapshot_response(snap, snap.serialized(("status", experiment_id), lambda sn: build_status(sn, experiment_id)))
+
+@app.route("/experiments", methods=["GET"])
+def list_experiments():
+    snap = request_snapshot()
+    experiments = snap.serialized("experiments", lambda sn: app.json.dumps([e["summary"] for e in sn.entries.values()]))
+    # le porte libere cambiano anche fuori da state_lock (rilascio a fine esperimento): lette a ogni richiesta
+    return snapshot_response(snap, '{"experiments":%s,"free_ports":%d,"max_concurrent":%d,"version":%d}' % (
+        experiments, iperf_ports.available, MAX_CONCURRENT_EXPERIMENTS, snap.version))
 
 @app.route("/results", methods=["GET"])
 def get_results():
-    experiment_id = request.args.get("experiment_id")
+    # filtri indicizzati: experiment_id, hostname, protocol; intervallo su start_time (since/until)
+    filters = {f: request.args[f] for f in INDEX_FIELDS if request.args.get(f)}
     try:
-        if os.path.exists(JSON_RESULTS):
-            with open(JSON_RESULTS, "r") as f:
-                data = json.load(f)
-        else:
-            data = []
-        if experiment_id:
-            data = [r for r in data if r.get("experiment_id") == experiment_id]
-        return jsonify(data)
+        limit = request.args.get("limit", type=int)
+        cursor = int(request.args.get("cursor", -1))
+        if cursor < -1 or (limit is not None and limit < 1):
+            return jsonify({"error": "Parametri non validi: cursor >= -1 e limit >= 1"}), 400
+        page, next_cursor = results_store.query(filters, request.args.get("since"), request.args.get("until"), cursor, limit)
+    except ValueError as e:
+        return jsonify({"error": f"Parametri non validi: {e}"}), 400
     except Exception as e:
         app.logger.error(f"/results error: {e}")
         return jsonify({"error": "Errore accesso JSON"}), 500
+    etag = results_store.etag(request.query_string.decode(), page, next_cursor)
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+    body = metrics.timed_stream(results_store.stream_json_array(page), RESULTS_SERIALIZE_SECONDS)
+    resp = Response(stream_with_context(body), mimetype="application/json")
+    resp.set_etag(etag)
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args["cursor"] = str(next_cursor)
+        resp.headers["X-Next-Cursor"] = str(next_cursor)
+        resp.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return resp
+
+@app.route("/results/summary", methods=["GET"])
+def get_results_summary():
+    # aggregati calcolati dal file colonnare (mmap), senza caricare i campioni come oggetti Python
+    experiment_id = request.args.get("experiment_id")
+    if not experiment_id:
+        return jsonify({"error": "Parametro experiment_id obbligatorio"}), 400
+    hostname = request.args.get("hostname")
+    # entrambi diventano parte del percorso in TIMESERIES_DIR
+    if not EXPERIMENT_ID_RE.fullmatch(experiment_id) or (hostname and hostname not in HOSTS_CONFIG):
+        return jsonify({"error": "experiment_id o hostname non validi"}), 400
+    try:
+        summary = timeseries_store.summary(experiment_id, hostname)
+    except Exception as e:
+        app.logger.error(f"/results/summary error: {e}")
+        return jsonify({"error": "Errore lettura serie temporali"}), 500
+    if not summary["hosts"]:
+        return jsonify({"error": f"Nessuna serie per {experiment_id}"}), 404
+    return jsonify(summary)
+
+@app.route("/analytics", methods=["GET"])
+def get_analytics():
+    # aggregati precalcolati: ?experiment_id= o ?sweep_id=, altrimenti totale e ultimi esperimenti (?limit=)
+    experiment_id, sweep_id = request.args.get("experiment_id"), request.args.get("sweep_id")
+    if experiment_id:
+        summary = results_analytics.experiment(experiment_id)
+    elif sweep_id:
+        summary = results_analytics.sweep(sweep_id)
+    else:
+        return jsonify(results_analytics.overview(request.args.get("limit", 20, type=int)))
+    if summary is None:
+        return jsonify({"error": f"Nessun risultato per {experiment_id or sweep_id}"}), 404
+    return jsonify(summary)
+
+@app.route("/analytics/export", methods=["GET"])
+def export_analytics():
+    # ?format=csv|parquet, ?level=hosts (una riga per esperimento e host) | groups (una per esperimento/sweep)
+    fmt, level = request.args.get("format", "csv"), request.args.get("level", "hosts")
+    if fmt not in EXPORT_FORMATS or level not in EXPORT_LEVELS:
+        return jsonify({"error": f"format: {', '.join(EXPORT_FORMATS)}; level: {', '.join(EXPORT_LEVELS)}"}), 400
+    rows = results_analytics.rows(level, request.args.get("experiment_id"), request.args.get("sweep_id"))
+    try:
+        body = export_rows(rows, fmt)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 501
+    name = request.args.get("experiment_id") or request.args.get("sweep_id") or "results"
+    resp = Response(body, mimetype="text/csv" if fmt == "csv" else "application/vnd.apache.parquet")
+    resp.headers["Content-Disposition"] = f"attachment; filename={name}_{level}.{fmt}"
+    return resp
 
 @app.route("/results/current", methods=["GET"])
 def get_current_results():
-    with state_lock:
-        return jsonify({"experiment_id": experiment_state["current_experiment_id"], "results": list(experiment_state["results"])})
+    experiment_id = request.args.get("experiment_id")
+    snap = request_snapshot()
+    entry = snap.entries.get(experiment_id) if experiment_id else snap.latest()
+    if entry is None:
+        return jsonify({"experiment_id": experiment_id, "results": [], "version": snap.version})
+    exp_id = entry["summary"]["current_experiment_id"]
+    return snapshot_response(snap, snap.serialized(("results", exp_id), lambda sn: app.json.dumps(
+        {"experiment_id": exp_id, "results": list(entry["results"]), "version": sn.version})))
+
+@app.route("/telemetry", methods=["GET"])
+def get_telemetry():
+    # utilizzo e scarti per link nella finestra di un esperimento (?experiment_id=) o in since/until
+    if telemetry is None:
+        return jsonify({"error": "Telemetria non attiva"}), 503
+    experiment_id = request.args.get("experiment_id")
+    try:
+        if experiment_id:
+            window = experiment_window(experiment_id)
+            if window is None:
+                return jsonify({"error": f"Esperimento {experiment_id} sconosciuto"}), 404
+        else:
+            end = parse_time(request.args.get("until")) or time.time()
+            window = (parse_time(request.args.get("since")) or end - TELEMETRY_DEFAULT_WINDOW, end)
+    except ValueError as e:
+        return jsonify({"error": f"Parametri non validi: {e}"}), 400
+    summary = telemetry.summary(*window)
+    summary["experiment_id"] = experiment_id
+    return jsonify(summary)
+
+@app.route("/resources", methods=["GET"])
+def get_resources():
+    # CPU e softirq della macchina nella finestra di un esperimento (?experiment_id=) o in since/until
+    if resource_sampler is None:
+        return jsonify({"error": "Campionamento delle risorse non attivo"}), 503
+    experiment_id = request.args.get("experiment_id")
+    try:
+        if experiment_id:
+            window = experiment_window(experiment_id)
+            if window is None:
+                return jsonify({"error": f"Esperimento {experiment_id} sconosciuto"}), 404
+        else:
+            end = parse_time(request.args.get("until")) or time.time()
+            window = (parse_time(request.args.get("since")) or end - TELEMETRY_DEFAULT_WINDOW, end)
+    except ValueError as e:
+        return jsonify({"error": f"Parametri non validi: {e}"}), 400
+    summary = resource_sampler.summary(*window)
+    summary.update({"experiment_id": experiment_id, "window": {"start": window[0], "end": window[1]},
+                    "sampler": resource_sampler.status()})
+    return jsonify(summary)
+
+@app.route("/reset", methods=["POST"])
+def reset():
+    # stato pulito tra due esperimenti: {"hosts": [...], "flows": true, "drain_timeout": 2.0}, tutto opzionale
+    data = request.get_json(silent=True) or {}
+    hosts = data.get("hosts")
+    if hosts is not None and (not isinstance(hosts, list) or any(h not in HOSTS_CONFIG for h in hosts)):
+        return jsonify({"error": "'hosts' deve essere una lista di host validi"}), 400
+    try:
+        drain_timeout = float(data.get("drain_timeout", RESET_DRAIN_TIMEOUT))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'drain_timeout' non valido"}), 400
+    if not 0 <= drain_timeout <= RESET_MAX_DRAIN_TIMEOUT:
+        return jsonify({"error": f"'drain_timeout' deve essere tra 0 e {RESET_MAX_DRAIN_TIMEOUT} s"}), 400
+    report, running = reset_network(hosts, bool(data.get("flows", True)), drain_timeout)
+    if report is None:
+        if running:
+            return jsonify({"error": "Esperimenti in corso: /reset terminerebbe i loro iperf3", "running": running}), 409
+        return jsonify({"error": "Reset della rete già in corso"}), 409
+    return jsonify(report), 200 if report["ready"] else 503
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    # throughput previsto dal modello analitico (throughput_model.py), senza eseguire iperf3:
+    # {"hosts": {...}} come /start_experiment -> dettaglio per host e per fase;
+    # {"configs": [{...}, ...]} -> throughput medio per host di ogni configurazione (valutazione vettoriale)
+    data = request.get_json(silent=True)
+    if not data or ("hosts" not in data and "configs" not in data):
+        return jsonify({"error": "Devi fornire 'hosts' o 'configs'"}), 400
+    weight = data.get("weight", "delay")
+    if weight not in WEIGHTS:
+        return jsonify({"error": f"'weight' deve essere uno tra {', '.join(WEIGHTS)}"}), 400
+    configs = [data["hosts"]] if "hosts" in data else data["configs"]
+    if not isinstance(configs, list) or not all(isinstance(c, dict) for c in configs):
+        return jsonify({"error": "'configs' deve essere una lista di configurazioni host"}), 400
+    for cfg in configs:
+        invalid = validate_host_configs(cfg)
+        if invalid:
+            return jsonify({"error": invalid}), 400
+    try:
+        model = throughput_model(weight)
+    except Exception as e:
+        app.logger.error(f"/predict: modello non disponibile ({e})")
+        return jsonify({"error": f"Modello di throughput non disponibile: {e}"}), 503
+    try:
+        if "hosts" in data:
+            return jsonify(model.predict(prediction_configs(data["hosts"])))
+        t0 = time.perf_counter()
+        scores = model.score([prediction_configs(cfg) for cfg in configs])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"server": model.server, "weight": weight, "hosts": model.hosts, "throughput": scores,
+                    "elapsed_ms": round((time.perf_counter() - t0) * 1e3, 3)})
+
+@app.route("/experiment_stream", methods=["GET"])
+def experiment_stream():
+    # Server-Sent Events: un evento "interval" per ogni campione iperf3, "end" a fine esperimento
+    experiment_id = request.args.get("experiment_id")
+    try:
+        last = int(request.headers.get("Last-Event-ID") or request.args.get("since", interval_hub.last_seq))
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID/since non valido"}), 400
+    def generate(last):
+        yield "retry: 2000\n\n"
+        while True:
+            events = interval_hub.wait(last, experiment_id, timeout=SSE_KEEPALIVE)
+            if not events:
+                if experiment_id and not experiment_running(experiment_id):
+                    return  # "end" gia' inviato prima della connessione, o esperimento sconosciuto
+                yield ": keepalive\n\n"
+                continue
+            for seq, exp_id, hostname, kind, payload in events:
+                last = seq
+                data = dict(payload, experiment_id=exp_id, hostname=hostname)
+                yield f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+                if experiment_id and kind == "end":
+                    # stream di un solo esperimento: chiuso a fine esperimento, libera il thread
+                    return
+    return Response(stream_with_context(generate(last)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route("/hosts", methods=["GET"])
 def list_hosts():
@@ -389,14 +1196,77 @@ def list_hosts():
 
 @app.route("/stop_experiment", methods=["POST"])
 def stop_experiment():
-    with state_lock:
-        if not experiment_state["running"]:
-            return jsonify({"error": "Nessun esperimento in corso"}), 400
-        experiment_state["running"] = False
-        proc = experiment_state.get("iperf_server_process")
-        experiment_state["iperf_server_process"] = None
-    stop_iperf_server(proc)
-    return jsonify({"status": "stopped"})
+    # experiment_id (query o body JSON) ferma un solo esperimento, altrimenti tutti quelli in corso
+    data = request.get_json(silent=True) or {}
+    experiment_id = request.args.get("experiment_id") or data.get("experiment_id")
+    stopped = stop_experiments(experiment_id)
+    if not stopped:
+        return jsonify({"error": "Nessun esperimento in corso"}), 400
+    return jsonify({"status": "stopped", "experiments": stopped})
+
+@app.route("/sweeps", methods=["POST"])
+def create_sweep():
+    # matrice protocol x bitrate x duration_per_host eseguita da `concurrency` worker
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Devi fornire la specifica dello sweep"}), 400
+    try:
+        points = expand_matrix(data)
+    except SweepError as e:
+        return jsonify({"error": str(e)}), 400
+    for point in points:
+        invalid = validate_host_configs(point["host_configs"])
+        if invalid:
+            return jsonify({"error": invalid}), 400
+    if data.get("prescreen"):
+        invalid = validate_prescreen(data["prescreen"])
+        if invalid:
+            return jsonify({"error": invalid}), 400
+        try:
+            throughput_model(data["prescreen"].get("weight", "delay"))
+        except Exception as e:
+            return jsonify({"error": f"Modello di throughput non disponibile: {e}"}), 503
+    try:
+        sweep = sweep_manager.create(data)
+    except ValueError as e:
+        # es. bitrate non interpretabile dal modello di prescreen
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"status": "started", "sweep_id": sweep.sweep_id, "points": len(sweep.points)}), 202
+
+@app.route("/sweeps", methods=["GET"])
+def list_sweeps():
+    return jsonify({"sweeps": sweep_manager.list()})
+
+@app.route("/sweeps/<sweep_id>", methods=["GET"])
+def sweep_status(sweep_id):
+    sweep = sweep_manager.get(sweep_id)
+    if sweep is None:
+        return jsonify({"error": f"Sweep {sweep_id} sconosciuto"}), 404
+    return jsonify(sweep.describe(with_points=True))
+
+@app.route("/sweeps/<sweep_id>/stop", methods=["POST"])
+def stop_sweep(sweep_id):
+    if sweep_manager.get(sweep_id) is None:
+        return jsonify({"error": f"Sweep {sweep_id} sconosciuto"}), 404
+    if not sweep_manager.stop(sweep_id):
+        return jsonify({"error": f"Sweep {sweep_id} non in esecuzione"}), 400
+    return jsonify({"status": "stopping", "sweep_id": sweep_id})
+
+@app.route("/sweeps/<sweep_id>/resume", methods=["POST"])
+def resume_sweep(sweep_id):
+    if sweep_manager.get(sweep_id) is None:
+        return jsonify({"error": f"Sweep {sweep_id} sconosciuto"}), 404
+    if not sweep_manager.resume(sweep_id):
+        return jsonify({"error": f"Sweep {sweep_id} gia' in esecuzione o completato"}), 400
+    return jsonify({"status": "resumed", "sweep_id": sweep_id})
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    if not metrics.ENABLED:
+        return jsonify({"error": "Metriche disattivate (METRICS=0)"}), 404
+    openmetrics = "application/openmetrics-text" in request.headers.get("Accept", "")
+    return Response(metrics.render(openmetrics),
+                    content_type=metrics.OPENMETRICS_CONTENT_TYPE if openmetrics else metrics.PROMETHEUS_CONTENT_TYPE)
 
 @app.route("/health", methods=["GET"])
 def health():
@@ -405,14 +1275,35 @@ def health():
 def signal_handler(sig, frame):
     app.logger.info("Ricevuto segnale, fermo esperimento e chiudo")
     with state_lock:
-        proc = experiment_state.get("iperf_server_process")
-        experiment_state["running"] = False
-        experiment_state["iperf_server_process"] = None
-    stop_iperf_server(proc)
+        procs = [(st["iperf_server"], st["port"]) for st in running_experiments()]
+    stop_experiments()
+    for proc, port in procs:
+        stop_iperf_server(proc, port)
+    if ns_executor is not None:
+        ns_executor.close()
+    if telemetry is not None:
+        telemetry.stop()
+    if resource_sampler is not None:
+        resource_sampler.stop()
+    results_store.close()
+    results_analytics.close()
     sys.exit(0)
 
+def startup():
+    # avvio del processo che possiede gli esperimenti (server_flask.py da solo oppure runner.py)
+    migrated = migrate_legacy(LEGACY_JSON_RESULTS, JSON_RESULTS)
+    if migrated:
+        app.logger.info(f"Migrati {migrated} risultati da {LEGACY_JSON_RESULTS} a {JSON_RESULTS}")
+    results_store.open()
+    results_analytics.open(results_store)
+    # gli sweep interrotti da un riavvio riprendono dai punti non ancora completati
+    sweep_manager.load_all()
+    start_telemetry()
+    start_resource_sampler()
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
     signal.signal(signal.SIGINT, signal_handler)
+    startup()
     app.logger.info("Avvio Experiment Controller Flask (solo JSON, nessun DB SQLite)")
     app.run(host="0.0.0.0", port=5000, debug=False)
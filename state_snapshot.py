@@ -0,0 +1,56 @@
+import threading
+
+# Istantanee immutabili del registro degli esperimenti per gli endpoint di polling.
+# Chi modifica il registro (con state_lock acquisito) pubblica una nuova istantanea:
+# l'assegnazione di `current` e' atomica, quindi i lettori non prendono mai
+# state_lock. Ogni istantanea ha un numero di versione crescente e conserva le
+# risposte gia' serializzate, calcolate una sola volta per versione; il long-poll
+# (`wait`) attende una versione successiva a quella nota al client.
+
+
+class Snapshot:
+    """Stato pubblicato: `entries` = {experiment_id: {"summary": dict, "results": tuple}}
+    in ordine di avvio. Il contenuto non va modificato."""
+
+    __slots__ = ("version", "entries", "running", "_cache")
+
+    def __init__(self, version: int, entries: dict):
+        self.version = version
+        self.entries = entries
+        self.running = tuple(k for k, e in entries.items() if e["summary"]["running"])
+        self._cache = {}
+
+    def latest(self):
+        return self.entries[next(reversed(self.entries))] if self.entries else None
+
+    def serialized(self, key, build) -> str:
+        # piu' richieste concorrenti possono costruire la stessa risposta: il risultato e' identico
+        body = self._cache.get(key)
+        if body is None:
+            body = self._cache[key] = build(self)
+        return body
+
+
+class StatePublisher:
+    def __init__(self):
+        self.current = Snapshot(0, {})
+        self._cond = threading.Condition()
+
+    def publish(self, order, updates: dict) -> Snapshot:
+        """Nuova istantanea con gli esperimenti in `order`; per quelli in `updates` la voce
+        nuova, per gli altri quella dell'istantanea precedente. Da chiamare serializzati."""
+        prev = self.current.entries
+        snap = Snapshot(self.current.version + 1, {k: updates[k] if k in updates else prev[k] for k in order})
+        self.current = snap
+        with self._cond:
+            self._cond.notify_all()
+        return snap
+
+    def wait(self, since_version: int, timeout: float) -> Snapshot:
+        """Prima istantanea con versione > `since_version`, o la corrente allo scadere di `timeout`."""
+        snap = self.current
+        if snap.version > since_version or timeout <= 0:
+            return snap
+        with self._cond:
+            self._cond.wait_for(lambda: self.current.version > since_version, timeout)
+        return self.current
@@ -0,0 +1,324 @@
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+from adaptive_timing import parse_config as parse_adaptive
+
+# Sweep di esperimenti: una matrice di parametri (protocollo, bitrate, durata
+# per host) viene espansa in punti e salvata in un journal JSONL per sweep
+# (`<dir>/<sweep_id>.jsonl`). Ogni punto completato e' registrato nel journal,
+# cosi' dopo un riavvio vengono eseguiti solo i punti mancanti.
+
+
+class SweepError(ValueError):
+    pass
+
+
+def point_id(host_configs: dict, duration_per_host: int) -> str:
+    raw = json.dumps({"hosts": host_configs, "duration_per_host": duration_per_host}, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def expand_matrix(spec: dict) -> list:
+    """Prodotto cartesiano di protocol x bitrate x duration_per_host.
+
+    Ogni punto applica lo stesso protocollo/bitrate a tutti gli host in `hosts`;
+    `per_host` permette valori fissi diversi per singoli host. `adaptive` (come
+    in /start_experiment) e `reset` (/reset prima di ogni punto) valgono per
+    tutti i punti e non cambiano il point_id."""
+    hosts = spec.get("hosts")
+    if not hosts or not isinstance(hosts, list):
+        raise SweepError("'hosts' deve essere una lista non vuota")
+    axes = {}
+    for key in ("protocol", "bitrate", "duration_per_host"):
+        values = spec.get(key)
+        if values is None:
+            raise SweepError(f"Manca l'asse '{key}'")
+        axes[key] = values if isinstance(values, list) else [values]
+        if not axes[key]:
+            raise SweepError(f"L'asse '{key}' e' vuoto")
+    overrides = spec.get("per_host") or {}
+    if not isinstance(overrides, dict):
+        raise SweepError("'per_host' deve essere un oggetto {host: {parametro: valore}}")
+    for h, cfg in overrides.items():
+        if h not in hosts:
+            raise SweepError(f"'per_host' contiene l'host {h}, assente da 'hosts'")
+        if not isinstance(cfg, dict):
+            raise SweepError(f"'per_host.{h}' deve essere un oggetto {{parametro: valore}}")
+    adaptive = spec.get("adaptive")
+    points = []
+    for protocol, bitrate, duration in itertools.product(axes["protocol"], axes["bitrate"], axes["duration_per_host"]):
+        if str(protocol).upper() not in ("TCP", "UDP"):
+            raise SweepError(f"Protocollo non valido: {protocol}")
+        if not isinstance(duration, int) or duration <= 0:
+            raise SweepError(f"duration_per_host non valida: {duration}")
+        try:
+            parse_adaptive(adaptive, duration)
+        except ValueError as e:
+            raise SweepError(str(e))
+        host_configs = {}
+        for h in hosts:
+            cfg = {"protocol": str(protocol).upper(), "bitrate": str(bitrate)}
+            cfg.update(overrides.get(h, {}))
+            host_configs[h] = cfg
+        point = {
+            "point_id": point_id(host_configs, duration),
+            "host_configs": host_configs,
+            "duration_per_host": duration,
+            "params": {"protocol": str(protocol).upper(), "bitrate": str(bitrate), "duration_per_host": duration},
+        }
+        if adaptive:
+            point["adaptive"] = adaptive
+        if spec.get("reset"):
+            point["reset"] = True
+        points.append(point)
+    # punti identici (es. valori ripetuti nella matrice) sono eseguiti una sola volta
+    unique = {}
+    for p in points:
+        unique.setdefault(p["point_id"], p)
+    return list(unique.values())
+
+
+class Sweep:
+    def __init__(self, sweep_id: str, spec: dict, points: list, journal: str):
+        self.sweep_id = sweep_id
+        self.spec = spec
+        self.points = points
+        self.journal = journal
+        self.concurrency = max(1, int(spec.get("concurrency", 1)))
+        self.done = {}          # point_id -> record di completamento
+        self.running = {}       # point_id -> experiment_id
+        self.status = "queued"
+        self.created = time.time()
+        self.resumed_at = None
+        self.durations = []     # durata (s) dei punti completati in questa esecuzione
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def record(self, entry: dict):
+        with self.lock:
+            with open(self.journal, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def pending(self) -> list:
+        # i punti `skipped` (previsione gia' nota, vedi SweepManager.prescreen) non vengono eseguiti
+        return [p for p in self.points if p["point_id"] not in self.done and not p.get("skipped")]
+
+    def metrics(self) -> dict:
+        with self.lock:
+            completed = len(self.done)
+            skipped = sum(1 for p in self.points if p.get("skipped") and p["point_id"] not in self.done)
+            remaining = len(self.points) - completed - skipped
+            durations = list(self.durations)
+            saved = [e["saved_seconds"] for e in self.done.values() if e.get("saved_seconds") is not None]
+            elapsed = time.time() - self.resumed_at if self.resumed_at else 0.0
+        avg = sum(durations) / len(durations) if durations else None
+        eta = remaining * avg / self.concurrency if avg is not None else None
+        return {
+            "total_points": len(self.points),
+            "completed_points": completed,
+            "remaining_points": remaining,
+            "skipped_points": skipped,
+            "running_points": len(self.running),
+            "avg_point_seconds": round(avg, 2) if avg is not None else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "points_per_hour": round(len(durations) * 3600.0 / elapsed, 2) if elapsed > 0 and durations else None,
+            # tempo risparmiato dalle fasi adattive rispetto agli offset fissi, sui punti completati
+            "saved_seconds": round(sum(saved), 1) if saved else None,
+        }
+
+    def describe(self, with_points: bool = False) -> dict:
+        info = {
+            "sweep_id": self.sweep_id,
+            "status": self.status,
+            "concurrency": self.concurrency,
+            "created": self.created,
+            "metrics": self.metrics(),
+        }
+        if with_points:
+            info["points"] = [
+                dict(p["params"], point_id=p["point_id"],
+                     state="done" if p["point_id"] in self.done else "running" if p["point_id"] in self.running
+                     else "skipped" if p.get("skipped") else "pending",
+                     predicted=p.get("predicted"), gain=p.get("gain"),
+                     experiment_id=(self.done.get(p["point_id"]) or {}).get("experiment_id") or self.running.get(p["point_id"]),
+                     saved_seconds=(self.done.get(p["point_id"]) or {}).get("saved_seconds"))
+                for p in self.points
+            ]
+        return info
+
+
+class SweepManager:
+    """Coda persistente dei punti di ogni sweep, eseguiti da `concurrency` worker.
+
+    `run_point(sweep_id, point, on_start)` esegue un punto in modo bloccante e
+    ritorna (experiment_id, completato, info); experiment_id e' None se l'esperimento
+    non e' stato ammesso, `info` (es. saved_seconds) finisce nel record del punto.
+    `stop_experiment(experiment_id)` ferma un esperimento.
+    `prescreen(spec, points)`, se presente, riordina i punti di un nuovo sweep
+    (es. per guadagno informativo previsto) e puo' marcarne alcuni `skipped`."""
+
+    def __init__(self, directory: str, run_point, stop_experiment, logger=None, retry_delay: float = 2.0, prescreen=None):
+        self.directory = directory
+        self.prescreen = prescreen
+        self.run_point = run_point
+        self.stop_experiment = stop_experiment
+        self.logger = logger
+        self.retry_delay = retry_delay
+        self.sweeps = {}
+        self._lock = threading.Lock()
+
+    def _log(self, msg):
+        if self.logger is not None:
+            self.logger.info(msg)
+
+    def create(self, spec: dict) -> Sweep:
+        points = expand_matrix(spec)
+        if self.prescreen is not None:
+            points = self.prescreen(spec, points)
+        os.makedirs(self.directory, exist_ok=True)
+        sweep_id = f"sweep_{int(time.time() * 1000)}"
+        sweep = Sweep(sweep_id, spec, points, os.path.join(self.directory, f"{sweep_id}.jsonl"))
+        sweep.record({"type": "sweep", "sweep_id": sweep_id, "spec": spec, "points": points, "created": sweep.created})
+        with self._lock:
+            self.sweeps[sweep_id] = sweep
+        self._start(sweep)
+        return sweep
+
+    def load_all(self, autostart: bool = True):
+        """Ricarica i journal: gli sweep non conclusi ripartono dai punti mancanti."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".jsonl"):
+                continue
+            sweep = self._load(os.path.join(self.directory, name))
+            if sweep is None:
+                continue
+            with self._lock:
+                self.sweeps[sweep.sweep_id] = sweep
+            if autostart and sweep.status not in ("completed", "stopped"):
+                self._log(f"Ripresa sweep {sweep.sweep_id}: {len(sweep.pending())} punti mancanti")
+                self._start(sweep)
+
+    def _load(self, path):
+        sweep = None
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                kind = entry.get("type")
+                if kind == "sweep":
+                    sweep = Sweep(entry["sweep_id"], entry["spec"], entry["points"], path)
+                    sweep.created = entry.get("created", sweep.created)
+                elif sweep is None:
+                    continue
+                elif kind == "done":
+                    sweep.done[entry["point_id"]] = entry
+                elif kind == "status":
+                    sweep.status = entry["status"]
+        if sweep is not None and not sweep.pending():
+            sweep.status = "completed"
+        return sweep
+
+    def _set_status(self, sweep: Sweep, status: str):
+        sweep.status = status
+        sweep.record({"type": "status", "status": status, "ts": time.time()})
+
+    def _start(self, sweep: Sweep):
+        sweep.stop_event.clear()
+        sweep.resumed_at = time.time()
+        sweep.durations = []
+        work = queue.Queue()
+        for p in sweep.pending():
+            work.put(p)
+        sweep.status = "running"
+        workers = [
+            threading.Thread(target=self._worker, args=(sweep, work), name=f"{sweep.sweep_id}_w{i}", daemon=True)
+            for i in range(min(sweep.concurrency, max(1, work.qsize())))
+        ]
+        for w in workers:
+            w.start()
+        threading.Thread(target=self._supervise, args=(sweep, workers), name=f"{sweep.sweep_id}_sup", daemon=True).start()
+
+    def _supervise(self, sweep: Sweep, workers: list):
+        for w in workers:
+            w.join()
+        if sweep.stop_event.is_set():
+            self._set_status(sweep, "stopped")
+        elif not sweep.pending():
+            self._set_status(sweep, "completed")
+            self._log(f"Sweep {sweep.sweep_id} completato")
+        else:
+            sweep.status = "incomplete"
+
+    def _worker(self, sweep: Sweep, work: queue.Queue):
+        while not sweep.stop_event.is_set():
+            try:
+                point = work.get_nowait()
+            except queue.Empty:
+                return
+            pid = point["point_id"]
+            t0 = time.time()
+
+            def on_start(experiment_id, pid=pid):
+                with sweep.lock:
+                    sweep.running[pid] = experiment_id
+
+            experiment_id, completed, info = self.run_point(sweep.sweep_id, point, on_start)
+            with sweep.lock:
+                sweep.running.pop(pid, None)
+            if experiment_id is None:
+                # nessuno slot libero (limite di ammissione): ritento lo stesso punto
+                work.put(point)
+                sweep.stop_event.wait(self.retry_delay)
+                continue
+            if not completed:
+                # fermato o fallito: il punto resta da eseguire alla prossima ripresa
+                self._log(f"Sweep {sweep.sweep_id}: punto {pid} non completato ({experiment_id})")
+                continue
+            elapsed = time.time() - t0
+            with sweep.lock:
+                sweep.durations.append(elapsed)
+            entry = {"type": "done", "point_id": pid, "experiment_id": experiment_id, "seconds": round(elapsed, 2), "ts": time.time()}
+            entry.update(info)
+            sweep.record(entry)
+            with sweep.lock:
+                sweep.done[pid] = entry
+
+    def stop(self, sweep_id: str) -> bool:
+        sweep = self.get(sweep_id)
+        if sweep is None or sweep.status != "running":
+            return False
+        sweep.stop_event.set()
+        with sweep.lock:
+            running = list(sweep.running.values())
+        for experiment_id in running:
+            if experiment_id:
+                self.stop_experiment(experiment_id)
+        return True
+
+    def resume(self, sweep_id: str) -> bool:
+        sweep = self.get(sweep_id)
+        if sweep is None or sweep.status in ("running", "completed"):
+            return False
+        self._set_status(sweep, "running")
+        self._start(sweep)
+        return True
+
+    def get(self, sweep_id: str):
+        with self._lock:
+            return self.sweeps.get(sweep_id)
+
+    def list(self) -> list:
+        with self._lock:
+            sweeps = list(self.sweeps.values())
+        return [s.describe() for s in sweeps]
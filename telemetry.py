@@ -0,0 +1,248 @@
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Telemetria lato controller: un thread interroga periodicamente ofctl_rest di Ryu
+# (GET /stats/port/<dpid>, GET /stats/flow/<dpid>) per ogni router/switch e salva
+# le differenze tra due letture consecutive dei contatori in ring buffer a memoria
+# fissa, uno per porta e uno per datapath. Le finestre temporali degli esperimenti
+# sono poi riassunte per link: utilizzo, pacchetti scartati e perdita tra i due capi.
+
+PORT_FIELDS = ("ts", "dt", "rx_bytes", "tx_bytes", "rx_packets", "tx_packets",
+               "rx_dropped", "tx_dropped", "rx_errors", "tx_errors")
+PORT_COUNTERS = PORT_FIELDS[2:]
+FLOW_FIELDS = ("ts", "dt", "packets", "bytes")
+
+
+def dpid_int(name: str) -> int:
+    # stessa numerazione di ryu_routing.dpid_of (r1 -> 1, s1 -> 1), in decimale per ofctl_rest
+    return int(name[1:])
+
+
+class DeltaRing:
+    """Ultimi `capacity` campioni di `fields` float in un unico array. L'array
+    raddoppia finche' non raggiunge `capacity` righe, poi resta fisso: una porta
+    letta per poco tempo non occupa l'intera capacita'."""
+
+    INITIAL_ROWS = 64
+
+    def __init__(self, fields, capacity: int):
+        self.fields = fields
+        self.capacity = capacity
+        self._width = len(fields)
+        self._rows = min(capacity, self.INITIAL_ROWS)
+        self._data = array("d", bytes(8 * self._rows * self._width))
+        self.written = 0
+
+    def append(self, values):
+        if self.written == self._rows < self.capacity:
+            # prima del primo giro: gli indici restano lineari, basta estendere l'array
+            grow = min(self._rows, self.capacity - self._rows)
+            self._data.frombytes(bytes(8 * grow * self._width))
+            self._rows += grow
+        i = (self.written % self.capacity) * self._width
+        self._data[i:i + self._width] = array("d", values)
+        self.written += 1
+
+    def rows(self):
+        n = min(self.written, self.capacity)
+        first = self.written - n
+        for k in range(first, self.written):
+            i = (k % self.capacity) * self._width
+            yield self._data[i:i + self._width]
+
+    def window(self, start: float, end: float) -> dict:
+        """Somma dei campioni con ts in (start, end]; 'samples' = numero di campioni."""
+        sums = [0.0] * self._width
+        n = 0
+        for row in self.rows():
+            if start < row[0] <= end:
+                n += 1
+                for j in range(1, self._width):
+                    sums[j] += row[j]
+        out = dict(zip(self.fields[1:], sums[1:]))
+        out["samples"] = n
+        return out
+
+
+class TelemetryCollector:
+    """`targets` = {nodo: URL base di Ryu}; `port_map` = Topology.port_map()."""
+
+    def __init__(self, targets: dict, port_map: dict, interval: float = 1.0, ring_size: int = 3600,
+                 timeout: float = 2.0, workers: int = 8, logger=None):
+        self.targets = targets
+        self.port_map = port_map
+        self.interval = interval
+        self.ring_size = ring_size
+        self.timeout = timeout
+        self.logger = logger
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(pool_maxsize=workers))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._lock = threading.Lock()
+        self._port_last = {}   # (nodo, porta) -> (ts, contatori)
+        self._port_rings = {}
+        self._flow_last = {}   # nodo -> (ts, {flusso: (pacchetti, byte)})
+        self._flow_rings = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + self.interval)
+            self._thread = None
+        self._pool.shutdown(wait=False)
+
+    def _run(self):
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - t0)))
+
+    def poll_once(self):
+        list(self._pool.map(self._poll_node, list(self.targets)))
+        self.polls += 1
+
+    def _get(self, node, kind):
+        dpid = dpid_int(node)
+        r = self._session.get(f"{self.targets[node]}/stats/{kind}/{dpid}", timeout=self.timeout)
+        r.raise_for_status()
+        return r.json().get(str(dpid), [])
+
+    def _poll_node(self, node):
+        try:
+            ports = self._get(node, "port")
+            ts = time.time()
+            flows = self._get(node, "flow")
+            ts_flow = time.time()
+        except (requests.RequestException, ValueError) as e:
+            self.errors += 1
+            self.last_error = f"{node}: {e}"
+            return
+        with self._lock:
+            for p in ports:
+                port_no = p.get("port_no")
+                if not isinstance(port_no, int):
+                    continue  # porta LOCAL
+                self._port_delta((node, port_no), ts, tuple(float(p.get(c, 0)) for c in PORT_COUNTERS))
+            counters = {}
+            for f in flows:
+                key = (f.get("table_id"), f.get("priority"), repr(sorted((f.get("match") or {}).items())))
+                counters[key] = (float(f.get("packet_count", 0)), float(f.get("byte_count", 0)))
+            self._flow_delta(node, ts_flow, counters)
+
+    def _port_delta(self, key, ts, values):
+        # da chiamare con _lock acquisito
+        prev = self._port_last.get(key)
+        self._port_last[key] = (ts, values)
+        if prev is None:
+            return
+        deltas = [cur - old for cur, old in zip(values, prev[1])]
+        if any(d < 0 for d in deltas):
+            return  # contatori azzerati (switch riavviato): nuova base
+        ring = self._port_rings.get(key)
+        if ring is None:
+            ring = self._port_rings[key] = DeltaRing(PORT_FIELDS, self.ring_size)
+        ring.append([ts, ts - prev[0]] + deltas)
+
+    def _flow_delta(self, node, ts, counters):
+        # da chiamare con _lock acquisito; i flussi nuovi contano dall'inizio, quelli rimossi sono ignorati
+        prev = self._flow_last.get(node)
+        self._flow_last[node] = (ts, counters)
+        if prev is None:
+            return
+        packets = nbytes = 0.0
+        for key, (pk, by) in counters.items():
+            old = prev[1].get(key, (0.0, 0.0))
+            if pk >= old[0]:
+                packets += pk - old[0]
+                nbytes += by - old[1]
+        ring = self._flow_rings.get(node)
+        if ring is None:
+            ring = self._flow_rings[node] = DeltaRing(FLOW_FIELDS, self.ring_size)
+        ring.append((ts, ts - prev[0], packets, nbytes))
+
+    def reset_baseline(self):
+        """Le prossime letture diventano la nuova base (nessun delta con quelle precedenti)."""
+        with self._lock:
+            self._port_last.clear()
+            self._flow_last.clear()
+
+    def summary(self, start: float, end: float) -> dict:
+        """Utilizzo, scarti e perdita per link nella finestra (start, end]."""
+        with self._lock:
+            ports = {key: ring.window(start, end) for key, ring in self._port_rings.items()}
+            flows = {node: ring.window(start, end) for node, ring in self._flow_rings.items()}
+            active = {node: len(last[1]) for node, last in self._flow_last.items()}
+        port_out = {}
+        links = {}
+        for (node, port_no), w in sorted(ports.items()):
+            info = self.port_map.get((node, port_no), {})
+            dt = w["dt"]
+            bw = info.get("bw")
+            tx_bps = w["tx_bytes"] * 8 / dt if dt else None
+            rx_bps = w["rx_bytes"] * 8 / dt if dt else None
+            entry = {
+                "link": info.get("link"),
+                "peer": info.get("peer"),
+                "samples": w["samples"],
+                "tx_bps": tx_bps,
+                "rx_bps": rx_bps,
+                "tx_utilization": tx_bps / (bw * 1e6) if tx_bps is not None and bw else None,
+                "tx_packets": w["tx_packets"],
+                "rx_packets": w["rx_packets"],
+                "tx_dropped": w["tx_dropped"],
+                "rx_dropped": w["rx_dropped"],
+                "tx_errors": w["tx_errors"],
+                "rx_errors": w["rx_errors"],
+            }
+            port_out[f"{node}:{port_no}"] = entry
+            if info.get("link"):
+                direction = {"from": node, "to": info["peer"], "bps": tx_bps, "utilization": entry["tx_utilization"],
+                             "tx_packets": w["tx_packets"], "dropped": w["tx_dropped"] + w["tx_errors"]}
+                peer = ports.get((info["peer"], info["peer_port"]))
+                if peer is not None and w["tx_packets"]:
+                    # pacchetti trasmessi da un capo e non ricevuti dall'altro (approssimato:
+                    # le letture dei due switch non sono simultanee)
+                    lost = max(0.0, w["tx_packets"] - peer["rx_packets"])
+                    direction["loss_rate"] = lost / w["tx_packets"]
+                link = links.setdefault(info["link"], {"link": info["link"], "bw_mbps": bw, "directions": []})
+                link["directions"].append(direction)
+        for link in links.values():
+            util = [d["utilization"] for d in link["directions"] if d["utilization"] is not None]
+            link["max_utilization"] = max(util) if util else None
+            link["dropped"] = sum(d["dropped"] for d in link["directions"])
+        flow_out = {node: {"packets": w["packets"], "bytes": w["bytes"],
+                           "pps": w["packets"] / w["dt"] if w["dt"] else None,
+                           "flows": active.get(node)}
+                    for node, w in flows.items()}
+        return {
+            "window": {"start": start, "end": end},
+            "links": sorted(links.values(), key=lambda l: -(l["max_utilization"] or 0)),
+            "ports": port_out,
+            "flows": flow_out,
+            "collector": self.status(),
+        }
+
+    def status(self) -> dict:
+        return {
+            "targets": len(self.targets),
+            "interval": self.interval,
+            "ring_size": self.ring_size,
+            "polls": self.polls,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,280 @@
+import math
+
+from live_stream import UNIT
+from topology_spec import Topology, delay_ms
+
+# numpy è opzionale: se presente migliaia di configurazioni sono valutate in
+# un'unica passata vettoriale, altrimenti una configurazione alla volta in Python puro
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Modello analitico del throughput di un esperimento, senza eseguire iperf3.
+# Ogni client e' un flusso host -> server iperf3 sul cammino scelto da
+# ryu_routing.py (compile_routes: cammino minimo con la stessa metrica); i link
+# sono quelli della specifica (host, uplink degli switch, link tra router) con
+# la loro banda, e la banda si divide con max-min fairness (progressive filling):
+#   - TCP e' elastico, limitato solo dalla finestra: TCP_WINDOW_BYTES / RTT;
+#   - UDP chiede il suo bitrate e non supera mai la richiesta.
+# Le bande sono a livello 2 (tc htb su TCLink): il goodput riportato da iperf3 e'
+# ridotto del peso delle intestazioni. La sequenza di un esperimento attiva un
+# host ogni EXPERIMENT_DURATION_PER_HOST secondi: la fase j ha attivi i primi j+1
+# host (in ordine di nome) e il throughput previsto di un host e' la media delle
+# fasi in cui il suo client e' attivo, come il risultato misurato.
+
+TCP_WINDOW_BYTES = 4 * 1024 * 1024  # massimo di net.ipv4.tcp_rmem (autotuning)
+MIN_RTT_MS = 0.01
+# payload / frame Ethernet: TCP con MSS 1448 (timestamp), UDP con blocchi iperf3 da 1460 byte
+GOODPUT = {"TCP": 1448 / 1514, "UDP": 1460 / 1502}
+EPS = 1e-9
+
+
+def parse_bitrate(value) -> float:
+    """'10M' / '500K' / 1e6 (bit/s, come iperf3 -b) -> Mbit/s."""
+    text = str(value).strip()
+    unit = text[-1].upper() if text and text[-1].upper() in UNIT else ""
+    try:
+        rate = float(text[:-1] if unit else text) * UNIT[unit]
+    except ValueError:
+        raise ValueError(f"Bitrate non valido: {value}")
+    if rate <= 0:
+        raise ValueError(f"Bitrate non valido: {value}")
+    return rate / 1e6
+
+
+class ThroughputModel:
+    """Cammini e capacita' dei flussi verso `server` nella topologia `topo`."""
+
+    def __init__(self, topo: Topology, server: str, weight: str = "delay"):
+        self.topo = topo
+        self.server = server
+        self.weight = weight
+        hosts = topo.hosts()
+        if server not in hosts:
+            raise ValueError(f"Host server {server} non presente nella specifica")
+        self.hosts = sorted(h for h in hosts if h != server)
+        self.column = {h: i for i, h in enumerate(self.hosts)}
+        self._lan = {h: lan for lan in topo.lans for h in lan.get("hosts", {})}
+        self._next_hop = {r: {dst: hop for dst, (hop, _) in topo.first_hops(r, weight).items()} for r in topo.routers}
+        self.links, capacity, paths, delays = {}, [], [], []
+        for h in self.hosts:
+            path, delay = [], 0.0
+            for a, b, bw, d in self._hops(h):
+                key = f"{a}-{b}"
+                if key not in self.links:
+                    self.links[key] = len(capacity)
+                    capacity.append(float(bw) if bw else math.inf)
+                path.append(self.links[key])
+                delay += d
+            paths.append(path)
+            delays.append(delay)
+        self.link_names = list(self.links)
+        self.capacity = capacity
+        self.paths = paths
+        self.rtt_ms = [max(MIN_RTT_MS, 2 * d) for d in delays]
+        # richiesta massima di un flusso TCP (Mbit/s a livello 2)
+        self.tcp_demand = [TCP_WINDOW_BYTES * 8 / (rtt / 1e3) / 1e6 / GOODPUT["TCP"] for rtt in self.rtt_ms]
+        if np is not None:
+            self._incidence = np.zeros((len(capacity), len(self.hosts)))
+            for i, path in enumerate(paths):
+                self._incidence[path, i] = 1.0
+            self._capacity = np.array(capacity)
+
+    def _hops(self, host: str) -> list:
+        """Link attraversati da host verso il server: [(da, a, banda Mbit/s, ritardo ms)]."""
+        src, dst = self._lan[host], self._lan[self.server]
+        spec_src, spec_dst = src["hosts"][host], dst["hosts"][self.server]
+        hops = []
+        first = src.get("switch") or src["router"]
+        hops.append((host, first, spec_src.get("bw"), delay_ms(spec_src.get("delay", 0))))
+        if src.get("switch"):
+            uplink = src.get("uplink", {})
+            hops.append((first, src["router"], uplink.get("bw"), delay_ms(uplink.get("delay", 0))))
+        router = src["router"]
+        while router != dst["router"]:
+            if dst["router"] not in self._next_hop[router]:
+                raise ValueError(f"Nessun cammino da {host} a {self.server}")
+            nxt = self._next_hop[router][dst["router"]]
+            link = self.topo.adjacency[router][nxt]
+            hops.append((router, nxt, link["bw_mbps"], link["delay_ms"]))
+            router = nxt
+        if dst.get("switch"):
+            uplink = dst.get("uplink", {})
+            hops.append((router, dst["switch"], uplink.get("bw"), delay_ms(uplink.get("delay", 0))))
+            router = dst["switch"]
+        hops.append((router, self.server, spec_dst.get("bw"), delay_ms(spec_dst.get("delay", 0))))
+        return hops
+
+    def demands(self, host_configs: dict) -> tuple:
+        """host_configs (come /start_experiment) -> (host attivi in ordine di avvio,
+        {host: richiesta Mbit/s a livello 2}, {host: protocollo})."""
+        active, demand, proto = [], {}, {}
+        for h in sorted(host_configs):
+            if h == self.server:
+                continue
+            if h not in self.column:
+                raise ValueError(f"Host {h} non presente nella specifica")
+            cfg = host_configs[h]
+            p = str(cfg.get("protocol", "TCP")).upper()
+            if p not in GOODPUT:
+                raise ValueError(f"Protocollo non valido per {h} (TCP/UDP)")
+            if p == "UDP":
+                demand[h] = parse_bitrate(cfg.get("bitrate", "1M")) / GOODPUT["UDP"]
+            else:
+                demand[h] = self.tcp_demand[self.column[h]]
+            active.append(h)
+            proto[h] = p
+        return active, demand, proto
+
+    def fill(self, demand: dict) -> dict:
+        """Max-min fair share di un insieme di flussi attivi: {host: Mbit/s a livello 2}."""
+        rate = {h: 0.0 for h in demand}
+        residual = list(self.capacity)
+        free = {h for h, d in demand.items() if d > 0}
+        while free:
+            users = {}
+            for h in free:
+                for l in self.paths[self.column[h]]:
+                    users[l] = users.get(l, 0) + 1
+            inc = min([residual[l] / n for l, n in users.items()] + [demand[h] - rate[h] for h in free])
+            for h in free:
+                rate[h] += inc
+                for l in self.paths[self.column[h]]:
+                    residual[l] -= inc
+            full = {l for l in users if residual[l] <= EPS * max(1.0, self.capacity[l])}
+            free = {h for h in free if rate[h] < demand[h] - EPS and not full.intersection(self.paths[self.column[h]])}
+        return rate
+
+    def bottleneck(self, host: str, rate: dict, demand: dict):
+        """Link saturato (il primo sul cammino) che limita `host`, None se limitato dalla richiesta."""
+        if rate[host] >= demand[host] - EPS:
+            return None
+        load = {}
+        for h, r in rate.items():
+            for l in self.paths[self.column[h]]:
+                load[l] = load.get(l, 0.0) + r
+        for l in self.paths[self.column[host]]:
+            if load[l] >= self.capacity[l] * (1 - 1e-6):
+                return self.link_names[l]
+        return None
+
+    def predict(self, host_configs: dict) -> dict:
+        """Previsione dettagliata di un esperimento: fase per fase e media per host (Mbit/s di goodput)."""
+        active, demand, proto = self.demands(host_configs)
+        phases, per_host = [], {h: [] for h in active}
+        for j, h_new in enumerate(active):
+            current = {h: demand[h] for h in active[:j + 1]}
+            rate = self.fill(current)
+            goodput = {h: r * GOODPUT[proto[h]] for h, r in rate.items()}
+            phases.append({"host": h_new, "aggregate": round(sum(goodput.values()), 3),
+                           "throughput": {h: round(v, 3) for h, v in goodput.items()}})
+            for h, v in goodput.items():
+                per_host[h].append(v)
+        last = self.fill(demand) if active else {}
+        return {
+            "server": self.server,
+            "weight": self.weight,
+            "hosts": {h: {"protocol": proto[h], "throughput": round(sum(v) / len(v), 3),
+                          "steady_throughput": round(last[h] * GOODPUT[proto[h]], 3),
+                          "bottleneck": self.bottleneck(h, last, demand),
+                          "rtt_ms": round(self.rtt_ms[self.column[h]], 3)} for h, v in per_host.items()},
+            "phases": phases,
+        }
+
+    def score(self, configs: list) -> list:
+        """Throughput medio previsto (Mbit/s) di ogni host per ogni configurazione:
+        una riga per configurazione, colonne in self.hosts, None per gli host non attivi."""
+        if not configs:
+            return []
+        if np is None:
+            return [self._score_py(cfg) for cfg in configs]
+        n_hosts = len(self.hosts)
+        demand = np.zeros((len(configs), n_hosts))
+        goodput = np.ones((len(configs), n_hosts))
+        rank = np.full((len(configs), n_hosts), n_hosts)  # posizione nell'ordine di avvio
+        for p, cfg in enumerate(configs):
+            active, dem, proto = self.demands(cfg)
+            for pos, h in enumerate(active):
+                c = self.column[h]
+                demand[p, c], goodput[p, c], rank[p, c] = dem[h], GOODPUT[proto[h]], pos
+        n_active = (rank < n_hosts).sum(axis=1)
+        phase = np.arange(n_hosts)
+        # righe (configurazione, fase): attivi gli host avviati entro la fase
+        on = rank[:, None, :] <= phase[None, :, None]
+        rates = _fill_np(self._incidence, self._capacity, np.where(on, demand[:, None, :], 0.0).reshape(-1, n_hosts))
+        rates = rates.reshape(len(configs), n_hosts, n_hosts) * goodput[:, None, :]
+        weights = on & (phase[None, :, None] < n_active[:, None, None])
+        count = weights.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, (rates * weights).sum(axis=1) / count, np.nan)
+        return [[None if math.isnan(v) else round(float(v), 3) for v in row] for row in mean]
+
+    def _score_py(self, cfg: dict) -> list:
+        detail = self.predict(cfg)["hosts"]
+        return [detail[h]["throughput"] if h in detail else None for h in self.hosts]
+
+
+def _fill_np(incidence, capacity, demand):
+    """Progressive filling vettoriale: incidence (link x host), capacity (link),
+    demand (righe x host, 0 = flusso assente) -> rate (righe x host)."""
+    rate = np.zeros_like(demand)
+    free = demand > 0
+    scale = EPS * np.maximum(1.0, capacity)
+    for _ in range(demand.shape[1]):
+        if not free.any():
+            break
+        users = free.astype(float) @ incidence.T
+        residual = capacity - rate @ incidence.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(users > 0, residual / users, np.inf)
+        inc = np.minimum(share.min(axis=1), np.where(free, demand - rate, np.inf).min(axis=1))
+        inc = np.where(np.isfinite(inc), inc, 0.0)
+        rate += free * inc[:, None]
+        full = (capacity - rate @ incidence.T <= scale) & (users > 0)
+        free &= (full.astype(float) @ incidence == 0) & (rate < demand - EPS)
+    return rate
+
+
+def information_gain(vectors: list, known: list = ()) -> tuple:
+    """Ordine greedy dei punti per guadagno informativo previsto: ogni volta il
+    punto la cui previsione e' piu' lontana (distanza L1 relativa) da quelle gia'
+    scelte o gia' misurate (`known`). Ritorna (indici in ordine, guadagni): 1.0 =
+    nessun punto simile, 0.0 = previsione identica a un punto precedente."""
+    vectors = [[v or 0.0 for v in row] for row in vectors]
+    known = [[v or 0.0 for v in row] for row in known]
+    if np is not None and vectors:
+        points = np.array(vectors)
+
+        def distances(ref):
+            den = np.maximum(np.abs(points), np.abs(ref)).sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(den > 0, np.abs(points - ref).sum(axis=1) / den, 0.0)
+
+        nearest = np.ones(len(vectors))
+        for k in known:
+            nearest = np.minimum(nearest, distances(np.array(k)))
+        order, gains = [], []
+        taken = np.zeros(len(vectors), dtype=bool)
+        for _ in range(len(vectors)):
+            best = int(np.argmax(np.where(taken, -1.0, nearest)))
+            order.append(best)
+            gains.append(round(float(nearest[best]), 4))
+            taken[best] = True
+            nearest = np.minimum(nearest, distances(points[best]))
+        return order, gains
+
+    def distance(a, b):
+        den = sum(max(abs(x), abs(y)) for x, y in zip(a, b))
+        return sum(abs(x - y) for x, y in zip(a, b)) / den if den else 0.0
+
+    nearest = [min([distance(v, k) for k in known] + [1.0]) for v in vectors]
+    order, gains, left = [], [], set(range(len(vectors)))
+    while left:
+        best = max(left, key=lambda i: (nearest[i], -i))
+        order.append(best)
+        gains.append(round(nearest[best], 4))
+        left.discard(best)
+        for i in left:
+            nearest[i] = min(nearest[i], distance(vectors[i], vectors[best]))
+    return order, gains
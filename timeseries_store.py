@@ -0,0 +1,248 @@
+import math
+import os
+import struct
+import threading
+from array import array
+
+# numpy è opzionale: se presente i riepiloghi sono calcolati vettorialmente
+# direttamente sul file mappato in memoria, altrimenti in Python puro
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Archivio colonnare binario dei campioni per intervallo di iperf3.
+# Una directory per esperimento e un file per host:
+#   header (64 byte): magic, versione, numero colonne, capacita', campioni scritti
+#   COLUMNS blocchi contigui di `capacita'` float64 little-endian (NaN = assente)
+
+MAGIC = b"IPERFCOL"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+HEADER_SIZE = 64
+COLUMNS = ("ts", "bytes", "bits_per_second", "retransmits", "jitter_ms", "lost_packets")
+INITIAL_CAPACITY = 256
+NAN = float("nan")
+
+
+def _value(v):
+    return NAN if v is None else float(v)
+
+
+class ColumnWriter:
+    """Append di campioni su un file colonnare; la capacita' raddoppia quando serve."""
+
+    def __init__(self, path: str, capacity: int = INITIAL_CAPACITY):
+        self.path = path
+        if os.path.exists(path):
+            self._fd = os.open(path, os.O_RDWR)
+            _, _, _, self.capacity, self.count = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+        else:
+            self.capacity, self.count = capacity, 0
+            self._fd = self._create(path, capacity)
+
+    def _create(self, path, capacity):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(fd, HEADER_SIZE + len(COLUMNS) * capacity * 8)
+        os.pwrite(fd, HEADER.pack(MAGIC, VERSION, len(COLUMNS), capacity, 0), 0)
+        return fd
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        tmp = self.path + ".grow"
+        fd = self._create(tmp, capacity)
+        for i in range(len(COLUMNS)):
+            block = os.pread(self._fd, self.count * 8, HEADER_SIZE + i * self.capacity * 8)
+            os.pwrite(fd, block, HEADER_SIZE + i * capacity * 8)
+        os.pwrite(fd, HEADER.pack(MAGIC, VERSION, len(COLUMNS), capacity, self.count), 0)
+        os.replace(tmp, self.path)
+        os.close(self._fd)
+        self._fd, self.capacity = fd, capacity
+
+    def append(self, sample: dict):
+        if self.count == self.capacity:
+            self._grow()
+        for i, col in enumerate(COLUMNS):
+            os.pwrite(self._fd, struct.pack("<d", _value(sample.get(col))), HEADER_SIZE + (i * self.capacity + self.count) * 8)
+        self.count += 1
+        # il contatore e' aggiornato dopo i valori: un crash lascia al piu' un campione invisibile
+        os.pwrite(self._fd, HEADER.pack(MAGIC, VERSION, len(COLUMNS), self.capacity, self.count), 0)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_header(path: str):
+    with open(path, "rb") as f:
+        magic, version, ncols, capacity, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or ncols != len(COLUMNS):
+        raise ValueError(f"{path}: formato non riconosciuto")
+    return capacity, count
+
+
+def load_columns(path: str):
+    """Colonne del file: con numpy una vista (ncols, count) su np.memmap, senza copie;
+    altrimenti un dict di array('d')."""
+    capacity, count = read_header(path)
+    if np is not None:
+        if count == 0:
+            return np.empty((len(COLUMNS), 0))
+        return np.memmap(path, dtype="<f8", mode="r", offset=HEADER_SIZE, shape=(len(COLUMNS), capacity))[:, :count]
+    cols = {}
+    with open(path, "rb") as f:
+        for i, col in enumerate(COLUMNS):
+            f.seek(HEADER_SIZE + i * capacity * 8)
+            a = array("d")
+            a.frombytes(f.read(count * 8))
+            cols[col] = a
+    return cols
+
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def jain_index(values) -> float:
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    sq = sum(v * v for v in values)
+    return (sum(values) ** 2) / (len(values) * sq) if sq else None
+
+
+def _host_summary_np(cols):
+    idx = {c: i for i, c in enumerate(COLUMNS)}
+    bps = cols[idx["bits_per_second"]]
+    if bps.size == 0:
+        return {"samples": 0}
+    p50, p95, p99 = np.nanpercentile(bps, [50, 95, 99])
+    ts = cols[idx["ts"]]
+
+    def nansum(c):
+        v = cols[idx[c]]
+        return None if np.isnan(v).all() else float(np.nansum(v))
+
+    jitter = cols[idx["jitter_ms"]]
+    return {
+        "samples": int(bps.size),
+        "mean_bps": float(np.nanmean(bps)),
+        "p50_bps": float(p50),
+        "p95_bps": float(p95),
+        "p99_bps": float(p99),
+        "min_bps": float(np.nanmin(bps)),
+        "max_bps": float(np.nanmax(bps)),
+        "total_bytes": nansum("bytes"),
+        "retransmits": nansum("retransmits"),
+        "lost_packets": nansum("lost_packets"),
+        "mean_jitter_ms": None if np.isnan(jitter).all() else float(np.nanmean(jitter)),
+        "first_ts": float(ts[0]),
+        "last_ts": float(ts[-1]),
+    }
+
+
+def _host_summary_py(cols):
+    def clean(c):
+        return [v for v in cols[c] if not math.isnan(v)]
+
+    bps = sorted(clean("bits_per_second"))
+    if not bps:
+        return {"samples": 0}
+
+    def total(c):
+        v = clean(c)
+        return sum(v) if v else None
+
+    jitter = clean("jitter_ms")
+    ts = cols["ts"]
+    return {
+        "samples": len(cols["bits_per_second"]),
+        "mean_bps": sum(bps) / len(bps),
+        "p50_bps": _percentile(bps, 50),
+        "p95_bps": _percentile(bps, 95),
+        "p99_bps": _percentile(bps, 99),
+        "min_bps": bps[0],
+        "max_bps": bps[-1],
+        "total_bytes": total("bytes"),
+        "retransmits": total("retransmits"),
+        "lost_packets": total("lost_packets"),
+        "mean_jitter_ms": sum(jitter) / len(jitter) if jitter else None,
+        "first_ts": ts[0],
+        "last_ts": ts[-1],
+    }
+
+
+def _check_name(name: str):
+    if not name or name in (".", "..") or "/" in name or os.sep in name:
+        raise ValueError(f"Nome non valido per le serie temporali: {name!r}")
+
+
+class TimeseriesStore:
+    """Gestisce i writer aperti per (esperimento, host) e calcola i riepiloghi."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._writers = {}
+
+    def directory(self, experiment_id: str) -> str:
+        # i nomi diventano percorsi: non devono uscire da root (es. "../")
+        _check_name(experiment_id)
+        return os.path.join(self.root, experiment_id)
+
+    def path(self, experiment_id: str, hostname: str) -> str:
+        _check_name(hostname)
+        return os.path.join(self.directory(experiment_id), f"{hostname}.col")
+
+    def append(self, experiment_id: str, hostname: str, sample: dict):
+        key = (experiment_id, hostname)
+        with self._lock:
+            writer = self._writers.get(key)
+            if writer is None:
+                os.makedirs(self.directory(experiment_id), exist_ok=True)
+                writer = self._writers[key] = ColumnWriter(self.path(experiment_id, hostname))
+            writer.append(sample)
+
+    def count(self, experiment_id: str, hostname: str) -> int:
+        with self._lock:
+            writer = self._writers.get((experiment_id, hostname))
+            if writer is not None:
+                return writer.count
+        path = self.path(experiment_id, hostname)
+        return read_header(path)[1] if os.path.exists(path) else 0
+
+    def close(self, experiment_id: str = None):
+        with self._lock:
+            for key in [k for k in self._writers if experiment_id is None or k[0] == experiment_id]:
+                self._writers.pop(key).close()
+
+    def hosts(self, experiment_id: str) -> list:
+        d = self.directory(experiment_id)
+        if not os.path.isdir(d):
+            return []
+        return sorted(f[:-4] for f in os.listdir(d) if f.endswith(".col"))
+
+    def summary(self, experiment_id: str, hostname: str = None) -> dict:
+        """Statistiche per host (media, percentili, byte, ritrasmissioni, jitter, perdite)
+        e indice di fairness di Jain sulle medie per host."""
+        names = [hostname] if hostname else self.hosts(experiment_id)
+        per_host = {}
+        for h in names:
+            path = self.path(experiment_id, h)
+            if not os.path.exists(path):
+                continue
+            cols = load_columns(path)
+            per_host[h] = _host_summary_np(cols) if np is not None else _host_summary_py(cols)
+        means = [s.get("mean_bps") for s in per_host.values()]
+        return {
+            "experiment_id": experiment_id,
+            "hosts": per_host,
+            "aggregate_mean_bps": sum(m for m in means if m is not None) if per_host else None,
+            "jain_fairness": jain_index(means),
+            "vectorized": np is not None,
+        }
@@ -0,0 +1,446 @@
+import bisect
+import heapq
+import ipaddress
+import json
+import math
+import random
+import re
+
+# PyYAML e' opzionale: senza, la specifica va scritta in JSON
+try:
+    import yaml
+except Exception:
+    yaml = None
+
+# Specifica dichiarativa della topologia (topology.json) usata sia da
+# mininet_topology.py per creare la rete sia da ryu_routing.py, che ne ricava
+# indirizzi e rotte statiche con compile_routes():
+#   controllers: {nome: {ip, port, rest?}}  (rest: URL delle REST API Ryu, per la telemetria)
+#   routers / switches: {nome: {controller}}  (router: egress=true se e' un'uscita verso l'esterno)
+#   lans: [{subnet, router, gateway, switch?, uplink?, hosts: {nome: {ip, bw, delay}}}]
+#   links: [{routers: [a, b], subnet, bw, delay}]  (a = primo indirizzo, b = secondo)
+
+DEFAULT_SPEC = "topology.json"
+REF_BW = 1000.0  # Mbps, costo link = REF_BW / bw con weight="bw" (come OSPF)
+DEFAULT_ROUTE = "0.0.0.0/0"
+WEIGHTS = ("delay", "bw", "hops")
+AGGREGATE_MODES = ("none", "exact", "summary")
+
+
+class SpecError(ValueError):
+    pass
+
+
+def load_spec(path: str = DEFAULT_SPEC) -> dict:
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise SpecError("PyYAML non installato: usa la specifica in formato JSON")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def delay_ms(value) -> float:
+    """'2ms' / '500us' / '0.1s' / numero (ms) -> millisecondi."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = re.fullmatch(r"\s*([\d.]+)\s*(us|ms|s)?\s*", str(value))
+    if not m:
+        raise SpecError(f"Ritardo non valido: {value}")
+    scale = {"us": 1e-3, "ms": 1.0, "s": 1e3, None: 1.0}[m.group(2)]
+    return float(m.group(1)) * scale
+
+
+class Topology:
+    """Vista della specifica: router, LAN, link punto-punto e grafo dei router."""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.controllers = spec.get("controllers", {})
+        self.routers = spec.get("routers", {})
+        self.switches = spec.get("switches", {})
+        if not self.routers:
+            raise SpecError("La specifica non contiene router")
+        self.lans = []
+        for lan in spec.get("lans", []):
+            if lan.get("router") not in self.routers:
+                raise SpecError(f"LAN {lan.get('subnet')}: router {lan.get('router')} sconosciuto")
+            net = ipaddress.ip_network(lan["subnet"])
+            self.lans.append(dict(lan, network=net, gateway_cidr=f"{lan['gateway']}/{net.prefixlen}"))
+        self.links = []
+        self.adjacency = {r: {} for r in self.routers}  # router -> {vicino: link}
+        self.parallel = {r: {} for r in self.routers}  # router -> {vicino: [link, ...]}
+        for link in spec.get("links", []):
+            a, b = link["routers"]
+            for r in (a, b):
+                if r not in self.routers:
+                    raise SpecError(f"Link {link.get('subnet')}: router {r} sconosciuto")
+            net = ipaddress.ip_network(link["subnet"])
+            hosts = net.hosts()
+            ip_a, ip_b = str(next(hosts)), str(next(hosts))
+            entry = dict(link, network=net, addresses={a: ip_a, b: ip_b},
+                         delay_ms=delay_ms(link.get("delay", 0)), bw_mbps=float(link.get("bw", REF_BW)))
+            self.links.append(entry)
+            # con link paralleli tra gli stessi router resta il primo
+            self.adjacency[a].setdefault(b, entry)
+            self.adjacency[b].setdefault(a, entry)
+            self.parallel[a].setdefault(b, []).append(entry)
+            self.parallel[b].setdefault(a, []).append(entry)
+
+    def router_addresses(self) -> dict:
+        """{router: [cidr, ...]}: gateway delle LAN e indirizzi sui link punto-punto."""
+        addrs = {r: [] for r in self.routers}
+        for lan in self.lans:
+            addrs[lan["router"]].append(lan["gateway_cidr"])
+        for link in self.links:
+            for r, ip in link["addresses"].items():
+                addrs[r].append(f"{ip}/{link['network'].prefixlen}")
+        return addrs
+
+    def hosts(self) -> dict:
+        """{host: (ip/prefisso, gateway)}."""
+        out = {}
+        for lan in self.lans:
+            for name, h in lan.get("hosts", {}).items():
+                out[name] = (f"{h['ip']}/{lan['network'].prefixlen}", lan["gateway"])
+        return out
+
+    def host_macs(self) -> dict:
+        """{host: MAC}: lo stesso indirizzo assegnato da mininet_topology (macColonHex dell'indice)."""
+        return {name: mac_of(i + 1) for i, name in enumerate(self.hosts())}
+
+    def port_map(self) -> dict:
+        """{(nodo, porta OpenFlow): {link, peer, peer_port, bw}} per switch e router.
+
+        Le porte sono numerate come in Mininet: in ordine di creazione dei link
+        (mininet_topology.create_network), da 1 per gli switch e da 0 per gli host.
+        Sulle porte dei router ci sono anche `address` e `network` dell'interfaccia."""
+        next_port, ports = {}, {}
+
+        def new_port(node):
+            base = 0 if node not in self.routers and node not in self.switches else 1
+            next_port[node] = next_port.get(node, base - 1) + 1
+            return next_port[node]
+
+        def add(a, b, bw, addresses=None, network=None):
+            pa, pb = new_port(a), new_port(b)
+            for node, port, peer, peer_port in ((a, pa, b, pb), (b, pb, a, pa)):
+                if node in self.routers or node in self.switches:
+                    ports[(node, port)] = {"link": f"{a}-{b}", "peer": peer, "peer_port": peer_port, "bw": bw}
+                    if addresses and node in addresses:
+                        ports[(node, port)].update(address=addresses[node], network=str(network))
+
+        for lan in self.lans:
+            attach = lan.get("switch") or lan["router"]
+            gateway = {lan["router"]: lan["gateway"]}
+            for name, h in lan.get("hosts", {}).items():
+                add(name, attach, h.get("bw"), gateway, lan["network"])
+            if lan.get("switch"):
+                add(attach, lan["router"], lan.get("uplink", {}).get("bw"), gateway, lan["network"])
+        for link in self.links:
+            a, b = link["routers"]
+            add(a, b, link.get("bw"), link["addresses"], link["network"])
+        return ports
+
+    def link_cost(self, link: dict, weight: str) -> float:
+        if weight == "delay":
+            # piccolo costo per hop: a parita' di ritardo vince il percorso piu' corto
+            return link["delay_ms"] + 1e-6
+        if weight == "bw":
+            return REF_BW / link["bw_mbps"] if link["bw_mbps"] > 0 else float("inf")
+        return 1.0
+
+    def first_hops(self, src: str, weight: str = "delay") -> dict:
+        """Dijkstra da `src`: {router destinazione: (primo vicino, distanza)}."""
+        dist = {src: 0.0}
+        done = {}
+        heap = [(0.0, src, None)]
+        while heap:
+            d, u, hop = heapq.heappop(heap)
+            if u in done:
+                continue
+            done[u] = (hop, d)
+            for v in sorted(self.adjacency[u]):
+                if v in done:
+                    continue
+                nd = d + self.link_cost(self.adjacency[u][v], weight)
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v, hop or v))
+        del done[src]
+        return done
+
+    def multipath_hops(self, src: str, weight: str = "delay") -> dict:
+        """Come first_hops, ma con tutti i vicini che stanno su un cammino minimo:
+        {router destinazione: ([primi vicini], distanza)}."""
+        dist = {src: 0.0}
+        heap = [(0.0, src)]
+        order = []
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            order.append(u)
+            for v, link in self.adjacency[u].items():
+                nd = d + self.link_cost(link, weight)
+                if nd < dist.get(v, float("inf")) and not math.isclose(nd, dist.get(v, float("inf"))):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        # i primi vicini di v sono l'unione di quelli dei predecessori a pari costo
+        hops = {src: set()}
+        for v in order[1:]:
+            hops[v] = set()
+            for u, link in self.adjacency[v].items():
+                if u in hops and u != v and math.isclose(dist[u] + self.link_cost(link, weight), dist[v], abs_tol=1e-9):
+                    hops[v] |= hops[u] or {v}
+        return {v: (sorted(hops[v]), dist[v]) for v in order[1:]}
+
+
+def _aggregate_summary(routes: list, default_route: bool = False) -> list:
+    """Tabella minima a longest prefix match (ORTC, Draves et al.): rest_router da'
+    alle rotte statiche una priorita' crescente con la lunghezza del prefisso, quindi
+    un prefisso corto puo' coprire eccezioni piu' specifiche. Le subnet connesse (a
+    priorita' maggiore su rest_router) sono indifferenti; lo spazio non assegnato lo
+    e' solo con `default_route` (router di uscita): altrimenti un prefisso di sintesi
+    copre solo indirizzi instradati, perche' due router che si indicano a vicenda per
+    lo stesso spazio libero rimbalzerebbero il traffico fino alla scadenza del TTL."""
+    items = sorted((int(n.network_address), int(n.broadcast_address), gw, n) for n, gw in routes)
+    starts = [i[0] for i in items]
+    freq = {}
+    for _, _, gw, _ in items:
+        freq[gw] = freq.get(gw, 0) + 1
+
+    def covered(base, plen, lo, hi) -> bool:
+        # [base, fine del prefisso] interamente coperto dalle rotte lo..hi
+        end, nxt = base + (1 << (32 - plen)) - 1, base
+        for i in range(lo, hi):
+            if items[i][0] > nxt:
+                return False
+            nxt = max(nxt, min(items[i][1], end) + 1)
+        return nxt > end
+
+    def build(base, plen, lo, hi):
+        # nodo: (base, plen, gateway candidati, figli, tutto instradato, rotte);
+        # None = sottoalbero indifferente
+        if lo == hi:
+            return None
+        labels = {items[i][2] for i in range(lo, hi)}
+        if len(labels) == 1:
+            return (base, plen, labels, (), covered(base, plen, lo, hi), (lo, hi))
+        if plen == 32 or any(items[i][0] <= base and items[i][1] >= base + (1 << (32 - plen)) - 1 for i in range(lo, hi)):
+            raise SpecError(f"Prefissi sovrapposti con gateway diversi in {ipaddress.IPv4Network((base, plen))}")
+        mid = base + (1 << (31 - plen))
+        split = bisect.bisect_left(starts, mid, lo, hi)
+        left, right = build(base, plen + 1, lo, split), build(mid, plen + 1, split, hi)
+        if left is None or right is None:
+            return (base, plen, (left or right)[2], (left, right), False, (lo, hi))
+        both = left[2] & right[2]
+        return (base, plen, both or (left[2] | right[2]), (left, right), left[4] and right[4], (lo, hi))
+
+    out = []
+
+    def emit(node, inherited):
+        if node is None:
+            return
+        base, plen, labels, children, full, (lo, hi) = node
+        chosen = inherited
+        if inherited not in labels:
+            if not (full or default_route):
+                # il prefisso coprirebbe spazio non assegnato: si scende ai figli o alle rotte
+                if not children:
+                    out.extend((n, items[lo][2]) for n in ipaddress.collapse_addresses(i[3] for i in items[lo:hi]))
+                for child in children:
+                    emit(child, inherited)
+                return
+            chosen = max(labels, key=lambda gw: (freq[gw], gw))
+            out.append((ipaddress.IPv4Network((base, plen)), chosen))
+        for child in children:
+            emit(child, chosen)
+
+    emit(build(0, 0, 0, len(items)), None)
+    return out
+
+
+def _aggregate_exact(routes: list) -> list:
+    by_gw = {}
+    for net, gw in routes:
+        by_gw.setdefault(gw, []).append(net)
+    return [(n, gw) for gw, nets in by_gw.items() for n in ipaddress.collapse_addresses(nets)]
+
+
+def aggregate_routes(routes: list, mode: str = "exact", default_route: bool = False) -> list:
+    """[(ip_network, gateway)] -> [(destinazione, gateway)] con meno voci:
+    'exact' unisce solo prefissi contigui con lo stesso gateway (stesso spazio
+    coperto, rotte disgiunte), 'summary' usa prefissi di sintesi sovrapposti
+    risolti dal longest prefix match (0.0.0.0/0 solo con `default_route`, cioe'
+    per i router di uscita), 'none' lascia tutto invariato."""
+    if mode == "none":
+        out = list(routes)
+    elif mode == "exact":
+        out = _aggregate_exact(routes)
+    elif mode == "summary":
+        out = _aggregate_summary(routes, default_route)
+    else:
+        raise SpecError(f"Aggregazione non valida: {mode} ({', '.join(AGGREGATE_MODES)})")
+    return [(str(n), gw) for n, gw in sorted(out, key=lambda r: (r[0].network_address, r[0].prefixlen))]
+
+
+def compile_routes(topo: Topology, weight: str = "delay", aggregate: str = "exact", include_links: bool = False) -> dict:
+    """Rotte statiche per ogni router dai cammini minimi su tutte le coppie.
+
+    Ogni LAN (e, con include_links, ogni subnet punto-punto) non connessa al
+    router e' instradata verso il primo vicino del cammino minimo, pesato per
+    ritardo, banda o numero di hop. Ritorna {router: [(destinazione, gateway)]}."""
+    if weight not in WEIGHTS:
+        raise SpecError(f"Peso non valido: {weight} ({', '.join(WEIGHTS)})")
+    prefixes = {r: [] for r in topo.routers}  # prefissi raggiungibili tramite il router
+    for lan in topo.lans:
+        prefixes[lan["router"]].append(lan["network"])
+    routes = {}
+    for src in topo.routers:
+        hops = topo.first_hops(src, weight)
+        table = []
+        for dst, (hop, _) in hops.items():
+            gw = topo.adjacency[src][hop]["addresses"][hop]
+            table += [(net, gw) for net in prefixes[dst]]
+        if include_links:
+            for link in topo.links:
+                if src in link["routers"]:
+                    continue
+                near = min((r for r in link["routers"] if r in hops), key=lambda r: hops[r][1], default=None)
+                if near is not None:
+                    table.append((link["network"], topo.adjacency[src][hops[near][0]]["addresses"][hops[near][0]]))
+        routes[src] = aggregate_routes(table, aggregate, bool(topo.routers[src].get("egress")))
+    return routes
+
+
+def compile_multipath_routes(topo: Topology, weight: str = "delay", aggregate: str = "exact",
+                             include_links: bool = False) -> dict:
+    """Come compile_routes, ma ogni destinazione ha tutti i next hop a pari costo
+    (anche sui link paralleli dello stesso costo), ciascuno col peso proporzionale
+    alla banda del primo link: {router: [(destinazione, ((gateway, peso), ...))]}.
+    Con un solo cammino minimo il gruppo ha un solo elemento."""
+    if weight not in WEIGHTS:
+        raise SpecError(f"Peso non valido: {weight} ({', '.join(WEIGHTS)})")
+    prefixes = {r: [] for r in topo.routers}
+    for lan in topo.lans:
+        prefixes[lan["router"]].append(lan["network"])
+
+    def group(src, neighbors):
+        out = []
+        for hop in neighbors:
+            best = topo.link_cost(topo.adjacency[src][hop], weight)
+            for link in topo.parallel[src][hop]:
+                if math.isclose(topo.link_cost(link, weight), best):
+                    out.append((link["addresses"][hop], link["bw_mbps"]))
+        # pesi interi piccoli: la banda in rapporto alla minore del gruppo
+        low = min(bw for _, bw in out) or 1.0
+        return tuple(sorted((gw, max(1, round(bw / low))) for gw, bw in out))
+
+    routes = {}
+    for src in topo.routers:
+        hops = topo.multipath_hops(src, weight)
+        table = []
+        for dst, (neighbors, _) in hops.items():
+            gws = group(src, neighbors)
+            table += [(net, gws) for net in prefixes[dst]]
+        if include_links:
+            for link in topo.links:
+                if src in link["routers"]:
+                    continue
+                ends = [r for r in link["routers"] if r in hops]
+                if ends:
+                    d = min(hops[r][1] for r in ends)
+                    near = sorted({h for r in ends if math.isclose(hops[r][1], d) for h in hops[r][0]})
+                    table.append((link["network"], group(src, near)))
+        routes[src] = aggregate_routes(table, aggregate, bool(topo.routers[src].get("egress")))
+    return routes
+
+
+def mac_of(index: int) -> str:
+    """Come mininet.util.macColonHex: 1 -> 00:00:00:00:00:01."""
+    return ":".join(f"{(index >> shift) & 0xff:02x}" for shift in range(40, -8, -8))
+
+
+def router_mac(router: str, port: int) -> str:
+    """MAC virtuale dell'interfaccia `port` di un router (0a:00:<router>:<porta>),
+    usato da ryu_static_router.py per ARP e riscrittura degli indirizzi."""
+    num = int(router[1:])
+    return f"0a:00:{(num >> 8) & 0xff:02x}:{num & 0xff:02x}:{(port >> 8) & 0xff:02x}:{port & 0xff:02x}"
+
+
+def _empty_spec(names: list) -> dict:
+    # stesso schema della rete di riferimento: router su c0, switch L2 su c1
+    return {
+        "controllers": {"c0": {"ip": "127.0.0.1", "port": 6633, "rest": "http://127.0.0.1:8080"},
+                        "c1": {"ip": "127.0.0.1", "port": 6634}},
+        "routers": {r: {"controller": "c0"} for r in names},
+        "switches": {},
+        "lans": [],
+        "links": [],
+    }
+
+
+def _add_lan(spec: dict, index: int, router: str, hosts_per_lan: int, l2_switch: bool):
+    subnet = ipaddress.ip_network(f"10.{index // 256}.{index % 256}.0/24")
+    if not 0 < hosts_per_lan <= 240:
+        raise SpecError("hosts_per_lan deve essere tra 1 e 240")
+    first = len(spec["lans"]) * hosts_per_lan
+    hosts = {f"h{first + k + 1}": {"ip": str(subnet[10 + k]), "bw": 100, "delay": "0.05ms"} for k in range(hosts_per_lan)}
+    lan = {"subnet": str(subnet), "router": router, "gateway": str(subnet[1]), "hosts": hosts}
+    if l2_switch:
+        switch = f"s{len(spec['switches']) + 1}"
+        spec["switches"][switch] = {"controller": "c1"}
+        lan.update(switch=switch, uplink={"bw": 1000, "delay": "0.05ms"})
+    spec["lans"].append(lan)
+
+
+def _add_links(spec: dict, pairs: list, rng: random.Random, bw=None, delay=None):
+    link_base = int(ipaddress.ip_address("172.16.0.0"))
+    for a, b in pairs:
+        j = len(spec["links"])
+        if j >= 1 << 18:
+            raise SpecError("Troppi link per 172.16.0.0/12")
+        spec["links"].append({
+            "routers": [a, b],
+            "subnet": str(ipaddress.ip_network((link_base + 4 * j, 30))),
+            "bw": bw if bw is not None else rng.choice((10, 50, 100, 1000)),
+            "delay": delay if delay is not None else f"{rng.choice((0.5, 1, 2, 5))}ms",
+        })
+
+
+def generate_mesh(n_routers: int, extra_links: int = None, hosts_per_lan: int = 1, l2_switches: bool = False, seed: int = 0) -> dict:
+    """Specifica sintetica: albero casuale di `n_routers` router piu' `extra_links`
+    link aggiuntivi, una LAN /24 per router (10.x.y.0) e link /30 in 172.16.0.0/12.
+    Con `l2_switches` gli host di ogni LAN sono dietro uno switch L2 (controller c1)."""
+    rng = random.Random(seed)
+    if extra_links is None:
+        extra_links = n_routers
+    names = [f"r{i + 1}" for i in range(n_routers)]
+    pairs = set()
+    for i in range(1, n_routers):
+        pairs.add((names[rng.randrange(i)], names[i]))
+    max_pairs = n_routers * (n_routers - 1) // 2
+    while len(pairs) < min(n_routers - 1 + extra_links, max_pairs):
+        a, b = rng.sample(names, 2)
+        if (a, b) not in pairs and (b, a) not in pairs:
+            pairs.add((a, b))
+    spec = _empty_spec(names)
+    for i, r in enumerate(names):
+        _add_lan(spec, i, r, hosts_per_lan, l2_switches)
+    _add_links(spec, sorted(pairs, key=lambda p: (int(p[0][1:]), int(p[1][1:]))), rng)
+    return spec
+
+
+def generate_leaf_spine(spines: int, leaves: int, hosts_per_leaf: int = 2, l2_switches: bool = False,
+                        bw: int = 1000, delay: str = "0.1ms", seed: int = 0) -> dict:
+    """Specifica leaf/spine: router r1..rS di spine, poi le leaf collegate a tutte le
+    spine; una LAN /24 con `hosts_per_leaf` host per leaf."""
+    rng = random.Random(seed)
+    names = [f"r{i + 1}" for i in range(spines + leaves)]
+    spine_names, leaf_names = names[:spines], names[spines:]
+    spec = _empty_spec(names)
+    for i, leaf in enumerate(leaf_names):
+        _add_lan(spec, i, leaf, hosts_per_leaf, l2_switches)
+    _add_links(spec, [(leaf, spine) for leaf in leaf_names for spine in spine_names], rng, bw, delay)
+    return spec
@@ -0,0 +1,109 @@
+import http.client
+import os
+import socket
+
+from flask import Flask, Response, jsonify, request
+
+import metrics
+import server_flask
+from results_store import ResultsStore
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except Exception:
+    WsgiToAsgi = None
+
+# App dei worker della modalita' di produzione (vedi runner.py):
+#   gunicorn -k gthread -w 4 --threads 16 -b 0.0.0.0:5000 wsgi:app
+#   uvicorn --workers 4 --port 5000 wsgi:asgi_app      (richiede asgiref)
+# /results e /results/summary sono letti direttamente dai file (indice in memoria
+# aggiornato a ogni query, serie colonnari in mmap) e scalano con i worker, come
+# /predict che non legge lo stato degli esperimenti; le altre richieste sono
+# inoltrate al runner sul socket Unix locale. Le metriche registrate dai worker
+# (serializzazione di /results, lock di results_store) sono scritte in
+# metrics.WORKERS_DIR e sommate dal runner in /metrics.
+
+RUNNER_TIMEOUT = float(os.environ.get("RUNNER_TIMEOUT", 60))  # > LONG_POLL_TIMEOUT e SSE_KEEPALIVE
+FORWARD_HEADERS = ("Content-Type", "Accept", "Last-Event-ID", "If-None-Match")
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "server", "date"}
+
+# i worker non scrivono mai i risultati: il file appartiene al runner
+# (stesso lock strumentato: la contesa in lettura finisce nelle metriche del worker)
+server_flask.results_store = ResultsStore(server_flask.JSON_RESULTS, readonly=True,
+                                          lock=server_flask.results_store._lock)
+
+app = Flask(__name__)
+app.add_url_rule("/results", view_func=server_flask.get_results, methods=["GET"])
+app.add_url_rule("/results/summary", view_func=server_flask.get_results_summary, methods=["GET"])
+app.add_url_rule("/predict", view_func=server_flask.predict, methods=["POST"])
+
+
+@app.before_request
+def start_metrics_export():
+    # nel processo worker (dopo il fork di gunicorn), non nel master
+    metrics.export_worker()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def stream_body(conn, resp):
+    try:
+        while True:
+            chunk = resp.read1(65536)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        conn.close()
+
+
+@app.route("/", defaults={"path": ""}, methods=["GET", "POST", "PUT", "DELETE"])
+@app.route("/<path:path>", methods=["GET", "POST", "PUT", "DELETE"])
+def forward(path):
+    conn = UnixHTTPConnection(server_flask.RUNNER_SOCKET, RUNNER_TIMEOUT)
+    headers = {h: request.headers[h] for h in FORWARD_HEADERS if h in request.headers}
+    try:
+        conn.request(request.method, request.full_path.rstrip("?"), body=request.get_data() or None, headers=headers)
+        resp = conn.getresponse()
+    except OSError as e:
+        conn.close()
+        return jsonify({"error": f"Runner non raggiungibile ({e})"}), 503
+    out_headers = [(k, v) for k, v in resp.getheaders() if k.lower() not in HOP_HEADERS]
+    if resp.getheader("Content-Type", "").startswith("text/event-stream"):
+        return Response(stream_body(conn, resp), status=resp.status, headers=out_headers)
+    try:
+        body = resp.read()
+    finally:
+        conn.close()
+    return Response(body, status=resp.status, headers=out_headers)
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    # stato del worker; quello del runner e' su /runner/health
+    return jsonify({"status": "healthy", "role": "api", "pid": os.getpid()})
+
+
+@app.route("/runner/health", methods=["GET"])
+def runner_health():
+    conn = UnixHTTPConnection(server_flask.RUNNER_SOCKET, 5)
+    try:
+        conn.request("GET", "/health")
+        resp = conn.getresponse()
+        return Response(resp.read(), status=resp.status, mimetype="application/json")
+    except OSError as e:
+        return jsonify({"status": "unreachable", "error": str(e)}), 503
+    finally:
+        conn.close()
+
+
+asgi_app = WsgiToAsgi(app) if WsgiToAsgi is not None else None